@@ -0,0 +1,191 @@
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from neo4j import AsyncDriver, READ_ACCESS
+from neo4j.spatial import WGS84Point
+
+from app.config.reference_data import ReferenceData
+from app.config.settings import settings
+from app.config.unit_of_work import UnitOfWork
+from app.services.category_service import CategoryService
+from app.services.feature_service import FeatureService
+from app.services.place_service import PlaceService
+from app.services.recommendation_service import RecommendationService
+from app.services.user_service import UserService
+from app.storage import memory_operations as memory
+from app.storage.memory_driver import MemoryDriver
+from neo4j_setup.importers.metrics import percentile
+from neo4j_setup.synthetic.generator import SCALES, SyntheticGraph
+from neo4j_setup.synthetic.sinks import write_neo4j
+
+
+def summarize(latencies: list[float], elapsed: float) -> dict[str, float]:
+    return {
+        "n": len(latencies),
+        "p50": round(percentile(latencies, 50) * 1000, 3),
+        "p95": round(percentile(latencies, 95) * 1000, 3),
+        "p99": round(percentile(latencies, 99) * 1000, 3),
+        "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0,
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0,
+    }
+
+
+async def measure(
+    call: Callable[[int], Awaitable[Any]], iterations: int, warmup: int
+) -> dict[str, float]:
+    for i in range(warmup):
+        await call(i)
+
+    latencies = list()
+    started = time.perf_counter()
+    for i in range(iterations):
+        now = time.perf_counter()
+        await call(i)
+        latencies.append(time.perf_counter() - now)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+reference_data: dict[int, ReferenceData] = dict()
+
+
+@asynccontextmanager
+async def request_services(
+    driver: AsyncDriver, access_mode: str = READ_ACCESS
+) -> AsyncIterator[SimpleNamespace]:
+    # Same service graph and unit of work as the dependencies build for a request,
+    # with the reference data loaded once per driver as on application startup
+    if id(driver) not in reference_data:
+        reference_data[id(driver)] = ReferenceData()
+        await reference_data[id(driver)].load(driver)
+    reference = reference_data[id(driver)]
+    async with UnitOfWork(driver, access_mode=access_mode) as uow:
+        feature = FeatureService(uow, features=reference.features)
+        category = CategoryService(uow, categories=reference.categories)
+        place = PlaceService(uow, feature_service=feature, category_service=category)
+        user = UserService(uow, feature_service=feature, place_service=place)
+        yield SimpleNamespace(
+            feature=feature,
+            category=category,
+            place=place,
+            user=user,
+            recommendation=RecommendationService(
+                uow, category_service=category, user_service=user
+            ),
+        )
+
+
+def benchmark_graph(scale: str = "10k", seed: int = 42) -> SyntheticGraph:
+    # Fixed dataset shared by every benchmark run so results are comparable
+    return SyntheticGraph(seed=seed, **SCALES[scale])
+
+
+def sample_targets(graph: SyntheticGraph, samples: int, seed: int) -> dict[str, Any]:
+    # Targets are picked with their own generator, so every run queries the same ones
+    rng = random.Random(f"{seed}:benchmark")
+    place_indexes = set(rng.sample(range(graph.places_count), samples))
+    places = [
+        place
+        for index, (place, _, _) in enumerate(graph.places())
+        if index in place_indexes
+    ]
+    users = [
+        graph.user_id(index) for index in rng.sample(range(graph.users_count), samples)
+    ]
+    return {
+        "places": places,
+        "users": users,
+        "category": graph.category_name(0),
+    }
+
+
+async def load_dataset(driver: AsyncDriver, graph: SyntheticGraph) -> None:
+    if os.getenv("ENV_MODE") != "test":
+        raise RuntimeError(
+            "Refusing to wipe the database: benchmarks load data only with ENV_MODE=test"
+        )
+
+    async with driver.session(database=settings.NEO4J_DATABASE) as session:
+        result = await session.run(
+            "MATCH (n) CALL (n) { DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS"
+        )
+        await result.consume()
+    await write_neo4j(graph, driver, batch_size=5000, max_retries=5)
+
+
+def load_memory_dataset(graph: SyntheticGraph) -> MemoryDriver:
+    driver = MemoryDriver()
+    store = driver.graph
+    for name in graph.categories():
+        memory.add_category(store, name)
+    for name in graph.features():
+        memory.add_feature(store, name)
+    for place, categories, features in graph.places():
+        coordinates = WGS84Point((place["longitude"], place["latitude"]))
+        memory.add_place(store, place["placeId"], {**place, "coordinates": coordinates})
+        # Linked directly, the DAO versions also build the extended projection
+        for name in categories:
+            store.link(
+                store.place_categories, store.category_places, place["placeId"], name
+            )
+        for name in features:
+            store.link(
+                store.place_features, store.feature_places, place["placeId"], name
+            )
+    for user, needs in graph.users():
+        memory.add_user(store, user["userId"], user["born"], user["gender"])
+        for name in needs:
+            store.link(store.user_features, store.feature_users, user["userId"], name)
+    for rating in graph.ratings():
+        memory.add_rating(store, rating["userId"], rating["placeId"], rating["rating"])
+    return driver
+
+
+def environment() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_results(path: str, results: dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    metric: str,
+    tolerance: float,
+) -> list[str]:
+    regressions = list()
+    print(f"{'scenario':<55} {'baseline':>10} {'current':>10} {'delta':>8}")
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None or not previous.get(metric):
+            print(f"{name:<55} {'-':>10} {current[metric]:>10} {'new':>8}")
+            continue
+        delta = (current[metric] - previous[metric]) / previous[metric]
+        flag = ""
+        if delta > tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(
+            f"{name:<55} {previous[metric]:>10} {current[metric]:>10} {delta:>+8.1%}{flag}"
+        )
+    return regressions
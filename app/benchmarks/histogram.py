@@ -0,0 +1,64 @@
+from typing import Any
+
+PERCENTILES = [50, 90, 95, 99, 99.9]
+
+
+class LatencyHistogram(object):
+    """Log-linear latency histogram in the spirit of HdrHistogram: values are kept
+    in microseconds with ``precision_bits`` of linear sub-buckets per power of
+    two, so every recorded value is exact to within 1 / 2 ** precision_bits
+    using constant memory whatever the number of samples."""
+
+    def __init__(self, precision_bits: int = 7):
+        self.precision_bits = precision_bits
+        self.counts: dict[tuple[int, int], int] = dict()
+        self.count = 0
+        self.total = 0
+        self.min: int | None = None
+        self.max = 0
+
+    def bucket(self, value: int) -> tuple[int, int]:
+        shift = max(0, value.bit_length() - self.precision_bits)
+        return shift, value >> shift
+
+    def record(self, seconds: float) -> None:
+        value = max(0, int(seconds * 1_000_000))
+        key = self.bucket(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count = self.count + 1
+        self.total = self.total + value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.count = self.count + other.count
+        self.total = self.total + other.total
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def value_at(self, pct: float) -> int:
+        if self.count == 0:
+            return 0
+        target = max(1, round(pct / 100 * self.count))
+        seen = 0
+        for shift, sub_bucket in sorted(self.counts):
+            seen = seen + self.counts[(shift, sub_bucket)]
+            if seen >= target:
+                # Highest value of the bucket, never above the recorded maximum
+                return min(self.max, ((sub_bucket + 1) << shift) - 1)
+        return self.max
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "minMs": round((self.min or 0) / 1000, 3),
+            "meanMs": round(self.total / self.count / 1000, 3) if self.count else 0,
+            "maxMs": round(self.max / 1000, 3),
+            **{
+                f"p{pct:g}Ms": round(self.value_at(pct) / 1000, 3)
+                for pct in PERCENTILES
+            },
+        }
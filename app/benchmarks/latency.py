@@ -0,0 +1,200 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import Any, Awaitable, Callable
+
+from neo4j import AsyncDriver
+
+from app.benchmarks.common import (
+    benchmark_graph,
+    compare,
+    environment,
+    load_dataset,
+    load_memory_dataset,
+    sample_targets,
+    measure,
+    request_services,
+    write_results,
+)
+from app.config.migrations import migrate
+from app.config.neo4j import create_driver
+from app.config.pagination import encode_cursor
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+RECOMMENDATION_RADII = [500, 2000, 10000, 50000]
+NAME_POSITION_RADII = [50, 200, 1000]
+PAGE_DEPTHS = [0, 100, 1000, 5000]
+
+
+def scenarios(
+    driver: AsyncDriver, targets: dict[str, Any]
+) -> dict[str, Callable[[int], Awaitable[Any]]]:
+    places = targets["places"]
+    users = targets["users"]
+
+    def pick(items: list[Any], i: int) -> Any:
+        return items[i % len(items)]
+
+    def in_request(call: Callable[[Any, int], Awaitable[Any]]) -> Callable:
+        # Every iteration is a request with its own unit of work
+        async def request(i: int) -> Any:
+            async with request_services(driver) as services:
+                return await call(services, i)
+
+        return request
+
+    calls: dict[str, Callable[[Any, int], Awaitable[Any]]] = dict()
+
+    for radius in RECOMMENDATION_RADII:
+        calls[f"recommend_places_near_by_affinity[radius={radius}]"] = (
+            lambda s, i, radius=radius: s.recommendation.recommend_places_near_by_affinity(
+                user_id=pick(users, i),
+                base_category=targets["category"],
+                latitude=pick(places, i)["latitude"],
+                longitude=pick(places, i)["longitude"],
+                max_distance_meters=radius,
+            )
+        )
+
+    for radius in NAME_POSITION_RADII:
+        calls[f"get_place_by_name_and_position[radius={radius}]"] = (
+            lambda s, i, radius=radius: s.place.get_place_by_name_and_position(
+                name=pick(places, i)["name"],
+                latitude=pick(places, i)["latitude"],
+                longitude=pick(places, i)["longitude"],
+                max_distance_meters=radius,
+            )
+        )
+
+    calls["get_place_extended"] = lambda s, i: s.place.get_place(
+        placeId=pick(places, i)["placeId"]
+    )
+
+    for skip in PAGE_DEPTHS:
+        calls[f"get_all_places[skip={skip}]"] = (
+            lambda s, i, skip=skip: s.place.get_all_places(skip=skip)
+        )
+        calls[f"get_all_users[skip={skip}]"] = (
+            lambda s, i, skip=skip: s.user.get_all_users(skip=skip)
+        )
+    # Cursors at the sampled targets, which sit at any depth of the key order
+    calls["get_all_places[after]"] = lambda s, i: s.place.get_all_places(
+        after=encode_cursor(
+            "placeId", pick(places, i)["placeId"], pick(places, i)["placeId"]
+        )
+    )
+    calls["get_all_users[after]"] = lambda s, i: s.user.get_all_users(
+        after=encode_cursor("userId", pick(users, i), pick(users, i))
+    )
+    calls["get_all_categories[skip=0]"] = lambda s, i: s.category.get_all_categories()
+    calls["get_all_features[skip=0]"] = lambda s, i: s.feature.get_all_features()
+
+    return {name: in_request(call) for name, call in calls.items()}
+
+
+async def run(args: argparse.Namespace) -> int:
+    graph = benchmark_graph(args.scale, args.seed)
+    if args.backend == "memory":
+        driver = load_memory_dataset(graph)
+    else:
+        driver = await create_driver()
+    try:
+        if args.load and args.backend == "neo4j":
+            await migrate(driver)
+            await load_dataset(driver, graph)
+
+        targets = sample_targets(graph, args.samples, args.seed)
+        results = dict()
+        for name, call in scenarios(driver, targets).items():
+            if args.only and args.only not in name:
+                continue
+            results[name] = await measure(call, args.iterations, args.warmup)
+            logging.info(json.dumps({"scenario": name, **results[name]}))
+    finally:
+        await driver.close()
+
+    write_results(
+        args.output,
+        {
+            "dataset": {"scale": args.scale, "seed": args.seed},
+            "backend": args.backend,
+            "environment": environment(),
+            "iterations": args.iterations,
+            "results": results,
+        },
+    )
+
+    if args.update_baseline:
+        write_results(
+            args.baseline,
+            {"scale": args.scale, "backend": args.backend, "results": results},
+        )
+        logging.info(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        logging.info(f"No baseline at {args.baseline}, run with --update-baseline")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("scale") != args.scale or baseline.get("backend") != args.backend:
+        logging.info(
+            f"Baseline was recorded at scale {baseline.get('scale')} on the "
+            f"{baseline.get('backend')} backend, not comparing"
+        )
+        return 0
+
+    regressions = compare(results, baseline["results"], args.metric, args.tolerance)
+    if regressions:
+        logging.info(
+            f"{len(regressions)} scenarios regressed: {', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.benchmarks.latency",
+        description="Latency benchmarks of the place and recommendation services",
+    )
+    parser.add_argument("--scale", choices=["10k", "1m"], default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--backend",
+        choices=["neo4j", "memory"],
+        default="neo4j",
+        help="memory measures the services alone on an in-process copy of the dataset",
+    )
+    parser.add_argument(
+        "--load",
+        action="store_true",
+        help="Wipe the test database and load the synthetic dataset first",
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--only", help="Run only scenarios containing this text")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--metric", choices=["p50", "p95", "p99"], default="p95")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative slowdown against the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
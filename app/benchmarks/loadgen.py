@@ -0,0 +1,290 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from typing import Any, Callable
+from urllib.parse import quote
+
+import httpx
+
+from app.benchmarks.common import benchmark_graph, sample_targets, write_results
+from app.benchmarks.histogram import LatencyHistogram
+from app.config.settings import settings
+
+DEFAULT_MIX = "places=15,place=25,find=10,recommend=30,rate=10,attach=5,detach=5"
+
+Request = tuple[str, str, str]
+
+
+def request_builders(
+    targets: dict[str, Any], features: list[str], rng: random.Random
+) -> dict[str, Callable[[], Request]]:
+    places = targets["places"]
+    users = targets["users"]
+
+    def place() -> dict[str, Any]:
+        return rng.choice(places)
+
+    def recommend() -> Request:
+        p = place()
+        radius = rng.choice([500, 2000, 10000])
+        return (
+            "GET",
+            f"/places/recommend/{targets['category']}/for/{rng.choice(users)}"
+            f"/near/{p['latitude']}/{p['longitude']}/with-max-distance/{radius}",
+            "recommend",
+        )
+
+    def find() -> Request:
+        p = place()
+        return (
+            "GET",
+            f"/places/find/{quote(p['name'])}/near/{p['latitude']}/{p['longitude']}",
+            "find",
+        )
+
+    return {
+        "places": lambda: ("GET", f"/places?skip={rng.randrange(0, 1000)}", "places"),
+        "place": lambda: ("GET", f"/places/{place()['placeId']}", "place"),
+        "find": find,
+        "recommend": recommend,
+        "rate": lambda: (
+            "POST",
+            f"/users/{rng.choice(users)}/rates/{place()['placeId']}"
+            f"/with/{rng.randint(1, 5)}",
+            "rate",
+        ),
+        "attach": lambda: (
+            "POST",
+            f"/places/{place()['placeId']}/has/{rng.choice(features)}",
+            "attach",
+        ),
+        "detach": lambda: (
+            "DELETE",
+            f"/places/{place()['placeId']}/has-not/{rng.choice(features)}",
+            "detach",
+        ),
+    }
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    weights = dict()
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def generated_schedule(args: argparse.Namespace) -> list[tuple[float, Request]]:
+    graph = benchmark_graph(args.scale, args.seed)
+    targets = sample_targets(graph, args.samples, args.seed)
+    rng = random.Random(f"{args.seed}:loadgen")
+    builders = request_builders(targets, list(graph.features()), rng)
+
+    weights = parse_mix(args.mix)
+    unknown = set(weights) - set(builders)
+    if unknown:
+        raise ValueError(
+            f"Unknown routes in mix: {', '.join(sorted(unknown))}. "
+            f"Available: {', '.join(builders)}"
+        )
+
+    # Open loop: Poisson arrivals at the target rate, independent of response times
+    schedule = list()
+    offset = 0.0
+    total = args.warmup + args.duration
+    while True:
+        offset = offset + rng.expovariate(args.rate)
+        if offset >= total:
+            break
+        route = rng.choices(list(weights), weights=list(weights.values()))[0]
+        schedule.append((offset, builders[route]()))
+    return schedule
+
+
+def replayed_schedule(path: str, speed: float) -> list[tuple[float, Request]]:
+    schedule = list()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            schedule.append(
+                (entry["t"] / speed, (entry["method"], entry["path"], entry["route"]))
+            )
+    return schedule
+
+
+class LoadRun(object):
+    def __init__(self, warmup: float, max_in_flight: int):
+        self.warmup = warmup
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.dropped = 0
+        self.histograms: dict[str, LatencyHistogram] = dict()
+        self.statuses: dict[str, dict[str, int]] = dict()
+
+    async def send(
+        self, client: httpx.AsyncClient, request: Request, offset: float, start: float
+    ) -> None:
+        method, path, route = request
+        self.in_flight = self.in_flight + 1
+        try:
+            response = await client.request(method, path)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        finally:
+            self.in_flight = self.in_flight - 1
+
+        if offset < self.warmup:
+            return
+        # Measured from the scheduled send time to avoid coordinated omission
+        latency = time.perf_counter() - (start + offset)
+        self.histograms.setdefault(route, LatencyHistogram()).record(latency)
+        statuses = self.statuses.setdefault(route, dict())
+        statuses[status] = statuses.get(status, 0) + 1
+
+    async def run(
+        self,
+        client: httpx.AsyncClient,
+        schedule: list[tuple[float, Request]],
+        record: str | None,
+    ) -> float:
+        trace = open(record, "w", encoding="utf-8") if record else None
+        tasks = set()
+        start = time.perf_counter()
+        try:
+            for offset, request in schedule:
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if self.in_flight >= self.max_in_flight:
+                    self.dropped = self.dropped + 1
+                    continue
+
+                if trace is not None:
+                    method, path, route = request
+                    trace.write(
+                        json.dumps(
+                            {
+                                "t": round(offset, 6),
+                                "method": method,
+                                "path": path,
+                                "route": route,
+                            }
+                        )
+                        + "\n"
+                    )
+                task = asyncio.create_task(self.send(client, request, offset, start))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        finally:
+            if trace is not None:
+                trace.close()
+        return time.perf_counter() - start
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        total = LatencyHistogram()
+        routes = dict()
+        for route, histogram in sorted(self.histograms.items()):
+            total.merge(histogram)
+            routes[route] = {
+                **histogram.summary(),
+                "statuses": self.statuses[route],
+            }
+        measured = max(elapsed - self.warmup, 0.001)
+        return {
+            "elapsedSeconds": round(elapsed, 3),
+            "requestsPerSecond": round(total.count / measured, 2),
+            "dropped": self.dropped,
+            "total": total.summary(),
+            "routes": routes,
+        }
+
+
+async def run(args: argparse.Namespace) -> None:
+    if args.replay:
+        schedule = replayed_schedule(args.replay, args.speed)
+    else:
+        schedule = generated_schedule(args)
+
+    load = LoadRun(
+        warmup=0 if args.replay else args.warmup, max_in_flight=args.max_in_flight
+    )
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        headers={settings.SERVICE_AK_HEADER: args.api_key},
+        timeout=args.timeout,
+        limits=httpx.Limits(
+            max_connections=args.connections,
+            max_keepalive_connections=args.connections,
+        ),
+    ) as client:
+        logging.info(f"Sending {len(schedule)} requests to {args.url}")
+        elapsed = await load.run(client, schedule, args.record)
+
+    report = load.report(elapsed)
+    print(
+        f"{'route':<12} {'count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  statuses"
+    )
+    for route, summary in {**report["routes"], "total": report["total"]}.items():
+        print(
+            f"{route:<12} {summary['count']:>7} {summary['p50Ms']:>9} {summary['p95Ms']:>9}"
+            f" {summary['p99Ms']:>9} {summary['maxMs']:>9}  {summary.get('statuses', '')}"
+        )
+    print(
+        f"{report['requestsPerSecond']} req/s measured, {report['dropped']} dropped"
+        f" over the in-flight limit"
+    )
+    if args.output:
+        write_results(args.output, {"url": args.url, "mix": args.mix, **report})
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.benchmarks.loadgen",
+        description="Open-loop load generator replaying a mix of API routes",
+    )
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--api-key", default=settings.SERVICE_API_KEY)
+    parser.add_argument(
+        "--mix",
+        default=DEFAULT_MIX,
+        help=f"Comma separated route weights (default: {DEFAULT_MIX})",
+    )
+    parser.add_argument("--rate", type=float, default=50, help="Requests per second")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds")
+    parser.add_argument(
+        "--warmup", type=float, default=10, help="Seconds sent before measuring"
+    )
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument(
+        "--scale",
+        choices=["10k", "1m"],
+        default="10k",
+        help="Synthetic dataset loaded in the target database",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--record", help="Write every sent request to a JSONL trace")
+    parser.add_argument("--replay", help="Replay a JSONL trace instead of the mix")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Replay speed multiplier"
+    )
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
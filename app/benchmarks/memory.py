@@ -0,0 +1,180 @@
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+from app.benchmarks.common import (
+    benchmark_graph,
+    environment,
+    load_dataset,
+    load_memory_dataset,
+    write_results,
+)
+from app.config.instrumentation import InstrumentedDriver
+from app.config.migrations import migrate
+from app.config.neo4j import create_driver
+from app.config.settings import settings
+from app.config.streaming import NDJSON
+from app.main import app
+
+FORMATS = {"json": "application/json", "ndjson": NDJSON}
+
+
+async def request(url: str, accept: str) -> dict[str, Any]:
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("benchmark", 80),
+        "client": ("127.0.0.1", 0),
+        "root_path": "",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [
+            (b"accept", accept.encode()),
+            (
+                settings.SERVICE_AK_HEADER.lower().encode(),
+                settings.SERVICE_API_KEY.encode(),
+            ),
+        ],
+    }
+    status = None
+    first_byte = None
+    size = 0
+
+    requested = False
+
+    async def receive() -> dict[str, Any]:
+        nonlocal requested
+        # Streaming responses keep listening for a disconnect after the request body
+        if requested:
+            await asyncio.Future()
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    # Called straight through ASGI: HTTP clients buffer whole bodies, and body
+    # chunks are counted and dropped, so only the server side is measured
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status, first_byte, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            size = size + len(message["body"])
+
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"GET {url} answered {status}")
+
+    return {
+        "peak_kib": round((tracemalloc.get_traced_memory()[1] - before) / 1024, 1),
+        "first_byte_ms": round((first_byte or 0) * 1000, 3),
+        "total_ms": round((time.perf_counter() - started) * 1000, 3),
+        "bytes": size,
+    }
+
+
+async def measure(url: str, accept: str, repeat: int) -> dict[str, Any]:
+    await request(url, accept)
+    runs = [await request(url, accept) for _ in range(repeat)]
+    return {
+        "peak_kib": max(run["peak_kib"] for run in runs),
+        "first_byte_ms": round(statistics.median(r["first_byte_ms"] for r in runs), 3),
+        "total_ms": round(statistics.median(r["total_ms"] for r in runs), 3),
+        "bytes": runs[-1]["bytes"],
+    }
+
+
+async def run(args: argparse.Namespace) -> int:
+    graph = benchmark_graph(args.scale, args.seed)
+    if args.backend == "memory":
+        driver = InstrumentedDriver(load_memory_dataset(graph))
+    else:
+        driver = InstrumentedDriver(await create_driver())
+    if args.load and args.backend == "neo4j":
+        await migrate(driver)
+        await load_dataset(driver, graph)
+
+    scenarios = dict()
+    for limit in args.limits:
+        for resource in ("places", "users"):
+            for name, accept in FORMATS.items():
+                scenarios[f"{resource}[limit={limit}][{name}]"] = (
+                    f"/{resource}?limit={limit}",
+                    accept,
+                )
+    scenarios["places/export[ndjson]"] = ("/places/export", NDJSON)
+
+    # Started after loading, so the dataset is part of the baseline of every request
+    tracemalloc.start()
+    app.state.driver = driver
+    results = dict()
+    try:
+        for name, (url, accept) in scenarios.items():
+            if args.only and args.only not in name:
+                continue
+            results[name] = await measure(url, accept, args.repeat)
+            logging.info(json.dumps({"scenario": name, **results[name]}))
+    finally:
+        tracemalloc.stop()
+        await driver.close()
+
+    print(f"{'scenario':<32} {'peak KiB':>10} {'first byte':>12} {'total':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<32} {result['peak_kib']:>10} {result['first_byte_ms']:>10}ms "
+            f"{result['total_ms']:>8}ms"
+        )
+
+    write_results(
+        args.output,
+        {
+            "dataset": {"scale": args.scale, "seed": args.seed},
+            "backend": args.backend,
+            "environment": environment(),
+            "repeat": args.repeat,
+            "results": results,
+        },
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.benchmarks.memory",
+        description="Peak memory and time to first byte of the list endpoints, "
+        "as a JSON array and as streamed NDJSON",
+    )
+    parser.add_argument("--scale", choices=["10k", "1m"], default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", choices=["neo4j", "memory"], default="neo4j")
+    parser.add_argument(
+        "--load",
+        action="store_true",
+        help="Wipe the test database and load the synthetic dataset first",
+    )
+    parser.add_argument("--limits", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="Run only scenarios containing this text")
+    parser.add_argument("--output", default="bench_memory.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from typing import Any, Awaitable, Callable
+
+from neo4j import AsyncDriver, WRITE_ACCESS
+
+from app.benchmarks.common import (
+    benchmark_graph,
+    environment,
+    load_dataset,
+    load_memory_dataset,
+    request_services,
+    sample_targets,
+    summarize,
+    write_results,
+)
+from app.config.migrations import migrate
+from app.config.neo4j import create_driver
+from app.config.settings import settings
+from app.dao.category_dao import CategoryDAO
+from app.dao.feature_dao import FeatureDAO
+from app.dao.place_dao import PlaceDAO
+from app.dao.user_dao import UserDAO
+
+MODES = ["read-then-write", "atomic"]
+
+
+def scenarios(
+    driver: AsyncDriver, targets: dict[str, Any], run_id: str
+) -> dict[str, dict[str, Callable[[int], Awaitable[Any]]]]:
+    places = targets["places"]
+    users = targets["users"]
+    feature = targets["feature"]
+
+    def pick(items: list[Any], i: int) -> Any:
+        return items[i % len(items)]
+
+    async def atomic(call: Callable[[Any], Awaitable[Any]]) -> Any:
+        async with request_services(driver, access_mode=WRITE_ACCESS) as services:
+            return await call(services)
+
+    def new_id(kind: str, mode: str, i: int) -> str:
+        return f"bench-{run_id}-{mode}-{kind}-{i}"
+
+    async def read_then_write(
+        reads: list[tuple[Callable, dict[str, Any]]],
+        write: Callable,
+        reads_after: list[tuple[Callable, dict[str, Any]]] = (),
+        **kwargs: Any,
+    ) -> Any:
+        # The flow services used before mutations became single write transactions
+        async with driver.session(database=settings.NEO4J_DATABASE) as session:
+            for read, parameters in reads:
+                await session.execute_read(read, **parameters)
+            value = await session.execute_write(write, **kwargs)
+            for read, parameters in reads_after:
+                await session.execute_read(read, **parameters)
+            return value
+
+    calls: dict[str, dict[str, Callable[[int], Awaitable[Any]]]] = dict()
+
+    calls["create_place"] = {
+        "read-then-write": lambda i: read_then_write(
+            [(PlaceDAO.get_place, {"placeId": new_id("place", "rw", i)})],
+            PlaceDAO.add,
+            placeId=new_id("place", "rw", i),
+            data={"name": "Benchmark place"},
+        ),
+        "atomic": lambda i: atomic(
+            lambda s: s.place.create_place(
+                placeId=new_id("place", "atomic", i), data={"name": "Benchmark place"}
+            )
+        ),
+    }
+    calls["update_place"] = {
+        "read-then-write": lambda i: read_then_write(
+            [(PlaceDAO.get_place, {"placeId": pick(places, i)["placeId"]})],
+            PlaceDAO.modify,
+            placeId=pick(places, i)["placeId"],
+            data={"placeId": pick(places, i)["placeId"], "confidence": i % 100 / 100},
+        ),
+        "atomic": lambda i: atomic(
+            lambda s: s.place.update_place(
+                placeId=pick(places, i)["placeId"], data={"confidence": i % 100 / 100}
+            )
+        ),
+    }
+    calls["attach_feature_to_place"] = {
+        "read-then-write": lambda i: read_then_write(
+            [
+                (FeatureDAO.get_feature, {"name": feature}),
+                (PlaceDAO.get_place, {"placeId": pick(places, i)["placeId"]}),
+            ],
+            PlaceDAO.add_place_feature,
+            # Routers re-read the place to return it
+            reads_after=[
+                (PlaceDAO.get_place_extended, {"placeId": pick(places, i)["placeId"]})
+            ],
+            placeId=pick(places, i)["placeId"],
+            feature=feature,
+        ),
+        "atomic": lambda i: atomic(
+            lambda s: s.place.attach_feature_to_place(
+                placeId=pick(places, i)["placeId"], feature=feature
+            )
+        ),
+    }
+    calls["create_user"] = {
+        "read-then-write": lambda i: read_then_write(
+            [(UserDAO.get_user, {"user_id": new_id("user", "rw", i)})],
+            UserDAO.add,
+            user_id=new_id("user", "rw", i),
+            born="1990-01-01",
+            gender=None,
+        ),
+        "atomic": lambda i: atomic(
+            lambda s: s.user.create_user(
+                user_id=new_id("user", "atomic", i), born="1990-01-01", gender=None
+            )
+        ),
+    }
+    calls["rate_place"] = {
+        "read-then-write": lambda i: read_then_write(
+            [
+                (UserDAO.get_user_extended, {"user_id": pick(users, i)}),
+                (PlaceDAO.get_place_extended, {"placeId": pick(places, i)["placeId"]}),
+            ],
+            UserDAO.add_rating,
+            user_id=pick(users, i),
+            place_id=pick(places, i)["placeId"],
+            rating=float(i % 5 + 1),
+        ),
+        "atomic": lambda i: atomic(
+            lambda s: s.user.rate_place(
+                user_id=pick(users, i),
+                place_id=pick(places, i)["placeId"],
+                rating=float(i % 5 + 1),
+            )
+        ),
+    }
+    calls["create_category"] = {
+        "read-then-write": lambda i: read_then_write(
+            [(CategoryDAO.get_category, {"name": new_id("category", "rw", i)})],
+            CategoryDAO.add,
+            name=new_id("category", "rw", i),
+        ),
+        "atomic": lambda i: atomic(
+            lambda s: s.category.create_category(name=new_id("category", "atomic", i))
+        ),
+    }
+
+    return calls
+
+
+async def throughput(
+    call: Callable[[int], Awaitable[Any]],
+    operations: int,
+    concurrency: int,
+    offset: int = 0,
+) -> dict[str, float]:
+    latencies = list()
+    next_index = offset
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < offset + operations:
+            i = next_index
+            next_index = next_index + 1
+            start = time.perf_counter()
+            await call(i)
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return summarize(latencies, time.perf_counter() - started)
+
+
+async def run(args: argparse.Namespace) -> int:
+    if os.getenv("ENV_MODE") != "test" and args.backend == "neo4j":
+        raise RuntimeError(
+            "Refusing to write benchmark data: run with ENV_MODE=test on a test database"
+        )
+
+    graph = benchmark_graph(args.scale, args.seed)
+    if args.backend == "memory":
+        driver = load_memory_dataset(graph)
+    else:
+        driver = await create_driver()
+    try:
+        if args.load and args.backend == "neo4j":
+            await migrate(driver)
+            await load_dataset(driver, graph)
+
+        targets = sample_targets(graph, args.samples, args.seed)
+        targets["feature"] = graph.feature_name(0)
+        run_id = uuid.uuid4().hex[:8]
+        results = dict()
+        for name, modes in scenarios(driver, targets, run_id).items():
+            if args.only and args.only not in name:
+                continue
+            for mode in MODES:
+                await throughput(modes[mode], args.warmup, args.concurrency)
+                results[f"{name}[{mode}]"] = await throughput(
+                    modes[mode], args.operations, args.concurrency, args.warmup
+                )
+                logging.info(
+                    json.dumps(
+                        {"scenario": name, "mode": mode, **results[f"{name}[{mode}]"]}
+                    )
+                )
+    finally:
+        await driver.close()
+
+    print(f"{'scenario':<28} {'read-then-write':>16} {'atomic':>10} {'speedup':>8}")
+    for name in dict.fromkeys(key.split("[")[0] for key in results):
+        before = results[f"{name}[read-then-write]"]["throughput"]
+        after = results[f"{name}[atomic]"]["throughput"]
+        speedup = f"{after / before:.2f}x" if before else "-"
+        print(f"{name:<28} {before:>14}/s {after:>8}/s {speedup:>8}")
+
+    write_results(
+        args.output,
+        {
+            "dataset": {"scale": args.scale, "seed": args.seed},
+            "backend": args.backend,
+            "environment": environment(),
+            "operations": args.operations,
+            "concurrency": args.concurrency,
+            "results": results,
+        },
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.benchmarks.writes",
+        description="Write throughput of the service mutations, compared with the "
+        "read-then-write flow they replaced",
+    )
+    parser.add_argument("--scale", choices=["10k", "1m"], default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", choices=["neo4j", "memory"], default="neo4j")
+    parser.add_argument(
+        "--load",
+        action="store_true",
+        help="Wipe the test database and load the synthetic dataset first",
+    )
+    parser.add_argument("--operations", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument("--only", help="Run only scenarios containing this text")
+    parser.add_argument("--output", default="bench_writes.json")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from fastapi import Request
+from starlette.responses import Response
+
+
+def entity_tag(version: str | None) -> str | None:
+    # Weak, so the tag still holds for the compressed representation
+    return f'W/"{version}"' if version is not None else None
+
+
+def etag_matches(request: Request, etag: str | None) -> bool:
+    header = request.headers.get("if-none-match")
+    if etag is None or header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
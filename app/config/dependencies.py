@@ -1,6 +1,10 @@
 from fastapi import Request, Depends
-from neo4j import AsyncDriver
+from neo4j import AsyncDriver, READ_ACCESS, WRITE_ACCESS
 
+from app.config.reference_data import ReferenceData
+from app.config.slow_queries import SlowQueryStore
+from app.config.unit_of_work import UnitOfWork
+from app.config.write_behind import RatingBuffer
 from app.services.category_service import CategoryService
 from app.services.feature_service import FeatureService
 from app.services.place_service import PlaceService
@@ -12,45 +16,74 @@ def get_driver(request: Request):
     return request.app.state.driver
 
 
-async def get_feature_service(driver: AsyncDriver = Depends(get_driver)):
-    return FeatureService(driver)
+def get_reference_data(request: Request) -> ReferenceData:
+    return request.app.state.reference_data
 
 
-async def get_category_service(driver: AsyncDriver = Depends(get_driver)):
-    return CategoryService(driver)
+def get_rating_buffer(request: Request) -> RatingBuffer | None:
+    return request.app.state.rating_buffer
+
+
+def get_slow_query_store(request: Request) -> SlowQueryStore:
+    return request.app.state.slow_query_store
+
+
+async def get_unit_of_work(request: Request, driver: AsyncDriver = Depends(get_driver)):
+    # Cached per request by FastAPI, so every service shares the same session
+    access_mode = READ_ACCESS if request.method in ("GET", "HEAD") else WRITE_ACCESS
+    async with UnitOfWork(driver, access_mode=access_mode) as uow:
+        yield uow
+
+
+async def get_feature_service(
+    uow: UnitOfWork = Depends(get_unit_of_work),
+    reference_data: ReferenceData = Depends(get_reference_data),
+):
+    return FeatureService(uow, features=reference_data.features)
+
+
+async def get_category_service(
+    uow: UnitOfWork = Depends(get_unit_of_work),
+    reference_data: ReferenceData = Depends(get_reference_data),
+):
+    return CategoryService(uow, categories=reference_data.categories)
 
 
 async def get_place_service(
-    driver: AsyncDriver = Depends(get_driver),
+    uow: UnitOfWork = Depends(get_unit_of_work),
     category_service: CategoryService = Depends(get_category_service),
     feature_service: FeatureService = Depends(get_feature_service),
+    rating_buffer: RatingBuffer | None = Depends(get_rating_buffer),
 ):
     return PlaceService(
-        driver,
+        uow,
         category_service=category_service,
         feature_service=feature_service,
+        rating_buffer=rating_buffer,
     )
 
 
 async def get_user_service(
-    driver: AsyncDriver = Depends(get_driver),
+    uow: UnitOfWork = Depends(get_unit_of_work),
     feature_service: FeatureService = Depends(get_feature_service),
     place_service: PlaceService = Depends(get_place_service),
+    rating_buffer: RatingBuffer | None = Depends(get_rating_buffer),
 ):
     return UserService(
-        driver,
+        uow,
         feature_service=feature_service,
         place_service=place_service,
+        rating_buffer=rating_buffer,
     )
 
 
 async def get_recommendation_service(
-    driver: AsyncDriver = Depends(get_driver),
+    uow: UnitOfWork = Depends(get_unit_of_work),
     category_service: CategoryService = Depends(get_category_service),
     user_service: UserService = Depends(get_user_service),
 ):
     return RecommendationService(
-        driver,
+        uow,
         category_service=category_service,
         user_service=user_service,
     )
@@ -1,3 +1,5 @@
+import math
+
 from fastapi import HTTPException
 
 
@@ -17,3 +19,10 @@ class InvalidValue(HTTPException):
     def __init__(self, detail: str = "Invalid value"):
         self.status_code = 400
         self.detail = detail
+
+
+class Unavailable(HTTPException):
+    def __init__(self, detail: str = "Unavailable", retry_after: float = 1):
+        self.status_code = 503
+        self.detail = detail
+        self.headers = {"Retry-After": str(math.ceil(retry_after))}
@@ -0,0 +1,284 @@
+import functools
+import time
+from typing import Any, AsyncIterator, Callable
+
+from prometheus_client import Counter, Histogram
+
+from app.config.slow_queries import SlowQueryLog
+from app.config.timing import stage
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+ROW_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 1000, 5000, 25000)
+
+QUERY_SECONDS = Histogram(
+    "dao_query_duration_seconds",
+    "Wall time of DAO transaction functions, retries included",
+    ["function", "access_mode"],
+    buckets=LATENCY_BUCKETS,
+)
+RESULT_AVAILABLE_SECONDS = Histogram(
+    "dao_query_result_available_seconds",
+    "Server time until the first record was available (result_available_after)",
+    ["function"],
+    buckets=LATENCY_BUCKETS,
+)
+RESULT_CONSUMED_SECONDS = Histogram(
+    "dao_query_result_consumed_seconds",
+    "Server time to consume all records (result_consumed_after)",
+    ["function"],
+    buckets=LATENCY_BUCKETS,
+)
+QUERY_ROWS = Histogram(
+    "dao_query_rows",
+    "Records returned by the statements of a DAO transaction function",
+    ["function"],
+    buckets=ROW_BUCKETS,
+)
+QUERY_RETRIES = Counter(
+    "dao_query_retries_total",
+    "Transaction function attempts retried by the driver or the unit of work",
+    ["function"],
+)
+QUERY_ERRORS = Counter(
+    "dao_query_errors_total",
+    "DAO transaction functions failing after all retries",
+    ["function", "error"],
+)
+
+
+def function_name(transaction_function: Callable) -> str:
+    return getattr(transaction_function, "__qualname__", repr(transaction_function))
+
+
+class InstrumentedResult(object):
+    """Result proxy counting the records handed to the DAO."""
+
+    def __init__(self, result: Any):
+        self._result = result
+        self.rows = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._result, name)
+
+    async def __aiter__(self):
+        async for record in self._result:
+            self.rows = self.rows + 1
+            yield record
+
+    async def single(self, *args: Any, **kwargs: Any) -> Any:
+        record = await self._result.single(*args, **kwargs)
+        self.rows = self.rows + (1 if record is not None else 0)
+        return record
+
+    async def fetch(self, n: int) -> list[Any]:
+        records = await self._result.fetch(n)
+        self.rows = self.rows + len(records)
+        return records
+
+    async def data(self, *keys: Any) -> list[dict[str, Any]]:
+        records = await self._result.data(*keys)
+        self.rows = self.rows + len(records)
+        return records
+
+    async def values(self, *keys: Any) -> list[list[Any]]:
+        records = await self._result.values(*keys)
+        self.rows = self.rows + len(records)
+        return records
+
+    async def value(self, *args: Any, **kwargs: Any) -> list[Any]:
+        records = await self._result.value(*args, **kwargs)
+        self.rows = self.rows + len(records)
+        return records
+
+
+class InstrumentedTransaction(object):
+    """Transaction proxy keeping the results of every statement run through it,
+    so their summaries can be read once the DAO function returns."""
+
+    def __init__(self, tx: Any):
+        self._tx = tx
+        self.statements: list[tuple[InstrumentedResult, str, dict[str, Any]]] = list()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._tx, name)
+
+    async def run(self, query: Any, parameters: Any = None, **kwargs: Any) -> Any:
+        result = InstrumentedResult(await self._tx.run(query, parameters, **kwargs))
+        text = getattr(query, "text", query)
+        self.statements.append((result, text, {**(parameters or {}), **kwargs}))
+        return result
+
+    async def observe(
+        self, function: str, access_mode: str, slow_queries: SlowQueryLog | None
+    ) -> None:
+        rows = 0
+        available_after = 0
+        consumed_after = 0
+        for result, query, parameters in self.statements:
+            rows = rows + result.rows
+            summary = await result.consume()
+            available_after = available_after + (summary.result_available_after or 0)
+            consumed_after = consumed_after + (summary.result_consumed_after or 0)
+            if slow_queries is not None:
+                slow_queries.observe(
+                    function,
+                    access_mode,
+                    query,
+                    parameters,
+                    server_ms=(summary.result_available_after or 0)
+                    + (summary.result_consumed_after or 0),
+                    rows=result.rows,
+                )
+
+        QUERY_ROWS.labels(function).observe(rows)
+        RESULT_AVAILABLE_SECONDS.labels(function).observe(available_after / 1000)
+        RESULT_CONSUMED_SECONDS.labels(function).observe(consumed_after / 1000)
+
+
+class InstrumentedSession(object):
+    def __init__(self, session: Any, slow_queries: SlowQueryLog | None = None):
+        self._session = session
+        self.slow_queries = slow_queries
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+    async def __aenter__(self) -> "InstrumentedSession":
+        await self._session.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> Any:
+        return await self._session.__aexit__(*exc_info)
+
+    async def _execute(
+        self,
+        execute: Callable,
+        access_mode: str,
+        transaction_function: Callable,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        function = function_name(transaction_function)
+        attempts = 0
+
+        # Wrapped, so backends dispatching on the DAO function still find it
+        @functools.wraps(transaction_function)
+        async def work(tx: Any, *args: Any, **kwargs: Any) -> Any:
+            nonlocal attempts
+            attempts = attempts + 1
+            instrumented = InstrumentedTransaction(tx)
+            value = await transaction_function(instrumented, *args, **kwargs)
+            await instrumented.observe(function, access_mode, self.slow_queries)
+            return value
+
+        start = time.perf_counter()
+        try:
+            with stage(f"db.{function}"):
+                return await execute(work, *args, **kwargs)
+        except Exception as e:
+            QUERY_ERRORS.labels(function, type(e).__name__).inc()
+            raise
+        finally:
+            QUERY_SECONDS.labels(function, access_mode).observe(
+                time.perf_counter() - start
+            )
+            if attempts > 1:
+                QUERY_RETRIES.labels(function).inc(attempts - 1)
+
+    async def execute_read(
+        self, transaction_function: Callable, *args: Any, **kwargs: Any
+    ) -> Any:
+        return await self._execute(
+            self._session.execute_read, "read", transaction_function, *args, **kwargs
+        )
+
+    async def execute_write(
+        self, transaction_function: Callable, *args: Any, **kwargs: Any
+    ) -> Any:
+        return await self._execute(
+            self._session.execute_write, "write", transaction_function, *args, **kwargs
+        )
+
+    async def execute_in(
+        self,
+        tx: Any,
+        access_mode: str,
+        transaction_function: Callable,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        # Explicit transactions of a unit of work, retried by the unit of work
+        async def execute(work: Callable, *args: Any, **kwargs: Any) -> Any:
+            inner = getattr(self._session, "execute_in", None)
+            if inner is not None:
+                return await inner(tx, access_mode, work, *args, **kwargs)
+            return await work(tx, *args, **kwargs)
+
+        return await self._execute(
+            execute, access_mode, transaction_function, *args, **kwargs
+        )
+
+    async def stream_in(
+        self,
+        tx: Any,
+        access_mode: str,
+        transaction_function: Callable,
+        *args: Any,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        # Time between records belongs to the consumer, so no request stage is recorded
+        function = function_name(transaction_function)
+        instrumented = InstrumentedTransaction(tx)
+        inner = getattr(self._session, "stream_in", None)
+        if inner is not None:
+            records = inner(tx, access_mode, transaction_function, *args, **kwargs)
+        else:
+            records = transaction_function(instrumented, *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            async for record in records:
+                yield record
+            await instrumented.observe(function, access_mode, self.slow_queries)
+        except Exception as e:
+            QUERY_ERRORS.labels(function, type(e).__name__).inc()
+            raise
+        finally:
+            QUERY_SECONDS.labels(function, access_mode).observe(
+                time.perf_counter() - start
+            )
+
+
+class InstrumentedDriver(object):
+    """Driver wrapper recording Prometheus metrics for every DAO transaction
+    function executed through its sessions, and slow statements when a slow
+    query log is given."""
+
+    def __init__(self, driver: Any, slow_queries: SlowQueryLog | None = None):
+        self._driver = driver
+        self.slow_queries = slow_queries
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._driver, name)
+
+    def session(self, **config: Any) -> InstrumentedSession:
+        return InstrumentedSession(self._driver.session(**config), self.slow_queries)
+
+    async def close(self) -> None:
+        if self.slow_queries is not None:
+            await self.slow_queries.close()
+        await self._driver.close()
@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import os
+import re
+from typing import LiteralString, NamedTuple, cast
+
+from neo4j import AsyncDriver
+
+from app.config.settings import settings
+
+logger = logging.getLogger("uvicorn.migrations")
+
+MIGRATIONS_DIR = "neo4j_setup/migrations"
+
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.cypher$")
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    statements: list[str]
+    checksum: str
+
+
+def find_migrations(directory: str = MIGRATIONS_DIR) -> list[Migration]:
+    migrations = dict()
+    for file_name in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(file_name)
+        if match is None:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Migration version {version} is used twice")
+        with open(os.path.join(directory, file_name), "r") as f:
+            script = f.read()
+        migrations[version] = Migration(
+            version=version,
+            name=match.group(2),
+            statements=[query.strip() for query in script.split(";") if query.strip()],
+            checksum=hashlib.sha256(script.encode()).hexdigest(),
+        )
+    return [migrations[version] for version in sorted(migrations)]
+
+
+BOOTSTRAP_STATEMENTS = [
+    "CREATE CONSTRAINT SchemaMigration_version IF NOT EXISTS "
+    "FOR (m:SchemaMigration) REQUIRE m.version IS UNIQUE",
+    "CREATE CONSTRAINT SchemaMigrationLock_name IF NOT EXISTS "
+    "FOR (l:SchemaMigrationLock) REQUIRE l.name IS UNIQUE",
+]
+
+
+async def migrate(driver: AsyncDriver, directory: str = MIGRATIONS_DIR) -> list[int]:
+    """Applies the migrations of ``directory`` not recorded yet as a
+    ``SchemaMigration`` node, in version order, and waits for every index to be
+    online. Returns the versions applied.
+
+    A write lock on the ``SchemaMigrationLock`` node is held while migrations
+    are read and applied, so instances starting at the same time apply them one
+    after another and every migration runs once."""
+    migrations = find_migrations(directory)
+    applied = list()
+    async with (
+        driver.session(database=settings.NEO4J_DATABASE) as session,
+        driver.session(database=settings.NEO4J_DATABASE) as lock_session,
+    ):
+        for query in BOOTSTRAP_STATEMENTS:
+            result = await session.run(cast(LiteralString, query))
+            await result.consume()
+
+        lock = await lock_session.begin_transaction()
+        try:
+            result = await lock.run(
+                "MERGE (l:SchemaMigrationLock {name: 'migrate'}) "
+                "SET l.lockedAt = datetime()"
+            )
+            await result.consume()
+
+            result = await session.run(
+                "MATCH (m:SchemaMigration) RETURN m.version AS version, m.checksum AS checksum"
+            )
+            recorded = {row["version"]: row["checksum"] async for row in result}
+
+            for migration in migrations:
+                if migration.version in recorded:
+                    if recorded[migration.version] != migration.checksum:
+                        logger.warning(
+                            f"Migration {migration.version} changed after it was "
+                            "applied, add a new migration instead"
+                        )
+                    continue
+                # Schema statements run in their own auto-commit transactions
+                for query in migration.statements:
+                    result = await session.run(cast(LiteralString, query))
+                    await result.consume()
+                result = await session.run(
+                    """
+                    CREATE (m:SchemaMigration {version: $version})
+                    SET m.name = $name, m.checksum = $checksum, m.appliedAt = datetime()
+                    """,
+                    version=migration.version,
+                    name=migration.name,
+                    checksum=migration.checksum,
+                )
+                await result.consume()
+                applied.append(migration.version)
+                logger.info(f"Migration {migration.version} {migration.name} applied")
+            await lock.commit()
+        finally:
+            await lock.close()
+
+        # Also covers indexes still populating after another instance created them
+        result = await session.run(
+            "CALL db.awaitIndexes($timeout)",
+            timeout=settings.MIGRATION_INDEX_TIMEOUT_SECONDS,
+        )
+        await result.consume()
+    return applied
@@ -1,30 +1,38 @@
-import logging
-from typing import LiteralString, cast
-
 from neo4j import GraphDatabase, Driver, AsyncGraphDatabase, AsyncDriver
 from pydantic import BaseModel
 
+from app.config.instrumentation import InstrumentedDriver
+from app.config.migrations import migrate
+from app.config.slow_queries import (
+    SlowQueryLog,
+    SlowQueryStore,
+    create_slow_query_store,
+)
 from app.config.settings import settings
 
 
-async def setup_db() -> AsyncDriver:
+async def create_driver() -> AsyncDriver:
     driver = AsyncGraphDatabase.driver(
         settings.NEO4J_HOSTNAME, auth=tuple(settings.NEO4J_AUTH.split("/", maxsplit=1))
     )
     await driver.verify_connectivity()
+    return driver
 
-    async with driver.session(database=settings.NEO4J_DATABASE) as session:
-        with open("neo4j_setup/data_model/data_model_startup.cypher", "r") as f:
-            data_model_startup = f.read()
-            for query in data_model_startup.split(";"):
-                query = query.strip()
-                if len(query) > 0:
-                    await session.run(cast(LiteralString, query))
-            logging.getLogger("uvicorn").info(
-                "Neo4J startup script executed successfully"
-            )
 
-    return driver
+async def setup_db(slow_query_store: SlowQueryStore | None = None) -> AsyncDriver:
+    if settings.STORAGE_BACKEND == "memory":
+        # Imported here, the in-memory operations depend on the DAOs importing this module
+        from app.storage.memory_driver import MemoryDriver
+
+        return InstrumentedDriver(MemoryDriver())
+
+    driver = await create_driver()
+    await migrate(driver)
+    if slow_query_store is None:
+        slow_query_store = create_slow_query_store()
+    return InstrumentedDriver(
+        driver, slow_queries=SlowQueryLog(driver, slow_query_store)
+    )
 
 
 def validate_field(obj: type[BaseModel], field: str):
@@ -0,0 +1,109 @@
+import base64
+import binascii
+import json
+from typing import Any, AsyncIterator, LiteralString, cast
+
+from neo4j import AsyncManagedTransaction
+from pydantic import BaseModel
+
+from app.config.exceptions import InvalidValue
+from app.config.neo4j import validate_field
+
+
+def sort_field(model: type[BaseModel], sort: str, key: str) -> str:
+    return sort if validate_field(model, sort) else key
+
+
+def encode_cursor(sort: str, value: Any, key: Any) -> str:
+    token = json.dumps([sort, value, key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    after: str | None, model: type[BaseModel], sort: str, key: str
+) -> tuple[Any, Any] | None:
+    if after is None:
+        return None
+    try:
+        token = base64.urlsafe_b64decode(after + "=" * (-len(after) % 4))
+        cursor_sort, value, last_key = json.loads(token)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidValue(f"Invalid cursor {after}")
+    if cursor_sort != sort_field(model, sort, key) or last_key is None:
+        raise InvalidValue(f"Cursor {after} was not issued for sort {sort}")
+    return value, last_key
+
+
+def next_cursor(items: list[BaseModel], sort: str, key: str, limit: int) -> str | None:
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    sort = sort_field(type(last), sort, key)
+    return encode_cursor(sort, getattr(last, sort), getattr(last, key))
+
+
+async def keyset_nodes(
+    tx: AsyncManagedTransaction,
+    node: str,
+    key: str,
+    sort: str,
+    order: str,
+    after: tuple[Any, Any],
+    limit: int,
+    value: str = "$value",
+    projection: str | None = None,
+) -> AsyncIterator[Any]:
+    """Nodes of ``node`` (``alias:Label``) following the ``after`` cursor.
+
+    Every statement seeks a range of the sort or key index in index order, so
+    a page costs the same wherever it starts. Nodes without the sort property
+    are not in its index: they are paged by key in a separate segment, placed
+    where Cypher puts nulls (last when ascending, first when descending).
+    """
+    alias = node.split(":")[0]
+    order = order.upper()
+    after_op, before_op = (">", "<=") if order == "ASC" else ("<", ">=")
+    last_value, last_key = after
+
+    def statement(where: str, order_by: str) -> LiteralString:
+        return cast(
+            LiteralString,
+            f"""
+            MATCH ({node})
+            WHERE {where}
+            RETURN {projection or alias} AS node
+            ORDER BY {order_by}
+            LIMIT $limit """,
+        )
+
+    by_key = f"{alias}.{key} {order}"
+    by_sort = f"{alias}.{sort} {order}, {by_key}"
+    if sort == key:
+        segments = [statement(f"{alias}.{key} {after_op} $key", by_key)]
+    elif last_value is not None:
+        valued = statement(
+            f"{alias}.{sort} {after_op}= {value} "
+            f"AND NOT ({alias}.{sort} = {value} AND {alias}.{key} {before_op} $key)",
+            by_sort,
+        )
+        nulls = statement(
+            f"{alias}.{key} IS NOT NULL AND {alias}.{sort} IS NULL", by_key
+        )
+        segments = [valued, nulls] if order == "ASC" else [valued]
+    else:
+        valued = statement(f"{alias}.{sort} IS NOT NULL", by_sort)
+        nulls = statement(
+            f"{alias}.{key} {after_op} $key AND {alias}.{sort} IS NULL", by_key
+        )
+        segments = [nulls] if order == "ASC" else [nulls, valued]
+
+    count = 0
+    for query in segments:
+        result = await tx.run(
+            query, value=last_value, key=last_key, limit=limit - count
+        )
+        async for row in result:
+            count = count + 1
+            yield row.value("node")
+        if count >= limit:
+            break
@@ -0,0 +1,129 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+from typing import Callable
+
+from neo4j import AsyncDriver, READ_ACCESS
+
+from app.config.neo4j import validate_order
+from app.config.settings import settings
+from app.config.unit_of_work import UnitOfWork
+from app.dao.category_dao import CategoryDAO
+from app.dao.feature_dao import FeatureDAO
+
+logger = logging.getLogger("uvicorn.reference_data")
+
+
+class ReferenceSet(object):
+    """Sorted names of a small, almost static label, kept in memory.
+
+    Every change made through the services bumps ``version``. A refresh only
+    replaces the names when the version did not move while it was reading, so
+    it never brings back a name created, renamed or deleted in the meantime.
+    """
+
+    def __init__(self, load_names: Callable):
+        self.load_names = load_names
+        self.names: list[str] = list()
+        self.version = 0
+        self.names_digest: str | None = None
+
+    def __contains__(self, name: str) -> bool:
+        index = bisect.bisect_left(self.names, name)
+        return index < len(self.names) and self.names[index] == name
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def digest(self) -> str:
+        # Same in every worker holding the same names, unlike the version
+        if self.names_digest is None:
+            content = "\n".join(self.names).encode()
+            self.names_digest = hashlib.blake2b(content, digest_size=8).hexdigest()
+        return self.names_digest
+
+    def add(self, name: str) -> None:
+        if name not in self:
+            bisect.insort(self.names, name)
+            self.names_digest = None
+        self.version = self.version + 1
+
+    def remove(self, name: str) -> None:
+        if name in self:
+            self.names.pop(bisect.bisect_left(self.names, name))
+            self.names_digest = None
+        self.version = self.version + 1
+
+    def rename(self, name: str, new_name: str) -> None:
+        self.remove(name)
+        self.add(new_name)
+
+    def page(
+        self,
+        order: str = "DESC",
+        skip: int = 0,
+        limit: int = 25,
+        after: tuple[str, str] | None = None,
+    ) -> list[str]:
+        descending = not validate_order(order) or order.upper() == "DESC"
+        names = self.names
+        if after is not None:
+            _, last = after
+            skip = 0
+            if descending:
+                names = names[: bisect.bisect_left(names, last)]
+            else:
+                names = names[bisect.bisect_right(names, last) :]
+        if descending:
+            names = names[::-1]
+        return names[skip : skip + limit]
+
+    async def refresh(self, driver: AsyncDriver) -> bool:
+        version = self.version
+        async with UnitOfWork(driver, access_mode=READ_ACCESS) as uow:
+            names = await uow.read(self.load_names)
+        if self.version != version:
+            return False
+        self.names = sorted(names)
+        self.names_digest = None
+        return True
+
+
+class ReferenceData(object):
+    """Categories and features shared by every request of the application,
+    loaded at startup and refreshed every REFERENCE_DATA_REFRESH_SECONDS to
+    pick up changes made outside the API or by other workers."""
+
+    def __init__(self):
+        self.categories = ReferenceSet(CategoryDAO.get_names)
+        self.features = ReferenceSet(FeatureDAO.get_names)
+        self.task: asyncio.Task | None = None
+
+    async def load(self, driver: AsyncDriver) -> None:
+        for reference in (self.categories, self.features):
+            await reference.refresh(driver)
+
+    async def refresh_periodically(self, driver: AsyncDriver) -> None:
+        while True:
+            await asyncio.sleep(settings.REFERENCE_DATA_REFRESH_SECONDS)
+            try:
+                await self.load(driver)
+            except Exception as e:
+                # The names already loaded are kept until the next attempt
+                logger.warning(f"Refreshing reference data failed: {e}")
+
+    async def start(self, driver: AsyncDriver) -> None:
+        await self.load(driver)
+        if settings.REFERENCE_DATA_REFRESH_SECONDS > 0:
+            self.task = asyncio.create_task(self.refresh_periodically(driver))
+
+    async def close(self) -> None:
+        if self.task is None:
+            return
+        task, self.task = self.task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
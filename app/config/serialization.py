@@ -0,0 +1,21 @@
+from typing import Any
+
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+from app.config.timing import stage
+
+adapters: dict[Any, TypeAdapter] = dict()
+
+
+class EncodedJSONResponse(Response):
+    media_type = "application/json"
+
+
+def encode_json(content_type: Any, content: Any) -> bytes:
+    # Serialized by pydantic-core straight to bytes: the response model is not
+    # validated again and the standard library encoder is skipped
+    if content_type not in adapters:
+        adapters[content_type] = TypeAdapter(content_type)
+    with stage("render"):
+        return adapters[content_type].dump_json(content)
@@ -1,5 +1,6 @@
 import os
 import uuid
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -17,6 +18,28 @@ class Settings(BaseSettings):
     NEO4J_HOSTNAME: str
     NEO4J_AUTH: str
     NEO4J_DATABASE: str
+    STORAGE_BACKEND: Literal["neo4j", "memory"] = "neo4j"
+    SERVER_TIMING_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_THRESHOLD_MS: int = 500
+    SLOW_QUERY_PROFILE_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_LOG_PATH: str = "logs/slow_queries.jsonl"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 5_000_000
+    SLOW_QUERY_LOG_BACKUPS: int = 3
+    BULK_MAX_ITEMS: int = 10_000
+    BULK_CHUNK_SIZE: int = 1_000
+    STREAM_BATCH_SIZE: int = 100
+    EXPORT_BATCH_SIZE: int = 10_000
+    REFERENCE_DATA_REFRESH_SECONDS: int = 60
+    GZIP_MINIMUM_SIZE: int = 1_000
+    RATING_WRITE_BEHIND: bool = False
+    RATING_BUFFER_SIZE: int = 10_000
+    RATING_FLUSH_SIZE: int = 500
+    RATING_FLUSH_INTERVAL_SECONDS: float = 1.0
+    RATING_JOURNAL_PATH: str | None = None
+    RATING_KNOWN_KEYS: int = 100_000
+    MIGRATION_INDEX_TIMEOUT_SECONDS: int = 300
+    UNIT_OF_WORK_MAX_RETRIES: int = 3
+    UNIT_OF_WORK_RETRY_DELAY_SECONDS: float = 0.05
 
     model_config = SettingsConfigDict(env_file=env_file, extra="ignore")
 
@@ -0,0 +1,204 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Any, Iterator
+
+from neo4j import AsyncDriver, READ_ACCESS, WRITE_ACCESS
+
+from app.config.settings import settings
+
+logger = logging.getLogger("uvicorn.slow_queries")
+
+MAX_PENDING_PROFILES = 2
+
+
+def redact(value: Any) -> Any:
+    # Numbers and flags help to reproduce a plan, identifiers and names are not logged
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return f"<str:{len(value)}>"
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return f"<list:{len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def plan_steps(plan: dict[str, Any] | None, depth: int = 0) -> list[dict[str, Any]]:
+    if not plan:
+        return []
+    arguments = plan.get("args", plan.get("arguments", {}))
+    steps = [
+        {
+            "depth": depth,
+            "operator": plan.get("operatorType"),
+            "details": arguments.get("Details"),
+            "estimatedRows": arguments.get("EstimatedRows"),
+            "rows": plan.get("rows"),
+            "dbHits": plan.get("dbHits"),
+        }
+    ]
+    for child in plan.get("children", []):
+        steps.extend(plan_steps(child, depth + 1))
+    return steps
+
+
+def lines_from_end(path: str, block_size: int = 64 * 1024) -> Iterator[str]:
+    # Newline bytes never occur inside UTF-8 characters, blocks split safely
+    with open(path, "rb") as f:
+        position = f.seek(0, os.SEEK_END)
+        rest = b""
+        while position > 0:
+            size = min(block_size, position)
+            position = position - size
+            f.seek(position)
+            lines = (f.read(size) + rest).split(b"\n")
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line.decode("utf-8")
+        if rest.strip():
+            yield rest.decode("utf-8")
+
+
+class SlowQueryStore(object):
+    """Rotating JSON lines file of slow statements, newest entries last.
+
+    Entries are queued and appended by a background thread, started on the
+    first write, so the event loop never waits for the file."""
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        self.path = path
+        self.backups = backups
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.handler = RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backups,
+            encoding="utf-8",
+            delay=True,
+        )
+        self.handler.setFormatter(logging.Formatter("%(message)s"))
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.listener: QueueListener | None = None
+
+    def write(self, entry: dict[str, Any]) -> None:
+        if self.listener is None:
+            self.listener = QueueListener(self.queue, self.handler)
+            self.listener.start()
+        self.queue.put(logging.makeLogRecord({"msg": json.dumps(entry, default=str)}))
+
+    def read(self, limit: int = 50) -> list[dict[str, Any]]:
+        # Newest file first, each read from its end, until there are enough entries
+        entries = list()
+        paths = [self.path] + [f"{self.path}.{n}" for n in range(1, self.backups + 1)]
+        for path in paths:
+            if len(entries) >= limit:
+                break
+            if not os.path.exists(path):
+                continue
+            for line in lines_from_end(path):
+                entries.append(json.loads(line))
+                if len(entries) >= limit:
+                    break
+        return entries
+
+    def close(self) -> None:
+        # Stopping the listener writes whatever is still queued
+        if self.listener is not None:
+            listener, self.listener = self.listener, None
+            listener.stop()
+        self.handler.close()
+
+
+class SlowQueryLog(object):
+    """Records statements slower than SLOW_QUERY_THRESHOLD_MS and, for a sampled
+    share of them, re-runs them in the background with PROFILE (reads) or
+    EXPLAIN (writes, which must not be executed twice) to store their plan."""
+
+    def __init__(self, driver: AsyncDriver, store: SlowQueryStore):
+        self.driver = driver
+        self.store = store
+        self.pending: set[asyncio.Task] = set()
+
+    def observe(
+        self,
+        function: str,
+        access_mode: str,
+        query: str,
+        parameters: dict[str, Any],
+        server_ms: int,
+        rows: int,
+    ) -> None:
+        if server_ms < settings.SLOW_QUERY_THRESHOLD_MS:
+            return
+
+        entry = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "function": function,
+            "accessMode": access_mode,
+            "serverMs": server_ms,
+            "rows": rows,
+            "query": " ".join(query.split()),
+            "parameters": redact(parameters),
+        }
+        logger.warning(
+            json.dumps({"event": "slow_query", "function": function, "ms": server_ms})
+        )
+
+        if (
+            random.random() < settings.SLOW_QUERY_PROFILE_SAMPLE_RATE
+            and len(self.pending) < MAX_PENDING_PROFILES
+        ):
+            task = asyncio.create_task(
+                self.profile(entry, query, parameters, access_mode)
+            )
+            self.pending.add(task)
+            task.add_done_callback(self.pending.discard)
+        else:
+            self.store.write(entry)
+
+    async def profile(
+        self,
+        entry: dict[str, Any],
+        query: str,
+        parameters: dict[str, Any],
+        access_mode: str,
+    ) -> None:
+        mode = "PROFILE" if access_mode == "read" else "EXPLAIN"
+        try:
+            async with self.driver.session(
+                database=settings.NEO4J_DATABASE,
+                default_access_mode=READ_ACCESS if mode == "PROFILE" else WRITE_ACCESS,
+            ) as session:
+                result = await session.run(f"{mode} {query}", parameters)
+                summary = await result.consume()
+            plan = summary.profile if mode == "PROFILE" else summary.plan
+            entry["profile"] = {
+                "mode": mode,
+                "dbHits": sum(step["dbHits"] or 0 for step in plan_steps(plan)),
+                "steps": plan_steps(plan),
+            }
+        except Exception as e:
+            entry["profile"] = {"mode": mode, "error": str(e)}
+        self.store.write(entry)
+
+    async def close(self) -> None:
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+        self.store.close()
+
+
+def create_slow_query_store() -> SlowQueryStore:
+    return SlowQueryStore(
+        settings.SLOW_QUERY_LOG_PATH,
+        max_bytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backups=settings.SLOW_QUERY_LOG_BACKUPS,
+    )
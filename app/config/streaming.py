@@ -0,0 +1,46 @@
+from typing import AsyncIterator, TypeVar
+
+from fastapi import Request
+from pydantic import BaseModel
+from starlette.responses import StreamingResponse
+
+from app.config.settings import settings
+
+NDJSON = "application/x-ndjson"
+
+T = TypeVar("T")
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON in request.headers.get("accept", "")
+
+
+async def prefetch(items: AsyncIterator[T]) -> AsyncIterator[T]:
+    # The first item is read before the status is sent, so failing queries
+    # still get their error response instead of a truncated stream
+    empty = object()
+    first = await anext(items, empty)
+
+    async def chained() -> AsyncIterator[T]:
+        if first is empty:
+            return
+        yield first
+        async for item in items:
+            yield item
+
+    return chained()
+
+
+async def ndjson_lines(models: AsyncIterator[BaseModel]) -> AsyncIterator[bytes]:
+    lines = list()
+    async for model in models:
+        lines.append(model.model_dump_json())
+        if len(lines) >= settings.STREAM_BATCH_SIZE:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = list()
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def ndjson_response(models: AsyncIterator[BaseModel]) -> StreamingResponse:
+    return StreamingResponse(ndjson_lines(await prefetch(models)), media_type=NDJSON)
@@ -0,0 +1,112 @@
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import settings
+
+logger = logging.getLogger("uvicorn.timing")
+
+
+class RequestTimings(object):
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, list[float]] = dict()
+
+    def add(self, name: str, seconds: float) -> None:
+        stage = self.stages.setdefault(name, [0.0, 0])
+        stage[0] = stage[0] + seconds
+        stage[1] = stage[1] + 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def header(self) -> str:
+        metrics = list()
+        for name, (seconds, count) in self.stages.items():
+            metric = f"{name};dur={seconds * 1000:.2f}"
+            if count > 1:
+                metric = metric + f';desc="x{count}"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+# Only set for sampled requests, so unsampled ones skip every timer
+current_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "current_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+class TimedJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        with stage("render"):
+            return super().render(content)
+
+
+class ServerTimingMiddleware(object):
+    """Attributes the time of sampled requests to the named stages recorded with
+    ``stage``, returned in the Server-Timing header and logged as JSON."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        sample_rate = settings.SERVER_TIMING_SAMPLE_RATE
+        if scope["type"] != "http" or random.random() >= sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status = None
+
+        async def send_with_timings(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", timings.header().encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            current_timings.reset(token)
+            logger.info(
+                json.dumps(
+                    {
+                        "event": "timing",
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status,
+                        "totalMs": round(timings.elapsed() * 1000, 2),
+                        "stages": {
+                            name: {"ms": round(seconds * 1000, 2), "count": count}
+                            for name, (seconds, count) in timings.stages.items()
+                        },
+                    }
+                )
+            )
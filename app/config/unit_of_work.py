@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import random
+from typing import Any, AsyncIterator, Callable
+
+from neo4j import AsyncDriver, READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import DriverError, Neo4jError
+
+from app.config.instrumentation import QUERY_RETRIES, function_name
+from app.config.settings import settings
+from app.config.timing import stage
+
+logger = logging.getLogger("uvicorn.unit_of_work")
+
+
+class UnitOfWork(object):
+    """Session shared by every service of a request.
+
+    DAO functions run in a single explicit transaction opened on first use, so
+    consecutive reads share one transaction and one pooled connection. Writes
+    join the same transaction and are only persisted by ``commit``; anything
+    left uncommitted when the unit of work is closed is rolled back.
+
+    Unlike managed transactions, earlier statements of a transaction cannot be
+    replayed, so only the first statement of a transaction is retried on
+    retryable errors (transient errors, expired sessions), up to
+    UNIT_OF_WORK_MAX_RETRIES times. A later statement or a commit failing that
+    way fails the request.
+    """
+
+    def __init__(self, driver: AsyncDriver, access_mode: str = WRITE_ACCESS):
+        self.driver = driver
+        self.access_mode = access_mode
+        self.session = None
+        self.transaction = None
+
+    async def __aenter__(self) -> "UnitOfWork":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def _begin(self) -> Any:
+        if self.session is None:
+            self.session = self.driver.session(
+                database=settings.NEO4J_DATABASE, default_access_mode=self.access_mode
+            )
+        if self.transaction is None:
+            self.transaction = await self.session.begin_transaction()
+        return self.transaction
+
+    async def _discard(self) -> None:
+        transaction, self.transaction = self.transaction, None
+        if transaction is None:
+            return
+        try:
+            await transaction.close()
+        except Exception as e:
+            # A failed transaction may not roll back cleanly, the original error matters
+            logger.debug(f"Discarding transaction failed: {e}")
+
+    async def _call(
+        self, access_mode: str, transaction_function: Callable, *args: Any, **kwargs
+    ) -> Any:
+        attempt = 0
+        while True:
+            first = self.transaction is None
+            try:
+                tx = await self._begin()
+                execute_in = getattr(self.session, "execute_in", None)
+                if execute_in is None:
+                    return await transaction_function(tx, *args, **kwargs)
+                return await execute_in(
+                    tx, access_mode, transaction_function, *args, **kwargs
+                )
+            except (Neo4jError, DriverError) as e:
+                await self._discard()
+                if (
+                    not first
+                    or not e.is_retryable()
+                    or attempt >= settings.UNIT_OF_WORK_MAX_RETRIES
+                ):
+                    raise
+                attempt = attempt + 1
+                QUERY_RETRIES.labels(function_name(transaction_function)).inc()
+                delay = settings.UNIT_OF_WORK_RETRY_DELAY_SECONDS * (2 ** (attempt - 1))
+                await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+            except Exception:
+                # Neo4j fails the whole transaction on any error
+                await self._discard()
+                raise
+
+    async def read(self, transaction_function: Callable, *args: Any, **kwargs) -> Any:
+        return await self._call("read", transaction_function, *args, **kwargs)
+
+    async def write(self, transaction_function: Callable, *args: Any, **kwargs) -> Any:
+        if self.access_mode == READ_ACCESS:
+            raise RuntimeError("Writes need a unit of work opened with WRITE_ACCESS")
+        return await self._call("write", transaction_function, *args, **kwargs)
+
+    async def stream(
+        self, transaction_function: Callable, *args: Any, **kwargs
+    ) -> AsyncIterator[Any]:
+        tx = await self._begin()
+        stream_in = getattr(self.session, "stream_in", None)
+        if stream_in is None:
+            records = transaction_function(tx, *args, **kwargs)
+        else:
+            records = stream_in(tx, "read", transaction_function, *args, **kwargs)
+        try:
+            async for record in records:
+                yield record
+        except Exception:
+            await self._discard()
+            raise
+
+    async def commit(self) -> None:
+        transaction, self.transaction = self.transaction, None
+        if transaction is None:
+            return
+        with stage("db.commit"):
+            await transaction.commit()
+
+    async def close(self) -> None:
+        await self._discard()
+        if self.session is not None:
+            session, self.session = self.session, None
+            await session.close()
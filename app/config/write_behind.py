@@ -0,0 +1,243 @@
+import asyncio
+import fcntl
+import glob
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any
+
+from neo4j import AsyncDriver
+
+from app.config.exceptions import Unavailable
+from app.config.settings import settings
+from app.config.unit_of_work import UnitOfWork
+from app.dao.user_dao import UserDAO
+
+logger = logging.getLogger("uvicorn.write_behind")
+
+
+class KnownKeys(object):
+    """Bounded set of keys known to exist, the least recently used forgotten first."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.keys: OrderedDict[str, None] = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        if key not in self.keys:
+            return False
+        self.keys.move_to_end(key)
+        return True
+
+    def add(self, key: str) -> None:
+        self.keys[key] = None
+        self.keys.move_to_end(key)
+        if len(self.keys) > self.size:
+            self.keys.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self.keys.pop(key, None)
+
+
+def sync_and_close(fd: int) -> None:
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class RatingBuffer(object):
+    """Ratings accepted by the API and not written yet.
+
+    Ratings wait in a bounded queue and a background task writes them with
+    ``UserDAO.add_ratings`` in batches of RATING_FLUSH_SIZE, at least every
+    RATING_FLUSH_INTERVAL_SECONDS. A full queue rejects new ratings.
+
+    With RATING_JOURNAL_PATH set, every process appends its ratings to its own
+    journal, ``<RATING_JOURNAL_PATH>.<pid>``, locked while the process runs.
+    A rating is only accepted once it is synced to disk. A flush writes the
+    ratings queued when it starts, then drops them from the journal. On start,
+    journals left by stopped processes, the ones that can be locked, are
+    replayed and removed, or kept for the next start if they cannot be written.
+    Rating twice the same place keeps the last rating, so replaying a rating
+    already written is harmless.
+    """
+
+    def __init__(self, driver: AsyncDriver):
+        self.driver = driver
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(
+            maxsize=settings.RATING_BUFFER_SIZE
+        )
+        self.pending: list[dict[str, Any]] = list()
+        self.users = KnownKeys(settings.RATING_KNOWN_KEYS)
+        self.places = KnownKeys(settings.RATING_KNOWN_KEYS)
+        self.wake = asyncio.Event()
+        self.journal = None
+        self.journal_path: str | None = None
+        self.task: asyncio.Task | None = None
+
+    async def put(self, user_id: str, place_id: str, rating: float) -> None:
+        if self.queue.full():
+            raise Unavailable(
+                "Too many ratings waiting to be written, retry later",
+                retry_after=settings.RATING_FLUSH_INTERVAL_SECONDS,
+            )
+        row = {"userId": user_id, "placeId": place_id, "rating": rating}
+        self.queue.put_nowait(row)
+        if self.queue.qsize() >= settings.RATING_FLUSH_SIZE:
+            self.wake.set()
+        if self.journal is not None:
+            # Queued first: a flush emptying the journal meanwhile has written it
+            self.journal.write(json.dumps(row) + "\n")
+            self.journal.flush()
+            # Own descriptor, a flush may replace the journal while it syncs
+            await asyncio.to_thread(sync_and_close, os.dup(self.journal.fileno()))
+
+    async def write(self, rows: list[dict[str, Any]]) -> None:
+        async with UnitOfWork(self.driver) as uow:
+            results = await uow.write(
+                UserDAO.add_ratings,
+                rows=[{**row, "index": index} for index, row in enumerate(rows)],
+            )
+            await uow.commit()
+        # Users or places deleted after their rating was accepted
+        dropped = [result for result in results if result["status"] != "rated"]
+        if dropped:
+            logger.warning(
+                json.dumps({"event": "ratings_dropped", "count": len(dropped)})
+            )
+
+    async def flush(self) -> bool:
+        # Ratings queued later wait for the next flush, so it ends under load
+        queued = self.queue.qsize()
+        written = self.journal_size()
+        while self.pending or queued > 0:
+            if not self.pending:
+                size = min(settings.RATING_FLUSH_SIZE, queued)
+                self.pending = [self.queue.get_nowait() for _ in range(size)]
+                queued = queued - size
+            try:
+                await self.write(self.pending)
+            except Exception as e:
+                # Kept as the next batch, the queue fills up meanwhile
+                logger.warning(
+                    json.dumps(
+                        {
+                            "event": "ratings_write_failed",
+                            "count": len(self.pending),
+                            "error": str(e),
+                        }
+                    )
+                )
+                return False
+            self.pending = list()
+        self.drop_from_journal(written)
+        return True
+
+    def journal_size(self) -> int:
+        if self.journal is None:
+            return 0
+        return os.fstat(self.journal.fileno()).st_size
+
+    def drop_from_journal(self, size: int) -> None:
+        # Never awaits, so no rating is journaled while the file is replaced
+        if self.journal is None or size == 0:
+            return
+        with open(self.journal_path, "rb") as f:
+            f.seek(size)
+            rest = f.read()
+        if not rest:
+            self.journal.seek(0)
+            self.journal.truncate()
+            return
+        journal = open(self.journal_path + ".new", "a", encoding="utf-8")
+        fcntl.flock(journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        journal.write(rest.decode("utf-8"))
+        journal.flush()
+        os.fsync(journal.fileno())
+        os.replace(self.journal_path + ".new", self.journal_path)
+        self.journal.close()
+        self.journal = journal
+
+    async def flush_periodically(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self.wake.wait(), timeout=settings.RATING_FLUSH_INTERVAL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            await self.flush()
+
+    async def replay(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Journal of a running process
+                return
+            rows = [json.loads(line) for line in f if line.strip()]
+            size = settings.RATING_FLUSH_SIZE
+            try:
+                for start in range(0, len(rows), size):
+                    await self.write(rows[start : start + size])
+            except Exception as e:
+                # Database not ready yet, the next start replays the journal
+                logger.error(
+                    json.dumps(
+                        {
+                            "event": "journal_replay_failed",
+                            "path": path,
+                            "count": len(rows),
+                            "error": str(e),
+                        }
+                    )
+                )
+                return
+            os.unlink(path)
+        if rows:
+            logger.info(
+                json.dumps(
+                    {"event": "journal_replayed", "path": path, "count": len(rows)}
+                )
+            )
+
+    async def start(self) -> None:
+        path = settings.RATING_JOURNAL_PATH
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # Also the single journal shared by every process before
+            journals = [path] if os.path.exists(path) else list()
+            for journal in glob.glob(glob.escape(path) + ".*"):
+                if journal.rsplit(".", 1)[1].isdigit():
+                    journals.append(journal)
+            for journal in journals:
+                await self.replay(journal)
+            # Locked before it gets its name, so it is never taken for a stopped one
+            own = f"{path}.{os.getpid()}"
+            self.journal = open(own + ".new", "a", encoding="utf-8")
+            fcntl.flock(self.journal.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.replace(own + ".new", own)
+            self.journal_path = own
+        self.task = asyncio.create_task(self.flush_periodically())
+
+    async def close(self) -> None:
+        if self.task is not None:
+            task, self.task = self.task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # Whatever is still queued is written before the driver is closed
+        written = await self.flush() and self.queue.empty()
+        if not written:
+            unwritten = len(self.pending) + self.queue.qsize()
+            logger.error(json.dumps({"event": "ratings_unwritten", "count": unwritten}))
+        if self.journal is not None:
+            if written:
+                os.unlink(self.journal_path)
+            self.journal.close()
+            self.journal = None
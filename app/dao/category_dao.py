@@ -1,12 +1,8 @@
-from typing import cast, LiteralString
-
 from neo4j import AsyncDriver, AsyncManagedTransaction
 from neo4j.exceptions import ConstraintError
 from werkzeug.exceptions import NotFound
 
-from app.config.neo4j import validate_order, validate_field
 from app.config.settings import settings
-from app.dto.category import SingleCategory
 from app.config.exceptions import NotFound
 
 
@@ -24,31 +20,14 @@ class CategoryDAO(object):
         return result.get("category") if result else None
 
     @staticmethod
-    async def get_categories(
-        tx: AsyncManagedTransaction, sort="name", order="DESC", skip=0, limit=25
-    ):
-        if not validate_order(order):
-            order = "DESC"
-        if not validate_field(SingleCategory, sort):
-            sort = "name"
-
-        query = cast(
-            LiteralString,
-            f"""
-            MATCH (c:Category)
-            ORDER BY c.{sort} {order}
-            RETURN c AS category
-            SKIP $skip LIMIT $limit """,
-        )
-
-        result = await tx.run(query, skip=skip, limit=limit)
-
-        return [row.value("category") async for row in result]
+    async def get_names(tx: AsyncManagedTransaction):
+        result = await tx.run("MATCH (c:Category) RETURN c.name AS name")
+        return [row.value("name") async for row in result]
 
     @staticmethod
     async def add(tx: AsyncManagedTransaction, name: str):
         result = await tx.run(
-            """ MERGE (c:Category {name: $name}) RETURN c AS category""", name=name
+            "CREATE (c:Category {name: $name}) RETURN c AS category", name=name
         )
 
         result = await result.single()
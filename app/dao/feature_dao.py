@@ -1,11 +1,7 @@
-from typing import cast, LiteralString
-
 from neo4j import AsyncDriver, AsyncManagedTransaction
 from neo4j.exceptions import ConstraintError
 
-from app.config.neo4j import validate_order, validate_field
 from app.config.settings import settings
-from app.dto.feature import SingleFeature
 from app.config.exceptions import NotFound
 
 
@@ -23,31 +19,14 @@ class FeatureDAO(object):
         return result.get("feature") if result else None
 
     @staticmethod
-    async def get_features(
-        tx: AsyncManagedTransaction, sort="name", order="DESC", skip=0, limit=25
-    ):
-        if not validate_order(order):
-            order = "DESC"
-        if not validate_field(SingleFeature, sort):
-            sort = "name"
-
-        query = cast(
-            LiteralString,
-            f"""
-                MATCH (f:Feature)
-                ORDER BY f.{sort} {order}
-                RETURN f AS feature
-                SKIP $skip LIMIT $limit """,
-        )
-
-        result = await tx.run(query, skip=skip, limit=limit)
-
-        return [row.value("feature") async for row in result]
+    async def get_names(tx: AsyncManagedTransaction):
+        result = await tx.run("MATCH (f:Feature) RETURN f.name AS name")
+        return [row.value("name") async for row in result]
 
     @staticmethod
     async def add(tx: AsyncManagedTransaction, name: str):
         result = await tx.run(
-            "MERGE (f:Feature {name: $name}) RETURN f AS feature",
+            "CREATE (f:Feature {name: $name}) RETURN f AS feature",
             name=name,
         )
 
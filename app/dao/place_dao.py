@@ -1,13 +1,52 @@
-from typing import cast, LiteralString, Any
+from typing import cast, AsyncIterator, LiteralString, Any
 
 from neo4j import AsyncDriver, AsyncManagedTransaction
 from neo4j.exceptions import ConstraintError
 
+from app.config.pagination import keyset_nodes
 from app.config.neo4j import validate_order, validate_field
 from app.config.settings import settings
 from app.dto.place import SinglePlace, SinglePlaceExtended, SinglePlaceRecommended
 from app.config.exceptions import NotFound, AlreadyExists
 
+# Cypher expression of every column of the catalog export
+EXPORT_COLUMNS: dict[str, str] = {
+    "placeId": "p.placeId",
+    "name": "p.name",
+    "latitude": "coalesce(p.coordinates.latitude, p.latitude)",
+    "longitude": "coalesce(p.coordinates.longitude, p.longitude)",
+    "locality": "p.locality",
+    "country": "p.country",
+    "region": "p.region",
+    "postcode": "p.postcode",
+    "freeform": "p.freeform",
+    "confidence": "p.confidence",
+    "yelpId": "p.yelpId",
+    "categories": "[(p)-[:IN_CATEGORY]->(c:Category) | c.name]",
+    "features": "[(p)-[:HAS_FEATURE]->(f:Feature) | f.name]",
+    "ratingCount": "ratingCount",
+    "avgRating": "avgRating",
+}
+
+
+def place_projection(alias: str, *extra: str) -> str:
+    # Every field of SinglePlace with its type, so services can trust the records
+    fields = [
+        ".placeId",
+        ".name",
+        f"latitude: coalesce({alias}.coordinates.latitude, {alias}.latitude)",
+        f"longitude: coalesce({alias}.coordinates.longitude, {alias}.longitude)",
+        ".locality",
+        ".country",
+        ".region",
+        ".postcode",
+        ".freeform",
+        f"confidence: toFloat({alias}.confidence)",
+        ".yelpId",
+        *extra,
+    ]
+    return f"{alias} {{ {', '.join(fields)} }}"
+
 
 class PlaceDAO(object):
     def __init__(self, driver: AsyncDriver):
@@ -23,6 +62,19 @@ class PlaceDAO(object):
         result = await result.single()
         return result.get("place") if result else None
 
+    @staticmethod
+    async def get_place_version(
+        tx: AsyncManagedTransaction, placeId: str
+    ) -> dict[str, Any] | None:
+        # Changed on every write of the properties, read without projecting the place
+        result = await tx.run(
+            "MATCH (p:Place {placeId: $placeId}) RETURN p.version AS version",
+            placeId=placeId,
+        )
+
+        result = await result.single()
+        return result.data() if result else None
+
     @staticmethod
     async def get_place_by_yelp_id(
         tx: AsyncManagedTransaction, yelpId: str
@@ -52,7 +104,7 @@ class PlaceDAO(object):
             apoc.text.sorensenDiceSimilarity(candidate.name, $name) > 0.5
         WITH 
             candidate,
-            point.distance(candidate.coordinates, pointRef) < $max_distance_meters AS distance ,
+            point.distance(candidate.coordinates, pointRef) AS distance,
             apoc.text.sorensenDiceSimilarity(candidate.name, $name) AS score
         ORDER BY distance ASC, score DESC
         LIMIT 1
@@ -87,18 +139,51 @@ class PlaceDAO(object):
 
     @staticmethod
     async def get_places(
-        tx: AsyncManagedTransaction, sort="placeId", order="DESC", skip=0, limit=25
+        tx: AsyncManagedTransaction,
+        sort="placeId",
+        order="DESC",
+        skip=0,
+        limit=25,
+        after=None,
     ) -> list[SinglePlace]:
+        places = PlaceDAO.stream_places(tx, sort, order, skip, limit, after)
+        return [place async for place in places]
+
+    @staticmethod
+    async def stream_places(
+        tx: AsyncManagedTransaction,
+        sort="placeId",
+        order="DESC",
+        skip=0,
+        limit=25,
+        after=None,
+    ) -> AsyncIterator[SinglePlace]:
         if not validate_order(order):
             order = "DESC"
-        if not validate_field(SinglePlace, sort):
+        # Latitude and longitude are read from the coordinates point
+        if not validate_field(SinglePlace, sort) or sort in ("latitude", "longitude"):
             sort = "placeId"
 
+        if after is not None:
+            places = keyset_nodes(
+                tx,
+                "p:Place",
+                "placeId",
+                sort,
+                order,
+                after,
+                limit,
+                projection=place_projection("p"),
+            )
+            async for place in places:
+                yield place
+            return
+
         query = cast(
             LiteralString,
             f"""MATCH (p:Place)
-            ORDER BY p.{sort} {order}
-            RETURN p AS place
+            ORDER BY p.{sort} {order}, p.placeId {order}
+            RETURN {place_projection("p")} AS place
             SKIP $skip LIMIT $limit """,
         )
 
@@ -108,7 +193,65 @@ class PlaceDAO(object):
             limit=limit,
         )
 
-        return [row.value("place") async for row in result]
+        async for row in result:
+            yield row.value("place")
+
+    @staticmethod
+    async def export_places(
+        tx: AsyncManagedTransaction,
+        country: str | None = None,
+        region: str | None = None,
+    ) -> AsyncIterator[SinglePlace]:
+        # Unordered, so records are sent as the index seek finds them
+        filters = {"country": country, "region": region}
+        conditions = [
+            f"p.{field} = ${field}" for field, value in filters.items() if value
+        ]
+        query = cast(
+            LiteralString,
+            f"""MATCH (p:Place)
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}
+            RETURN p AS place """,
+        )
+
+        result = await tx.run(query, country=country, region=region)
+
+        async for row in result:
+            yield row.value("place")
+
+    @staticmethod
+    async def export_catalog(
+        tx: AsyncManagedTransaction,
+        columns: list[str],
+        country: str | None = None,
+        region: str | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        filters = {"country": country, "region": region}
+        conditions = [
+            f"p.{field} = ${field}" for field, value in filters.items() if value
+        ]
+        # Ratings are only aggregated when one of their columns is exported
+        ratings = ""
+        if "ratingCount" in columns or "avgRating" in columns:
+            ratings = """CALL (p) {
+                OPTIONAL MATCH (p)<-[r:RATED]-(:User)
+                RETURN count(r) AS ratingCount, avg(r.rating) AS avgRating
+            }"""
+        projection = ", ".join(
+            f"{EXPORT_COLUMNS[column]} AS {column}" for column in columns
+        )
+        query = cast(
+            LiteralString,
+            f"""MATCH (p:Place)
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}
+            {ratings}
+            RETURN {projection} """,
+        )
+
+        result = await tx.run(query, country=country, region=region)
+
+        async for row in result:
+            yield row.data()
 
     @staticmethod
     async def add(
@@ -118,6 +261,7 @@ class PlaceDAO(object):
             """
             CREATE (p:Place {placeId: $placeId})
             FOREACH (k IN keys($data) | SET p[k]=$data[k])
+            SET p.version = randomUUID()
             RETURN p AS place
         """,
             placeId=placeId,
@@ -127,6 +271,30 @@ class PlaceDAO(object):
         result = await result.single()
         return result.get("place") if result else None
 
+    @staticmethod
+    async def add_many(
+        tx: AsyncManagedTransaction, rows: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        result = await tx.run(
+            """
+            UNWIND $rows AS row
+            OPTIONAL MATCH (existing:Place {placeId: row.placeId})
+            OPTIONAL MATCH (taken:Place {yelpId: row.data.yelpId})
+            WITH row, existing IS NOT NULL AS found, taken IS NOT NULL AS conflict
+            FOREACH (_ IN CASE WHEN NOT found AND NOT conflict THEN [1] ELSE [] END |
+                CREATE (p:Place {placeId: row.placeId})
+                SET p += row.data, p.version = randomUUID())
+            RETURN row.index AS index, CASE
+                WHEN found THEN 'exists'
+                WHEN conflict THEN 'conflict'
+                ELSE 'created'
+            END AS status
+        """,
+            rows=rows,
+        )
+
+        return await result.data()
+
     @staticmethod
     async def modify(
         tx: AsyncManagedTransaction, placeId: str, data: dict[str, Any]
@@ -135,6 +303,7 @@ class PlaceDAO(object):
             """
             MATCH (p:Place {placeId: $placeId})
             FOREACH (k IN keys($data) | SET p[k]=$data[k])
+            SET p.version = randomUUID()
             RETURN p AS place
         """,
             placeId=placeId,
@@ -161,74 +330,110 @@ class PlaceDAO(object):
     @staticmethod
     async def add_place_feature(
         tx: AsyncManagedTransaction, placeId: str, feature: str
-    ) -> bool:
+    ) -> dict[str, Any]:
         result = await tx.run(
             """
-            MATCH (p:Place {placeId: $placeId})
-            MATCH (f:Feature {name: $feature})
-            MERGE (p)-[:HAS_FEATURE]->(f)
-            WITH (p IS NOT NULL AND f IS NOT NULL) AS result
-            RETURN result
+            OPTIONAL MATCH (p:Place {placeId: $placeId})
+            OPTIONAL MATCH (f:Feature {name: $feature})
+            FOREACH (_ IN CASE WHEN p IS NOT NULL AND f IS NOT NULL THEN [1] ELSE [] END |
+                MERGE (p)-[:HAS_FEATURE]->(f))
+            RETURN
+                f IS NOT NULL AS feature,
+                p { .*, features: [(p)-->(pf:Feature) | pf], categories: [(p)-->(pc:Category) | pc] } AS place
         """,
             placeId=placeId,
             feature=feature,
         )
 
         result = await result.single()
-        return result.get("result") if result else None
+        return result.data()
 
     @staticmethod
     async def remove_place_feature(
         tx: AsyncManagedTransaction, placeId: str, feature: str
-    ) -> bool:
+    ) -> dict[str, Any]:
         result = await tx.run(
             """
-            MATCH (p:Place {placeId: $placeId})-[r:HAS_FEATURE]->(f:Feature {name: $feature})
+            OPTIONAL MATCH (p:Place {placeId: $placeId})
+            OPTIONAL MATCH (f:Feature {name: $feature})
+            OPTIONAL MATCH (p)-[r:HAS_FEATURE]->(f)
             DELETE r
-            RETURN r AS relationship
+            RETURN
+                f IS NOT NULL AS feature,
+                r IS NOT NULL AS removed,
+                p { .*, features: [(p)-->(pf:Feature) | pf], categories: [(p)-->(pc:Category) | pc] } AS place
         """,
             placeId=placeId,
             feature=feature,
         )
 
         result = await result.single()
-        return result is None
+        return result.data()
 
     @staticmethod
     async def add_place_category(
         tx: AsyncManagedTransaction, placeId: str, category: str
-    ) -> bool:
+    ) -> dict[str, Any]:
         result = await tx.run(
             """
-            MATCH (p:Place {placeId: $placeId})
-            MATCH (c:Category {name: $category})
-            MERGE (p)-[:IN_CATEGORY]->(c)
-            WITH (p IS NOT NULL AND c IS NOT NULL) AS result
-            RETURN result
+            OPTIONAL MATCH (p:Place {placeId: $placeId})
+            OPTIONAL MATCH (c:Category {name: $category})
+            FOREACH (_ IN CASE WHEN p IS NOT NULL AND c IS NOT NULL THEN [1] ELSE [] END |
+                MERGE (p)-[:IN_CATEGORY]->(c))
+            RETURN
+                c IS NOT NULL AS category,
+                p { .*, features: [(p)-->(pf:Feature) | pf], categories: [(p)-->(pc:Category) | pc] } AS place
         """,
             placeId=placeId,
             category=category,
         )
 
         result = await result.single()
-        return result.get("result") if result else None
+        return result.data()
 
     @staticmethod
     async def remove_place_category(
         tx: AsyncManagedTransaction, placeId: str, category: str
-    ) -> bool:
+    ) -> dict[str, Any]:
         result = await tx.run(
             """
-            MATCH (p:Place {placeId: $placeId})-[r:IN_CATEGORY]->(c:Category {name: $category})
+            OPTIONAL MATCH (p:Place {placeId: $placeId})
+            OPTIONAL MATCH (c:Category {name: $category})
+            OPTIONAL MATCH (p)-[r:IN_CATEGORY]->(c)
             DELETE r
-            RETURN r AS relationship
+            RETURN
+                c IS NOT NULL AS category,
+                r IS NOT NULL AS removed,
+                p { .*, features: [(p)-->(pf:Feature) | pf], categories: [(p)-->(pc:Category) | pc] } AS place
         """,
             placeId=placeId,
             category=category,
         )
 
         result = await result.single()
-        return result is None
+        return result.data()
+
+    @staticmethod
+    async def add_place_categories(
+        tx: AsyncManagedTransaction, rows: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        result = await tx.run(
+            """
+            UNWIND $rows AS row
+            OPTIONAL MATCH (p:Place {placeId: row.placeId})
+            OPTIONAL MATCH (c:Category {name: row.category})
+            FOREACH (_ IN CASE WHEN p IS NOT NULL AND c IS NOT NULL THEN [1] ELSE [] END |
+                MERGE (p)-[:IN_CATEGORY]->(c))
+            RETURN row.index AS index, CASE
+                WHEN p IS NULL THEN 'place_not_found'
+                WHEN c IS NULL THEN 'category_not_found'
+                ELSE 'attached'
+            END AS status
+        """,
+            rows=rows,
+        )
+
+        return await result.data()
 
     @staticmethod
     async def recommend_places_near_by_affinity(
@@ -5,6 +5,7 @@ from neo4j.exceptions import ConstraintError
 
 from app.config.neo4j import validate_order, validate_field
 from app.config.settings import settings
+from app.dao.place_dao import place_projection
 from app.dto.place import SinglePlace, SinglePlaceExtended, SinglePlaceRecommended
 from app.config.exceptions import NotFound, AlreadyExists
 
@@ -60,7 +61,14 @@ class RecommendationDAO(object):
           (totalAffinityScore - (distance / 200)) AS finalScore
 
         ORDER BY finalScore DESC
-        RETURN candidate { .*, matches: matches, distance, score: finalScore } as place
+        RETURN """
+            + place_projection(
+                "candidate",
+                "matches: matches",
+                "distance: distance",
+                "score: finalScore",
+            )
+            + """ AS place
         SKIP $skip LIMIT $limit
         """,
         )
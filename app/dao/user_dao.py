@@ -1,7 +1,8 @@
-from typing import cast, LiteralString, Literal
+from typing import cast, Any, AsyncIterator, LiteralString, Literal
 
 from neo4j import AsyncDriver, AsyncManagedTransaction
 from app.config.exceptions import InvalidValue
+from app.config.pagination import keyset_nodes
 from app.config.neo4j import validate_order, validate_field, validate_gender
 from app.dto.user import SingleUser
 
@@ -41,18 +42,50 @@ class UserDAO(object):
 
     @staticmethod
     async def get_users(
-        tx: AsyncManagedTransaction, sort="userId", order="DESC", skip=0, limit=25
+        tx: AsyncManagedTransaction,
+        sort="userId",
+        order="DESC",
+        skip=0,
+        limit=25,
+        after=None,
     ):
+        users = UserDAO.stream_users(tx, sort, order, skip, limit, after)
+        return [user async for user in users]
+
+    @staticmethod
+    async def stream_users(
+        tx: AsyncManagedTransaction,
+        sort="userId",
+        order="DESC",
+        skip=0,
+        limit=25,
+        after=None,
+    ) -> AsyncIterator[Any]:
         if not validate_order(order):
             order = "DESC"
         if not validate_field(SingleUser, sort):
             sort = "userId"
 
+        if after is not None:
+            users = keyset_nodes(
+                tx,
+                "u:User",
+                "userId",
+                sort,
+                order,
+                after,
+                limit,
+                value="date($value)" if sort == "born" else "$value",
+            )
+            async for user in users:
+                yield user
+            return
+
         query = cast(
             LiteralString,
             f"""
             MATCH (u:User)
-            ORDER BY u.{sort} {order}
+            ORDER BY u.{sort} {order}, u.userId {order}
             RETURN u AS user 
             SKIP $skip LIMIT $limit """,
         )
@@ -63,7 +96,8 @@ class UserDAO(object):
             limit=limit,
         )
 
-        return [row.value("user") async for row in result]
+        async for row in result:
+            yield row.value("user")
 
     @staticmethod
     async def add(
@@ -87,6 +121,26 @@ class UserDAO(object):
         result = await result.single()
         return result.get("user") if result else None
 
+    @staticmethod
+    async def add_many(tx: AsyncManagedTransaction, rows: list[dict[str, Any]]):
+        result = await tx.run(
+            """
+            UNWIND $rows AS row
+            OPTIONAL MATCH (existing:User {userId: row.userId})
+            FOREACH (_ IN CASE WHEN existing IS NULL THEN [1] ELSE [] END |
+                CREATE (u:User {userId: row.userId})
+                SET u.born = date(row.born)
+                SET u.gender = row.gender)
+            RETURN row.index AS index, CASE
+                WHEN existing IS NULL THEN 'created'
+                ELSE 'exists'
+            END AS status
+        """,
+            rows=rows,
+        )
+
+        return await result.data()
+
     @staticmethod
     async def modify(
         tx: AsyncManagedTransaction,
@@ -126,14 +180,17 @@ class UserDAO(object):
     @staticmethod
     async def add_feature(
         tx: AsyncManagedTransaction, user_id: str, feature: str
-    ) -> bool:
+    ) -> dict[str, Any]:
         query = cast(
             LiteralString,
             f"""
-            MATCH (u:User {{userId: $user_id}})
-            MATCH (f:Feature {{name: $feature}})
-            MERGE (u)-[:{UserDAO.NEEDS_FEATURE}]->(f)
-            RETURN u AS user """,
+            OPTIONAL MATCH (u:User {{userId: $user_id}})
+            OPTIONAL MATCH (f:Feature {{name: $feature}})
+            FOREACH (_ IN CASE WHEN u IS NOT NULL AND f IS NOT NULL THEN [1] ELSE [] END |
+                MERGE (u)-[:{UserDAO.NEEDS_FEATURE}]->(f))
+            RETURN
+                f IS NOT NULL AS feature,
+                u {{ .*, features: [(u)-->(uf:Feature) | uf] }} AS user """,
         )
 
         result = await tx.run(
@@ -143,17 +200,23 @@ class UserDAO(object):
         )
 
         result = await result.single()
-        return result is not None
+        return result.data()
 
     @staticmethod
-    async def remove_feature(tx: AsyncManagedTransaction, user_id: str, feature: str):
+    async def remove_feature(
+        tx: AsyncManagedTransaction, user_id: str, feature: str
+    ) -> dict[str, Any]:
         query = cast(
             LiteralString,
             f"""
-            MATCH (u:User {{userId: $user_id}})-[r:{UserDAO.NEEDS_FEATURE}]->(f:Feature {{name: $feature}})
+            OPTIONAL MATCH (u:User {{userId: $user_id}})
+            OPTIONAL MATCH (f:Feature {{name: $feature}})
+            OPTIONAL MATCH (u)-[r:{UserDAO.NEEDS_FEATURE}]->(f)
             DELETE r
-            WITH (u IS NOT NULL AND f IS NOT NULL) AS relationship
-            RETURN relationship """,
+            RETURN
+                f IS NOT NULL AS feature,
+                r IS NOT NULL AS removed,
+                u {{ .*, features: [(u)-->(uf:Feature) | uf] }} AS user """,
         )
 
         result = await tx.run(
@@ -163,7 +226,7 @@ class UserDAO(object):
         )
 
         result = await result.single()
-        return result.get("relationship") if result else None
+        return result.data()
 
     @staticmethod
     async def find_rating(tx: AsyncManagedTransaction, user_id: str, place_id: str):
@@ -187,15 +250,16 @@ class UserDAO(object):
     @staticmethod
     async def add_rating(
         tx: AsyncManagedTransaction, user_id: str, place_id: str, rating: float
-    ) -> bool:
+    ) -> dict[str, bool]:
         query = cast(
             LiteralString,
             f"""
-            MATCH (u:User {{userId: $user_id}})
-            MATCH (p:Place {{placeId: $place_id}})
-            MERGE (u)-[r:{UserDAO.RATED}]->(p)
-            SET r.rating = $rating
-            RETURN (r IS NOT NULL) AS rating_exists """,
+            OPTIONAL MATCH (u:User {{userId: $user_id}})
+            OPTIONAL MATCH (p:Place {{placeId: $place_id}})
+            FOREACH (_ IN CASE WHEN u IS NOT NULL AND p IS NOT NULL THEN [1] ELSE [] END |
+                MERGE (u)-[r:{UserDAO.RATED}]->(p)
+                SET r.rating = $rating)
+            RETURN u IS NOT NULL AS user, p IS NOT NULL AS place """,
         )
 
         result = await tx.run(
@@ -206,4 +270,28 @@ class UserDAO(object):
         )
 
         result = await result.single()
-        return result and result.get("rating_exists")
+        return result.data()
+
+    @staticmethod
+    async def add_ratings(
+        tx: AsyncManagedTransaction, rows: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        query = cast(
+            LiteralString,
+            f"""
+            UNWIND $rows AS row
+            OPTIONAL MATCH (u:User {{userId: row.userId}})
+            OPTIONAL MATCH (p:Place {{placeId: row.placeId}})
+            FOREACH (_ IN CASE WHEN u IS NOT NULL AND p IS NOT NULL THEN [1] ELSE [] END |
+                MERGE (u)-[r:{UserDAO.RATED}]->(p)
+                SET r.rating = row.rating)
+            RETURN row.index AS index, CASE
+                WHEN u IS NULL THEN 'user_not_found'
+                WHEN p IS NULL THEN 'place_not_found'
+                ELSE 'rated'
+            END AS status """,
+        )
+
+        result = await tx.run(query, rows=rows)
+
+        return await result.data()
@@ -0,0 +1,29 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class SingleRating(BaseModel):
+    userId: str
+    placeId: str
+    rating: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PlaceCategoryLink(BaseModel):
+    placeId: str
+    category: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: str | None = None
+    status: str
+    detail: str | None = None
+
+
+class BulkResult(BaseModel):
+    total: int
+    statuses: dict[str, int]
+    items: list[BulkItemResult]
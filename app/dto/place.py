@@ -42,6 +42,11 @@ class SinglePlace(BaseModel):
 
         return data
 
+    @classmethod
+    def from_record(cls, record: dict[str, Any]) -> "SinglePlace":
+        # Records of place_projection already have every field with its type
+        return cls.model_construct(**record)
+
 
 class SinglePlaceExtended(SinglePlace):
     features: list[SingleFeature] = []
@@ -59,3 +64,11 @@ class SinglePlaceRecommended(SinglePlace):
     matches: list[SinglePlaceCategoryMatch] = []
     distance: float
     score: float
+
+    @classmethod
+    def from_record(cls, record: dict[str, Any]) -> "SinglePlaceRecommended":
+        matches = [
+            SinglePlaceCategoryMatch.model_construct(**match)
+            for match in record["matches"]
+        ]
+        return cls.model_construct(**{**record, "matches": matches})
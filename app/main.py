@@ -1,27 +1,48 @@
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, Depends
-from starlette.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse, Response
 from starlette.exceptions import HTTPException
 
 from app.config.neo4j import setup_db
+from app.config.reference_data import ReferenceData
 from app.config.security import validate_security_token
+from app.config.slow_queries import create_slow_query_store
 from app.config.settings import settings
+from app.config.timing import ServerTimingMiddleware, TimedJSONResponse
+from app.config.write_behind import RatingBuffer
 from app.routers.users import router as user_router
 from app.routers.features import router as feature_router
 from app.routers.categories import router as category_router
 from app.routers.places import router as places_router
+from app.routers.ratings import router as ratings_router
+from app.routers.admin import router as admin_router
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.driver = await setup_db()
+    # Shared with the admin routes, which read it without another file handler
+    app.state.slow_query_store = create_slow_query_store()
+    app.state.driver = await setup_db(app.state.slow_query_store)
+    app.state.reference_data = ReferenceData()
+    await app.state.reference_data.start(app.state.driver)
+    app.state.rating_buffer = None
+    if settings.RATING_WRITE_BEHIND:
+        app.state.rating_buffer = RatingBuffer(app.state.driver)
+        await app.state.rating_buffer.start()
     yield
+    if app.state.rating_buffer is not None:
+        await app.state.rating_buffer.close()
+    await app.state.reference_data.close()
     await app.state.driver.close()
+    app.state.slow_query_store.close()
 
 
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
     title=settings.PROJECT_NAME,
     description=settings.PROJECT_DESCRIPTION,
     version=settings.PROJECT_VERSION,
@@ -34,13 +55,28 @@ app = FastAPI(
     },
 )
 
+app.add_middleware(ServerTimingMiddleware)
+# Negotiated with Accept-Encoding, small bodies are not worth compressing
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
 
 @app.exception_handler(HTTPException)
 async def exception_handler(request: Request, exc: HTTPException):
-    return JSONResponse(status_code=exc.status_code, content=exc.detail)
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=exc.detail,
+        headers=getattr(exc, "headers", None),
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 app.include_router(user_router, dependencies=[Depends(validate_security_token)])
 app.include_router(feature_router, dependencies=[Depends(validate_security_token)])
 app.include_router(category_router, dependencies=[Depends(validate_security_token)])
 app.include_router(places_router, dependencies=[Depends(validate_security_token)])
+app.include_router(ratings_router, dependencies=[Depends(validate_security_token)])
+app.include_router(admin_router, dependencies=[Depends(validate_security_token)])
@@ -0,0 +1,20 @@
+import asyncio
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.config.dependencies import get_slow_query_store
+from app.config.slow_queries import SlowQueryStore
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get(
+    "/slow-queries",
+    description="Latest slow statements, newest first, with their sampled PROFILE plans",
+    response_model=list[dict[str, Any]],
+)
+async def get_slow_queries(
+    limit: int = 50, store: SlowQueryStore = Depends(get_slow_query_store)
+) -> list[dict[str, Any]]:
+    return await asyncio.to_thread(store.read, limit)
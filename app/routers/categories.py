@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 
+from app.config.conditional import entity_tag, etag_matches, not_modified
 from app.config.dependencies import get_category_service
+from app.config.pagination import next_cursor
 from app.dto.category import SingleCategory
 from app.services.category_service import CategoryService
 
@@ -9,11 +11,24 @@ router = APIRouter(prefix="/categories", tags=["categories"])
 
 @router.get("", description="Get all categories", response_model=list[SingleCategory])
 async def get_all_categories(
+    request: Request,
+    response: Response,
     service: CategoryService = Depends(get_category_service),
     skip: int = 0,
     limit: int = 25,
+    after: str | None = None,
 ) -> list[SingleCategory]:
-    return await service.get_all_categories(skip=skip, limit=limit, order="ASC")
+    etag = entity_tag(service.get_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    categories = await service.get_all_categories(
+        skip=skip, limit=limit, order="ASC", after=after
+    )
+    cursor = next_cursor(categories, "name", "name", limit)
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    response.headers["ETag"] = etag
+    return categories
 
 
 @router.get(
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 
+from app.config.conditional import entity_tag, etag_matches, not_modified
 from app.config.dependencies import get_feature_service
+from app.config.pagination import next_cursor
 from app.services.feature_service import FeatureService
 from app.dto.feature import SingleFeature
 
@@ -9,11 +11,24 @@ router = APIRouter(prefix="/features", tags=["features"])
 
 @router.get("", description="Get all features", response_model=list[SingleFeature])
 async def get_all_features(
+    request: Request,
+    response: Response,
     service: FeatureService = Depends(get_feature_service),
     skip: int = 0,
     limit: int = 25,
+    after: str | None = None,
 ) -> list[SingleFeature]:
-    return await service.get_all_features(skip=skip, limit=limit, order="ASC")
+    etag = entity_tag(service.get_version())
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    features = await service.get_all_features(
+        skip=skip, limit=limit, order="ASC", after=after
+    )
+    cursor = next_cursor(features, "name", "name", limit)
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    response.headers["ETag"] = etag
+    return features
 
 
 @router.get("/{name}", description="Get a single feature", response_model=SingleFeature)
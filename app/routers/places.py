@@ -1,7 +1,18 @@
-from fastapi import APIRouter, Depends
+import os
+from typing import Any
 
+from fastapi import APIRouter, Body, Depends, Request, Response
+from starlette.background import BackgroundTask
+from starlette.responses import FileResponse, StreamingResponse
+
+from app.config.conditional import entity_tag, etag_matches, not_modified
 from app.config.dependencies import get_place_service, get_recommendation_service
+from app.config.pagination import next_cursor
+from app.config.serialization import EncodedJSONResponse, encode_json
+from app.config.streaming import NDJSON, ndjson_response, wants_ndjson
+from app.dto.bulk import BulkResult
 from app.dto.place import SinglePlace, SinglePlaceExtended, SinglePlaceRecommended
+from app.services.export import ARROW_STREAM, PARQUET, arrow_stream, parquet_file
 from app.services.place_service import PlaceService
 from app.services.recommendation_service import RecommendationService
 
@@ -10,16 +21,100 @@ router = APIRouter(prefix="/places", tags=["places"])
 
 @router.get("", description="Get all places", response_model=list[SinglePlace])
 async def get_all_places(
-    service: PlaceService = Depends(get_place_service), skip: int = 0, limit: int = 25
-) -> list[SinglePlace]:
-    return await service.get_all_places(skip=skip, limit=limit, order="ASC")
+    request: Request,
+    service: PlaceService = Depends(get_place_service),
+    skip: int = 0,
+    limit: int = 25,
+    sort: str = "placeId",
+    after: str | None = None,
+) -> Response:
+    if wants_ndjson(request):
+        return await ndjson_response(
+            service.stream_all_places(
+                sort=sort, skip=skip, limit=limit, order="ASC", after=after
+            )
+        )
+    places = await service.get_all_places(
+        sort=sort, skip=skip, limit=limit, order="ASC", after=after
+    )
+    response = EncodedJSONResponse(encode_json(list[SinglePlace], places))
+    cursor = next_cursor(places, sort, "placeId", limit)
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    return response
+
+
+@router.get(
+    "/export",
+    description="Stream every place, optionally of a country or region, as NDJSON",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON: {}}}},
+)
+async def export_places(
+    service: PlaceService = Depends(get_place_service),
+    country: str | None = None,
+    region: str | None = None,
+) -> StreamingResponse:
+    return await ndjson_response(service.export_places(country=country, region=region))
+
+
+@router.get(
+    "/export/arrow",
+    description="Stream the place catalog with categories, features and rating stats "
+    "as an Arrow IPC stream",
+    response_class=StreamingResponse,
+    responses={200: {"content": {ARROW_STREAM: {}}}},
+)
+async def export_catalog_arrow(
+    service: PlaceService = Depends(get_place_service),
+    columns: str | None = None,
+    country: str | None = None,
+    region: str | None = None,
+) -> StreamingResponse:
+    schema, batches = await service.export_catalog(
+        columns=columns, country=country, region=region
+    )
+    return StreamingResponse(arrow_stream(batches, schema), media_type=ARROW_STREAM)
+
+
+@router.get(
+    "/export/parquet",
+    description="Place catalog with categories, features and rating stats as a Parquet file",
+    response_class=FileResponse,
+    responses={200: {"content": {PARQUET: {}}}},
+)
+async def export_catalog_parquet(
+    service: PlaceService = Depends(get_place_service),
+    columns: str | None = None,
+    country: str | None = None,
+    region: str | None = None,
+) -> FileResponse:
+    schema, batches = await service.export_catalog(
+        columns=columns, country=country, region=region
+    )
+    path = await parquet_file(batches, schema)
+    return FileResponse(
+        path,
+        media_type=PARQUET,
+        filename="places.parquet",
+        background=BackgroundTask(os.unlink, path),
+    )
 
 
 @router.get("/{placeId}", description="Get a single place", response_model=SinglePlace)
 async def find_place_by_place_id(
-    placeId: str, service: PlaceService = Depends(get_place_service)
+    placeId: str,
+    request: Request,
+    response: Response,
+    service: PlaceService = Depends(get_place_service),
 ) -> SinglePlace:
-    return await service.get_place(placeId=placeId)
+    etag = entity_tag(await service.get_place_version(placeId=placeId))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    place = await service.get_place(placeId=placeId)
+    if etag is not None:
+        response.headers["ETag"] = etag
+    return place
 
 
 @router.get(
@@ -47,6 +142,30 @@ async def create_place(
     return await service.create_place(placeId=data.placeId, data=data.model_dump())
 
 
+@router.post(
+    "/bulk",
+    description="Create many places, reporting the outcome of every item",
+    response_model=BulkResult,
+)
+async def create_places(
+    items: list[Any] = Body(description="Array of places"),
+    service: PlaceService = Depends(get_place_service),
+) -> BulkResult:
+    return await service.create_places(items)
+
+
+@router.post(
+    "/bulk/categories",
+    description="Attach categories to many places, reporting the outcome of every item",
+    response_model=BulkResult,
+)
+async def create_place_categories(
+    items: list[Any] = Body(description="Array of {placeId, category}"),
+    service: PlaceService = Depends(get_place_service),
+) -> BulkResult:
+    return await service.attach_categories_to_places(items)
+
+
 @router.put(
     "/{placeId}",
     description="Update a place",
@@ -68,8 +187,7 @@ async def update_place(
 async def create_place_feature(
     placeId: str, feature: str, service: PlaceService = Depends(get_place_service)
 ) -> SinglePlaceExtended:
-    await service.attach_feature_to_place(placeId=placeId, feature=feature)
-    return await service.get_place(placeId=placeId)
+    return await service.attach_feature_to_place(placeId=placeId, feature=feature)
 
 
 @router.post(
@@ -81,8 +199,7 @@ async def create_place_feature(
 async def create_place_category(
     placeId: str, category: str, service: PlaceService = Depends(get_place_service)
 ) -> SinglePlaceExtended:
-    await service.attach_category_to_place(placeId=placeId, category=category)
-    return await service.get_place(placeId=placeId)
+    return await service.attach_category_to_place(placeId=placeId, category=category)
 
 
 @router.delete("/{placeId}", description="Delete a place", response_model=bool)
@@ -100,8 +217,7 @@ async def delete_place(
 async def delete_place_feature(
     placeId: str, feature: str, service: PlaceService = Depends(get_place_service)
 ) -> SinglePlaceExtended:
-    await service.detach_feature_from_place(placeId=placeId, feature=feature)
-    return await service.get_place(placeId=placeId)
+    return await service.detach_feature_from_place(placeId=placeId, feature=feature)
 
 
 @router.delete(
@@ -112,8 +228,7 @@ async def delete_place_feature(
 async def delete_place_category(
     placeId: str, category: str, service: PlaceService = Depends(get_place_service)
 ) -> SinglePlaceExtended:
-    await service.detach_category_from_place(placeId=placeId, category=category)
-    return await service.get_place(placeId=placeId)
+    return await service.detach_category_from_place(placeId=placeId, category=category)
 
 
 @router.get(
@@ -130,8 +245,8 @@ async def find_place_by_place_id(
     skip: int = 0,
     limit: int = 10,
     service: RecommendationService = Depends(get_recommendation_service),
-) -> list[SinglePlaceRecommended]:
-    return await service.recommend_places_near_by_affinity(
+) -> Response:
+    places = await service.recommend_places_near_by_affinity(
         user_id=user_id,
         base_category=base_category,
         latitude=latitude,
@@ -140,3 +255,4 @@ async def find_place_by_place_id(
         skip=skip,
         limit=limit,
     )
+    return EncodedJSONResponse(encode_json(list[SinglePlaceRecommended], places))
@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi import APIRouter, Body, Depends
+
+from app.config.dependencies import get_user_service
+from app.dto.bulk import BulkResult
+from app.services.user_service import UserService
+
+router = APIRouter(prefix="/ratings", tags=["ratings"])
+
+
+@router.post(
+    "/bulk",
+    description="Rate many places, reporting the outcome of every item",
+    response_model=BulkResult,
+)
+async def create_ratings(
+    items: list[Any] = Body(description="Array of {userId, placeId, rating}"),
+    service: UserService = Depends(get_user_service),
+) -> BulkResult:
+    return await service.rate_places(items)
@@ -1,8 +1,13 @@
 from datetime import datetime
+from typing import Any
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Request, Response
 
 from app.config.dependencies import get_user_service
+from app.config.pagination import next_cursor
+from app.config.settings import settings
+from app.config.streaming import ndjson_response, wants_ndjson
+from app.dto.bulk import BulkResult
 from app.dto.user import SingleUser, SingleUserExtended
 from app.services.user_service import UserService
 
@@ -11,9 +16,23 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("", description="Get all users", response_model=list[SingleUser])
 async def get_all_users(
-    service: UserService = Depends(get_user_service), skip: int = 0, limit: int = 25
+    request: Request,
+    response: Response,
+    service: UserService = Depends(get_user_service),
+    skip: int = 0,
+    limit: int = 25,
+    sort: str = "userId",
+    after: str | None = None,
 ) -> list[SingleUser]:
-    return await service.get_all_users(skip=skip, limit=limit)
+    if wants_ndjson(request):
+        return await ndjson_response(
+            service.stream_all_users(sort=sort, skip=skip, limit=limit, after=after)
+        )
+    users = await service.get_all_users(sort=sort, skip=skip, limit=limit, after=after)
+    cursor = next_cursor(users, sort, "userId", limit)
+    if cursor is not None:
+        response.headers["X-Next-Cursor"] = cursor
+    return users
 
 
 @router.get("/{user_id}", description="Get a single user", response_model=SingleUser)
@@ -36,6 +55,18 @@ async def create_user(
     )
 
 
+@router.post(
+    "/bulk",
+    description="Create many users, reporting the outcome of every item",
+    response_model=BulkResult,
+)
+async def create_users(
+    items: list[Any] = Body(description="Array of users"),
+    service: UserService = Depends(get_user_service),
+) -> BulkResult:
+    return await service.create_users(items)
+
+
 @router.post(
     "/{user_id}/needs/{feature}",
     description="Attach a feature to user",
@@ -45,8 +76,9 @@ async def create_user(
 async def create_user_feature(
     user_id: str, feature: str, service: UserService = Depends(get_user_service)
 ) -> SingleUserExtended:
-    await service.attach_requested_feature_to_user(user_id=user_id, feature=feature)
-    return await service.get_user_by_id(user_id=user_id)
+    return await service.attach_requested_feature_to_user(
+        user_id=user_id, feature=feature
+    )
 
 
 @router.post(
@@ -58,9 +90,14 @@ async def create_user_rating(
     user_id: str,
     place_id: str,
     rating: float,
+    response: Response,
     service: UserService = Depends(get_user_service),
 ) -> bool:
-    return await service.rate_place(user_id=user_id, place_id=place_id, rating=rating)
+    rated = await service.rate_place(user_id=user_id, place_id=place_id, rating=rating)
+    if settings.RATING_WRITE_BEHIND:
+        # Accepted, written by the rating buffer with the next batch
+        response.status_code = 202
+    return rated
 
 
 @router.put("/{user_id}", description="Update a user", response_model=SingleUser)
@@ -89,5 +126,6 @@ async def delete_user(
 async def remove_user_feature(
     user_id: str, feature: str, service: UserService = Depends(get_user_service)
 ) -> SingleUserExtended:
-    await service.detach_requested_feature_to_user(user_id=user_id, feature=feature)
-    return await service.get_user_by_id(user_id=user_id)
+    return await service.detach_requested_feature_to_user(
+        user_id=user_id, feature=feature
+    )
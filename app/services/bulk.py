@@ -0,0 +1,116 @@
+from collections import Counter
+from typing import Any, Callable
+
+from neo4j.exceptions import Neo4jError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.config.exceptions import InvalidValue
+from app.config.settings import settings
+from app.config.unit_of_work import UnitOfWork
+from app.dto.bulk import BulkItemResult, BulkResult
+
+adapters: dict[type[BaseModel], TypeAdapter] = dict()
+
+
+def validate_items(
+    model: type[BaseModel], items: list[Any]
+) -> tuple[list[tuple[int, Any]], list[BulkItemResult]]:
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise InvalidValue(
+            f"Bulk requests accept at most {settings.BULK_MAX_ITEMS} items, got {len(items)}"
+        )
+    if model not in adapters:
+        adapters[model] = TypeAdapter(list[model])
+    adapter = adapters[model]
+
+    # The whole array is validated at once, invalid items are only separated on failure
+    try:
+        return list(enumerate(adapter.validate_python(items))), []
+    except ValidationError as e:
+        errors: dict[int, str] = dict()
+        for error in e.errors():
+            index, *field = error["loc"]
+            # Items that are not objects fail as a whole, without a field
+            location = ".".join(str(part) for part in field)
+            errors.setdefault(
+                index, f"{location}: {error['msg']}" if location else error["msg"]
+            )
+
+    indexes = [index for index in range(len(items)) if index not in errors]
+    valid = adapter.validate_python([items[index] for index in indexes])
+    return list(zip(indexes, valid)), [
+        BulkItemResult(index=index, status="invalid", detail=detail)
+        for index, detail in errors.items()
+    ]
+
+
+def first_occurrences(
+    items: list[tuple[int, Any]], key: Callable[[Any], Any], status: str
+) -> tuple[list[tuple[int, Any]], list[BulkItemResult]]:
+    # Rows of one UNWIND are all read before any is written, so repeated keys
+    # in a request would both be created and break the constraints, or be
+    # merged into one relationship while both are reported as written
+    seen = set()
+    kept = list()
+    rejected = list()
+    for index, item in items:
+        value = key(item)
+        if value is not None and value in seen:
+            label = "/".join(value) if isinstance(value, tuple) else value
+            rejected.append(
+                BulkItemResult(
+                    index=index, status=status, detail=f"{label} appears earlier"
+                )
+            )
+        else:
+            seen.add(value)
+            kept.append((index, item))
+    return kept, rejected
+
+
+async def write_chunk(
+    uow: UnitOfWork, transaction_function: Callable, rows: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    try:
+        results = await uow.write(transaction_function, rows=rows)
+        await uow.commit()
+        return results
+    except Neo4jError as e:
+        if len(rows) == 1:
+            message = getattr(e, "message", None) or str(e)
+            return [{"index": rows[0]["index"], "status": "error", "detail": message}]
+
+    # A failing row fails its whole transaction, the chunk is retried row by row
+    results = list()
+    for row in rows:
+        results.extend(await write_chunk(uow, transaction_function, [row]))
+    return results
+
+
+async def write_in_chunks(
+    uow: UnitOfWork, transaction_function: Callable, rows: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    results = list()
+    size = settings.BULK_CHUNK_SIZE
+    for start in range(0, len(rows), size):
+        results.extend(
+            await write_chunk(uow, transaction_function, rows[start : start + size])
+        )
+    return results
+
+
+def bulk_result(
+    total: int, ids: dict[int, str], items: list[BulkItemResult | dict[str, Any]]
+) -> BulkResult:
+    results = [
+        item if isinstance(item, BulkItemResult) else BulkItemResult(**item)
+        for item in items
+    ]
+    for result in results:
+        result.id = ids.get(result.index)
+    results.sort(key=lambda result: result.index)
+    return BulkResult(
+        total=total,
+        statuses=dict(Counter(result.status for result in results)),
+        items=results,
+    )
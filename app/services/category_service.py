@@ -1,59 +1,75 @@
-from neo4j import AsyncDriver
+from neo4j.exceptions import ConstraintError
 
-from app.config.settings import settings
+from app.config.pagination import decode_cursor
+from app.config.reference_data import ReferenceSet
+from app.config.unit_of_work import UnitOfWork
+from app.config.timing import stage
 from app.dao.category_dao import CategoryDAO
 from app.dto.category import SingleCategory
 from app.config.exceptions import NotFound, AlreadyExists
 
 
 class CategoryService:
-    def __init__(self, driver: AsyncDriver):
-        self.driver = driver
+    def __init__(self, uow: UnitOfWork, categories: ReferenceSet):
+        self.uow = uow
+        self.categories = categories
+
+    def get_version(self) -> str:
+        return self.categories.digest()
 
     async def get_all_categories(
-        self, sort: str = "name", order: str = "DESC", skip: int = 0, limit: int = 25
+        self,
+        sort: str = "name",
+        order: str = "DESC",
+        skip: int = 0,
+        limit: int = 25,
+        after: str | None = None,
     ) -> list[SingleCategory]:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            elements = await session.execute_read(
-                CategoryDAO.get_categories,
-                sort=sort,
-                order=order,
-                limit=limit,
-                skip=skip,
-            )
-            return [SingleCategory(name=item["name"]) for item in elements]
+        names = self.categories.page(
+            order=order,
+            skip=skip,
+            limit=limit,
+            after=decode_cursor(after, SingleCategory, sort, "name"),
+        )
+        with stage("model"):
+            return [SingleCategory(name=name) for name in names]
 
     async def get_single_category(self, name: str) -> SingleCategory:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            element = await session.execute_read(CategoryDAO.get_category, name)
+        if name not in self.categories:
+            # Created elsewhere since the last refresh
+            element = await self.uow.read(CategoryDAO.get_category, name)
             if element is None:
                 raise NotFound(f"Category {name} not found")
-            return SingleCategory(name=element["name"])
+            self.categories.add(name)
+        return SingleCategory(name=name)
 
     async def create_category(self, name: str) -> SingleCategory:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            candidate = await session.execute_read(CategoryDAO.get_category, name=name)
-            if candidate is None:
-                candidate = await session.execute_write(CategoryDAO.add, name=name)
-                return SingleCategory(name=candidate["name"])
-            else:
-                raise AlreadyExists(f"Category {name} already exists")
+        try:
+            candidate = await self.uow.write(CategoryDAO.add, name=name)
+            await self.uow.commit()
+        except ConstraintError:
+            raise AlreadyExists(f"Category {name} already exists")
+        self.categories.add(candidate["name"])
+        return SingleCategory(name=candidate["name"])
 
     async def update_category(self, name: str, new_name: str) -> SingleCategory:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            candidate = await session.execute_read(CategoryDAO.get_category, name=name)
-            if candidate is None:
-                raise NotFound(f"Category {name} not found")
-            else:
-                candidate = await session.execute_write(
-                    CategoryDAO.update, name=name, new_name=new_name
-                )
-                return SingleCategory(name=candidate["name"])
+        try:
+            candidate = await self.uow.write(
+                CategoryDAO.update, name=name, new_name=new_name
+            )
+        except ConstraintError:
+            raise AlreadyExists(f"Category {new_name} already exists")
+        if candidate is None:
+            self.categories.remove(name)
+            raise NotFound(f"Category {name} not found")
+        await self.uow.commit()
+        self.categories.rename(name, candidate["name"])
+        return SingleCategory(name=candidate["name"])
 
     async def delete_category(self, name: str) -> bool:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            candidate = await session.execute_read(CategoryDAO.get_category, name=name)
-            if candidate is None:
-                raise NotFound(f"Category {name} not found")
-            else:
-                return await session.execute_write(CategoryDAO.remove, name=name)
+        if await self.uow.write(CategoryDAO.remove, name=name):
+            await self.uow.commit()
+            self.categories.remove(name)
+            return True
+        self.categories.remove(name)
+        raise NotFound(f"Category {name} not found")
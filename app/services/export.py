@@ -0,0 +1,108 @@
+import asyncio
+import io
+import os
+import tempfile
+from typing import Any, AsyncIterator
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.config.exceptions import InvalidValue
+from app.config.settings import settings
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+PLACE_CATALOG_SCHEMA = pa.schema(
+    [
+        pa.field("placeId", pa.string(), nullable=False),
+        pa.field("name", pa.string()),
+        pa.field("latitude", pa.float64()),
+        pa.field("longitude", pa.float64()),
+        pa.field("locality", pa.string()),
+        pa.field("country", pa.string()),
+        pa.field("region", pa.string()),
+        pa.field("postcode", pa.string()),
+        pa.field("freeform", pa.string()),
+        pa.field("confidence", pa.float64()),
+        pa.field("yelpId", pa.string()),
+        pa.field("categories", pa.list_(pa.string())),
+        pa.field("features", pa.list_(pa.string())),
+        pa.field("ratingCount", pa.int64()),
+        pa.field("avgRating", pa.float64()),
+    ]
+)
+
+
+def select_columns(schema: pa.Schema, columns: str | None) -> pa.Schema:
+    if not columns:
+        return schema
+    names = list(dict.fromkeys(column.strip() for column in columns.split(",")))
+    unknown = [name for name in names if name not in schema.names]
+    if unknown:
+        raise InvalidValue(
+            f"Unknown columns {', '.join(unknown)}, expected some of "
+            f"{', '.join(schema.names)}"
+        )
+    return pa.schema([schema.field(name) for name in names])
+
+
+async def record_batches(
+    rows: AsyncIterator[dict[str, Any]], schema: pa.Schema
+) -> AsyncIterator[pa.RecordBatch]:
+    # Rows are appended column by column, so only one batch is held at a time
+    columns: dict[str, list[Any]] = {name: list() for name in schema.names}
+    count = 0
+    async for row in rows:
+        for name, values in columns.items():
+            values.append(row.get(name))
+        count = count + 1
+        if count >= settings.EXPORT_BATCH_SIZE:
+            yield pa.RecordBatch.from_pydict(columns, schema=schema)
+            columns = {name: list() for name in schema.names}
+            count = 0
+    if count > 0:
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
+
+
+async def arrow_stream(
+    batches: AsyncIterator[pa.RecordBatch], schema: pa.Schema
+) -> AsyncIterator[bytes]:
+    sink = io.BytesIO()
+
+    def flush() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield flush()
+        async for batch in batches:
+            writer.write_batch(batch)
+            yield flush()
+    # Closing the writer appends the end of stream marker
+    yield flush()
+
+
+async def write_parquet(
+    batches: AsyncIterator[pa.RecordBatch], schema: pa.Schema, path: str
+) -> None:
+    # Every batch becomes a row group, written off the event loop
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        async for batch in batches:
+            await asyncio.to_thread(writer.write_batch, batch)
+
+
+async def parquet_file(
+    batches: AsyncIterator[pa.RecordBatch], schema: pa.Schema
+) -> str:
+    # Parquet writes its footer last, so the file is complete before it is served
+    with tempfile.NamedTemporaryFile(suffix=".parquet", delete=False) as f:
+        path = f.name
+    try:
+        await write_parquet(batches, schema, path)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
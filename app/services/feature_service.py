@@ -1,55 +1,75 @@
-from neo4j import AsyncDriver
+from neo4j.exceptions import ConstraintError
 
-from app.config.settings import settings
+from app.config.pagination import decode_cursor
+from app.config.reference_data import ReferenceSet
+from app.config.unit_of_work import UnitOfWork
+from app.config.timing import stage
 from app.dao.feature_dao import FeatureDAO
 from app.dto.feature import SingleFeature
 from app.config.exceptions import NotFound, AlreadyExists
 
 
 class FeatureService:
-    def __init__(self, driver: AsyncDriver):
-        self.driver = driver
+    def __init__(self, uow: UnitOfWork, features: ReferenceSet):
+        self.uow = uow
+        self.features = features
+
+    def get_version(self) -> str:
+        return self.features.digest()
 
     async def get_all_features(
-        self, sort: str = "name", order: str = "DESC", skip: int = 0, limit: int = 25
+        self,
+        sort: str = "name",
+        order: str = "DESC",
+        skip: int = 0,
+        limit: int = 25,
+        after: str | None = None,
     ) -> list[SingleFeature]:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            elements = await session.execute_read(
-                FeatureDAO.get_features, sort=sort, order=order, limit=limit, skip=skip
-            )
-            return [SingleFeature(name=item["name"]) for item in elements]
+        names = self.features.page(
+            order=order,
+            skip=skip,
+            limit=limit,
+            after=decode_cursor(after, SingleFeature, sort, "name"),
+        )
+        with stage("model"):
+            return [SingleFeature(name=name) for name in names]
 
     async def get_single_feature(self, name: str) -> SingleFeature:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            element = await session.execute_read(FeatureDAO.get_feature, name)
+        if name not in self.features:
+            # Created elsewhere since the last refresh
+            element = await self.uow.read(FeatureDAO.get_feature, name)
             if element is None:
                 raise NotFound(f"Feature {name} not found")
-            return SingleFeature(name=element["name"])
+            self.features.add(name)
+        return SingleFeature(name=name)
 
     async def create_feature(self, name: str) -> SingleFeature:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            candidate = await session.execute_read(FeatureDAO.get_feature, name=name)
-            if candidate is None:
-                candidate = await session.execute_write(FeatureDAO.add, name=name)
-                return SingleFeature(name=candidate["name"])
-            else:
-                raise AlreadyExists(f"Feature {name} already exists")
+        try:
+            candidate = await self.uow.write(FeatureDAO.add, name=name)
+            await self.uow.commit()
+        except ConstraintError:
+            raise AlreadyExists(f"Feature {name} already exists")
+        self.features.add(candidate["name"])
+        return SingleFeature(name=candidate["name"])
 
     async def update_feature(self, name: str, new_name: str) -> SingleFeature:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            candidate = await session.execute_read(FeatureDAO.get_feature, name=name)
-            if candidate is None:
-                raise NotFound(f"Feature {name} not found")
-            else:
-                candidate = await session.execute_write(
-                    FeatureDAO.update, name=name, new_name=new_name
-                )
-                return SingleFeature(name=candidate["name"])
+        try:
+            candidate = await self.uow.write(
+                FeatureDAO.update, name=name, new_name=new_name
+            )
+        except ConstraintError:
+            raise AlreadyExists(f"Feature {new_name} already exists")
+        if candidate is None:
+            self.features.remove(name)
+            raise NotFound(f"Feature {name} not found")
+        await self.uow.commit()
+        self.features.rename(name, candidate["name"])
+        return SingleFeature(name=candidate["name"])
 
     async def delete_feature(self, name: str) -> bool:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            candidate = await session.execute_read(FeatureDAO.get_feature, name=name)
-            if candidate is None:
-                raise NotFound(f"Feature {name} not found")
-            else:
-                return await session.execute_write(FeatureDAO.remove, name=name)
+        if await self.uow.write(FeatureDAO.remove, name=name):
+            await self.uow.commit()
+            self.features.remove(name)
+            return True
+        self.features.remove(name)
+        raise NotFound(f"Feature {name} not found")
@@ -1,52 +1,123 @@
-from typing import Any
-from neo4j import AsyncDriver
+from typing import Any, AsyncIterator
 
-from app.config.settings import settings
+import pyarrow as pa
+from neo4j.exceptions import ConstraintError
+
+from app.config.pagination import decode_cursor
+from app.config.streaming import prefetch
+from app.config.unit_of_work import UnitOfWork
+from app.config.write_behind import RatingBuffer
+from app.config.timing import stage
 from app.dao.place_dao import PlaceDAO
+from app.dto.bulk import BulkResult, PlaceCategoryLink
 from app.dto.place import SinglePlace, SinglePlaceExtended, SinglePlaceRecommended
 from app.config.exceptions import NotFound, AlreadyExists
 from app.services.category_service import CategoryService
+from app.services.bulk import (
+    bulk_result,
+    first_occurrences,
+    validate_items,
+    write_in_chunks,
+)
+from app.services.export import (
+    PLACE_CATALOG_SCHEMA,
+    record_batches,
+    select_columns,
+)
 from app.services.feature_service import FeatureService
 
 
 class PlaceService:
     def __init__(
         self,
-        driver: AsyncDriver,
+        uow: UnitOfWork,
         feature_service: FeatureService,
         category_service: CategoryService,
+        rating_buffer: RatingBuffer | None = None,
     ) -> None:
-        self.driver = driver
+        self.uow = uow
         self.feature_service = feature_service
         self.category_service = category_service
+        self.rating_buffer = rating_buffer
 
     async def get_all_places(
-        self, sort="placeId", order="DESC", skip=0, limit=25
+        self, sort="placeId", order="DESC", skip=0, limit=25, after=None
     ) -> list[SinglePlace]:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            items = await session.execute_read(
-                PlaceDAO.get_places, sort=sort, order=order, skip=skip, limit=limit
-            )
-            return [SinglePlace(**item) for item in items]
+        items = await self.uow.read(
+            PlaceDAO.get_places,
+            sort=sort,
+            order=order,
+            skip=skip,
+            limit=limit,
+            after=decode_cursor(after, SinglePlace, sort, "placeId"),
+        )
+        with stage("model"):
+            return [SinglePlace.from_record(item) for item in items]
+
+    async def stream_all_places(
+        self, sort="placeId", order="DESC", skip=0, limit=25, after=None
+    ) -> AsyncIterator[SinglePlace]:
+        items = self.uow.stream(
+            PlaceDAO.stream_places,
+            sort=sort,
+            order=order,
+            skip=skip,
+            limit=limit,
+            after=decode_cursor(after, SinglePlace, sort, "placeId"),
+        )
+        async for item in items:
+            yield SinglePlace.from_record(item)
+
+    async def export_places(
+        self, country: str | None = None, region: str | None = None
+    ) -> AsyncIterator[SinglePlace]:
+        items = self.uow.stream(PlaceDAO.export_places, country=country, region=region)
+        async for item in items:
+            yield SinglePlace(**item)
+
+    async def export_catalog(
+        self,
+        columns: str | None = None,
+        country: str | None = None,
+        region: str | None = None,
+    ) -> tuple[pa.Schema, AsyncIterator[pa.RecordBatch]]:
+        schema = select_columns(PLACE_CATALOG_SCHEMA, columns)
+        rows = self.uow.stream(
+            PlaceDAO.export_catalog,
+            columns=schema.names,
+            country=country,
+            region=region,
+        )
+        return schema, record_batches(await prefetch(rows), schema)
+
+    async def get_place_version(self, placeId: str) -> str | None:
+        item = await self.uow.read(PlaceDAO.get_place_version, placeId=placeId)
+        if item is None:
+            raise NotFound(f"Place with id {placeId} was not found.")
+        return item["version"]
+
+    async def check_place_exists(self, placeId: str) -> None:
+        # Places known to the rating buffer are not read again
+        if self.rating_buffer is not None and placeId in self.rating_buffer.places:
+            return
+        if await self.uow.read(PlaceDAO.get_place, placeId=placeId) is None:
+            raise NotFound(f"Place with id {placeId} was not found.")
+        if self.rating_buffer is not None:
+            self.rating_buffer.places.add(placeId)
 
     async def get_place(self, placeId: str) -> SinglePlaceExtended:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(
-                PlaceDAO.get_place_extended, placeId=placeId
-            )
-            if item:
+        item = await self.uow.read(PlaceDAO.get_place_extended, placeId=placeId)
+        if item:
+            with stage("model"):
                 return SinglePlaceExtended(**item)
-            else:
-                raise NotFound(f"Place with id {placeId} was not found.")
+        else:
+            raise NotFound(f"Place with id {placeId} was not found.")
 
     async def get_place_by_yelp_id(self, yelpId: str) -> SinglePlace | None:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(
-                PlaceDAO.get_place_by_yelp_id, yelpId=yelpId
-            )
-            if item:
-                return SinglePlace(**item)
-            return None
+        item = await self.uow.read(PlaceDAO.get_place_by_yelp_id, yelpId=yelpId)
+        if item:
+            return SinglePlace(**item)
+        return None
 
     async def get_place_by_name_and_position(
         self,
@@ -55,93 +126,136 @@ class PlaceService:
         longitude: float,
         max_distance_meters: int = 200,
     ) -> SinglePlaceRecommended | None:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(
-                PlaceDAO.get_place_by_name_and_position,
-                name=name,
-                latitude=latitude,
-                longitude=longitude,
-                max_distance_meters=max_distance_meters,
-            )
-            if item:
+        item = await self.uow.read(
+            PlaceDAO.get_place_by_name_and_position,
+            name=name,
+            latitude=latitude,
+            longitude=longitude,
+            max_distance_meters=max_distance_meters,
+        )
+        if item:
+            with stage("model"):
                 return SinglePlaceRecommended(**item)
-            return None
+        return None
 
     async def create_place(self, placeId: str, data: dict[str, Any]) -> SinglePlace:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(PlaceDAO.get_place, placeId=placeId)
-            if item:
-                raise AlreadyExists(f"Place with id {placeId} already exists.")
-            else:
-                item = await session.execute_write(
-                    PlaceDAO.add, placeId=placeId, data=data
-                )
-                return SinglePlace(**item)
+        try:
+            item = await self.uow.write(PlaceDAO.add, placeId=placeId, data=data)
+            await self.uow.commit()
+        except ConstraintError:
+            raise AlreadyExists(f"Place with id {placeId} already exists.")
+        return SinglePlace(**item)
 
     async def update_place(self, placeId: str, data: dict[str, Any]) -> SinglePlace:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(PlaceDAO.get_place, placeId=placeId)
-            data["placeId"] = placeId
-            if item:
-                item = await session.execute_write(
-                    PlaceDAO.modify, placeId=placeId, data=data
-                )
-                return SinglePlace(**item)
-            else:
-                raise NotFound(f"Place with id {placeId} was not found.")
+        data["placeId"] = placeId
+        try:
+            item = await self.uow.write(PlaceDAO.modify, placeId=placeId, data=data)
+        except ConstraintError:
+            raise AlreadyExists(
+                f"Place with yelpId {data.get('yelpId')} already exists."
+            )
+        if item:
+            await self.uow.commit()
+            return SinglePlace(**item)
+        else:
+            raise NotFound(f"Place with id {placeId} was not found.")
 
     async def delete_place(self, placeId: str) -> bool:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(PlaceDAO.get_place, placeId=placeId)
-            if item:
-                return await session.execute_write(PlaceDAO.remove, placeId=placeId)
-            else:
-                raise NotFound(f"Place with id {placeId} was not found.")
-
-    async def attach_feature_to_place(self, placeId: str, feature: str) -> bool:
-        await self.feature_service.get_single_feature(name=feature)
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(PlaceDAO.get_place, placeId=placeId)
-            if item:
-                result = await session.execute_write(
-                    PlaceDAO.add_place_feature, placeId=placeId, feature=feature
-                )
-                return result
-            else:
-                raise NotFound(f"Place with id {placeId} was not found.")
-
-    async def detach_feature_from_place(self, placeId: str, feature: str) -> bool:
-        await self.feature_service.get_single_feature(name=feature)
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(PlaceDAO.get_place, placeId=placeId)
-            if item:
-                result = await session.execute_write(
-                    PlaceDAO.remove_place_feature, placeId=placeId, feature=feature
-                )
-                return result
-            else:
-                raise NotFound(f"Place with id {placeId} was not found.")
-
-    async def attach_category_to_place(self, placeId: str, category: str) -> bool:
-        await self.category_service.get_single_category(name=category)
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(PlaceDAO.get_place, placeId=placeId)
-            if item:
-                result = await session.execute_write(
-                    PlaceDAO.add_place_category, placeId=placeId, category=category
-                )
-                return result
-            else:
-                raise NotFound(f"Place with id {placeId} was not found.")
-
-    async def detach_category_from_place(self, placeId: str, category: str) -> bool:
-        await self.category_service.get_single_category(name=category)
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(PlaceDAO.get_place, placeId=placeId)
-            if item:
-                result = await session.execute_write(
-                    PlaceDAO.remove_place_category, placeId=placeId, category=category
-                )
-                return result
-            else:
-                raise NotFound(f"Place with id {placeId} was not found.")
+        if await self.uow.write(PlaceDAO.remove, placeId=placeId):
+            await self.uow.commit()
+            if self.rating_buffer is not None:
+                self.rating_buffer.places.discard(placeId)
+            return True
+        else:
+            raise NotFound(f"Place with id {placeId} was not found.")
+
+    async def attach_feature_to_place(
+        self, placeId: str, feature: str
+    ) -> SinglePlaceExtended:
+        outcome = await self.uow.write(
+            PlaceDAO.add_place_feature, placeId=placeId, feature=feature
+        )
+        if not outcome["feature"]:
+            raise NotFound(f"Feature {feature} not found")
+        if outcome["place"] is None:
+            raise NotFound(f"Place with id {placeId} was not found.")
+        await self.uow.commit()
+        with stage("model"):
+            return SinglePlaceExtended(**outcome["place"])
+
+    async def detach_feature_from_place(
+        self, placeId: str, feature: str
+    ) -> SinglePlaceExtended:
+        outcome = await self.uow.write(
+            PlaceDAO.remove_place_feature, placeId=placeId, feature=feature
+        )
+        if not outcome["feature"]:
+            raise NotFound(f"Feature {feature} not found")
+        if outcome["place"] is None:
+            raise NotFound(f"Place with id {placeId} was not found.")
+        await self.uow.commit()
+        with stage("model"):
+            return SinglePlaceExtended(**outcome["place"])
+
+    async def attach_category_to_place(
+        self, placeId: str, category: str
+    ) -> SinglePlaceExtended:
+        outcome = await self.uow.write(
+            PlaceDAO.add_place_category, placeId=placeId, category=category
+        )
+        if not outcome["category"]:
+            raise NotFound(f"Category {category} not found")
+        if outcome["place"] is None:
+            raise NotFound(f"Place with id {placeId} was not found.")
+        await self.uow.commit()
+        with stage("model"):
+            return SinglePlaceExtended(**outcome["place"])
+
+    async def detach_category_from_place(
+        self, placeId: str, category: str
+    ) -> SinglePlaceExtended:
+        outcome = await self.uow.write(
+            PlaceDAO.remove_place_category, placeId=placeId, category=category
+        )
+        if not outcome["category"]:
+            raise NotFound(f"Category {category} not found")
+        if outcome["place"] is None:
+            raise NotFound(f"Place with id {placeId} was not found.")
+        await self.uow.commit()
+        with stage("model"):
+            return SinglePlaceExtended(**outcome["place"])
+
+    async def create_places(self, items: list[Any]) -> BulkResult:
+        places, rejected = validate_items(SinglePlace, items)
+        ids = {index: place.placeId for index, place in places}
+        places, duplicates = first_occurrences(
+            places, lambda place: place.placeId, "duplicate"
+        )
+        places, conflicts = first_occurrences(
+            places, lambda place: place.yelpId, "conflict"
+        )
+        results = await write_in_chunks(
+            self.uow,
+            PlaceDAO.add_many,
+            [
+                {"index": index, "placeId": place.placeId, "data": place.model_dump()}
+                for index, place in places
+            ],
+        )
+        return bulk_result(len(items), ids, rejected + duplicates + conflicts + results)
+
+    async def attach_categories_to_places(self, items: list[Any]) -> BulkResult:
+        links, rejected = validate_items(PlaceCategoryLink, items)
+        ids = {index: f"{link.placeId}/{link.category}" for index, link in links}
+        links, duplicates = first_occurrences(
+            links, lambda link: (link.placeId, link.category), "duplicate"
+        )
+        results = await write_in_chunks(
+            self.uow,
+            PlaceDAO.add_place_categories,
+            [
+                {"index": index, "placeId": link.placeId, "category": link.category}
+                for index, link in links
+            ],
+        )
+        return bulk_result(len(items), ids, rejected + duplicates + results)
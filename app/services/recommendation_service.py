@@ -1,7 +1,6 @@
-from neo4j import AsyncDriver
-
 from app.config.exceptions import InvalidValue
-from app.config.settings import settings
+from app.config.unit_of_work import UnitOfWork
+from app.config.timing import stage
 from app.dao.recommendation_dao import RecommendationDAO
 from app.dto.place import SinglePlaceRecommended
 from app.services.category_service import CategoryService
@@ -11,11 +10,11 @@ from app.services.user_service import UserService
 class RecommendationService:
     def __init__(
         self,
-        driver: AsyncDriver,
+        uow: UnitOfWork,
         category_service: CategoryService,
         user_service: UserService,
     ):
-        self.driver = driver
+        self.uow = uow
         self.category_service = category_service
         self.user_service = user_service
 
@@ -41,17 +40,17 @@ class RecommendationService:
             )
 
         # Query execution
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            items = await session.execute_read(
-                RecommendationDAO.recommend_places_near_by_affinity,
-                user_id=user_id,
-                base_category=base_category,
-                latitude=latitude,
-                longitude=longitude,
-                max_distance_meters=max_distance_meters,
-                skip=skip,
-                limit=limit,
-            )
-
-            # Data transformation
-            return [SinglePlaceRecommended(**item) for item in items]
+        items = await self.uow.read(
+            RecommendationDAO.recommend_places_near_by_affinity,
+            user_id=user_id,
+            base_category=base_category,
+            latitude=latitude,
+            longitude=longitude,
+            max_distance_meters=max_distance_meters,
+            skip=skip,
+            limit=limit,
+        )
+
+        # Data transformation
+        with stage("model"):
+            return [SinglePlaceRecommended.from_record(item) for item in items]
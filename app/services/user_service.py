@@ -1,12 +1,22 @@
 import datetime
-from typing import Literal
+from typing import Any, AsyncIterator, Literal
 
-from neo4j import AsyncDriver
+from neo4j.exceptions import ConstraintError
 
-from app.config.settings import settings
+from app.config.pagination import decode_cursor
+from app.config.unit_of_work import UnitOfWork
+from app.config.write_behind import RatingBuffer
+from app.config.timing import stage
 from app.dao.user_dao import UserDAO
+from app.dto.bulk import BulkItemResult, BulkResult, SingleRating
 from app.dto.user import SingleUser, SingleUserExtended
 from app.config.exceptions import NotFound, AlreadyExists
+from app.services.bulk import (
+    bulk_result,
+    first_occurrences,
+    validate_items,
+    write_in_chunks,
+)
 from app.services.feature_service import FeatureService
 from app.services.place_service import PlaceService
 
@@ -14,97 +24,201 @@ from app.services.place_service import PlaceService
 class UserService:
     def __init__(
         self,
-        driver: AsyncDriver,
+        uow: UnitOfWork,
         feature_service: FeatureService,
         place_service: PlaceService,
+        rating_buffer: RatingBuffer | None = None,
     ):
-        self.driver = driver
+        self.uow = uow
         self.feature_service = feature_service
         self.place_service = place_service
+        self.rating_buffer = rating_buffer
 
     async def get_all_users(
-        self, sort: str = "user_id", order: str = "DESC", skip: int = 0, limit: int = 25
+        self,
+        sort: str = "userId",
+        order: str = "DESC",
+        skip: int = 0,
+        limit: int = 25,
+        after: str | None = None,
     ) -> list[SingleUser]:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            elements = await session.execute_read(
-                UserDAO.get_users, sort=sort, order=order, limit=limit, skip=skip
-            )
+        elements = await self.uow.read(
+            UserDAO.get_users,
+            sort=sort,
+            order=order,
+            limit=limit,
+            skip=skip,
+            after=decode_cursor(after, SingleUser, sort, "userId"),
+        )
+        with stage("model"):
             return [SingleUser(**item) for item in elements]
 
+    async def stream_all_users(
+        self,
+        sort: str = "userId",
+        order: str = "DESC",
+        skip: int = 0,
+        limit: int = 25,
+        after: str | None = None,
+    ) -> AsyncIterator[SingleUser]:
+        elements = self.uow.stream(
+            UserDAO.stream_users,
+            sort=sort,
+            order=order,
+            limit=limit,
+            skip=skip,
+            after=decode_cursor(after, SingleUser, sort, "userId"),
+        )
+        async for item in elements:
+            yield SingleUser(**item)
+
     async def get_user_by_id(self, user_id: str) -> SingleUserExtended:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(
-                UserDAO.get_user_extended, user_id=user_id
-            )
-            if item is not None:
+        item = await self.uow.read(UserDAO.get_user_extended, user_id=user_id)
+        if item is not None:
+            with stage("model"):
                 return SingleUserExtended(**item)
-            else:
-                raise NotFound(f"User with user_id {user_id} was not found.")
+        else:
+            raise NotFound(f"User with user_id {user_id} was not found.")
 
     async def create_user(
         self, user_id: str, born: datetime.date, gender: Literal["m", "f"] | None
     ) -> SingleUser:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(UserDAO.get_user, user_id=user_id)
-            if item is None:
-                item = await session.execute_write(
-                    UserDAO.add, user_id=user_id, born=str(born), gender=gender
-                )
-                return SingleUser(**item)
-            else:
-                raise AlreadyExists(f"User with user_id {user_id} already exists.")
+        try:
+            item = await self.uow.write(
+                UserDAO.add, user_id=user_id, born=str(born), gender=gender
+            )
+            await self.uow.commit()
+        except ConstraintError:
+            raise AlreadyExists(f"User with user_id {user_id} already exists.")
+        return SingleUser(**item)
 
     async def update_user(
         self, user_id: str, born: datetime.date, gender: Literal["m", "f"] | None
     ) -> SingleUser:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(UserDAO.get_user, user_id=user_id)
-            if item is not None:
-                item = await session.execute_write(
-                    UserDAO.modify, user_id=user_id, born=str(born), gender=gender
-                )
-                return SingleUser(**item)
-            else:
-                raise NotFound(f"User with user_id {user_id} was not found.")
+        item = await self.uow.write(
+            UserDAO.modify, user_id=user_id, born=str(born), gender=gender
+        )
+        if item is not None:
+            await self.uow.commit()
+            return SingleUser(**item)
+        else:
+            raise NotFound(f"User with user_id {user_id} was not found.")
 
     async def delete_user(self, user_id: str) -> bool:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(UserDAO.get_user, user_id=user_id)
-            if item is not None:
-                return await session.execute_write(UserDAO.remove, user_id=user_id)
-            else:
-                raise NotFound(f"User with user_id {user_id} was not found.")
+        if await self.uow.write(UserDAO.remove, user_id=user_id):
+            await self.uow.commit()
+            if self.rating_buffer is not None:
+                self.rating_buffer.users.discard(user_id)
+            return True
+        else:
+            raise NotFound(f"User with user_id {user_id} was not found.")
 
     async def attach_requested_feature_to_user(
         self, user_id: str, feature: str
-    ) -> bool:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(UserDAO.get_user, user_id=user_id)
-            if item is None:
-                raise NotFound(f"User with user_id {user_id} was not found.")
-            feature = await self.feature_service.get_single_feature(name=feature)
-            await session.execute_write(
-                UserDAO.add_feature, user_id=user_id, feature=feature.name
-            )
-            return True
+    ) -> SingleUserExtended:
+        outcome = await self.uow.write(
+            UserDAO.add_feature, user_id=user_id, feature=feature
+        )
+        if outcome["user"] is None:
+            raise NotFound(f"User with user_id {user_id} was not found.")
+        if not outcome["feature"]:
+            raise NotFound(f"Feature {feature} not found")
+        await self.uow.commit()
+        with stage("model"):
+            return SingleUserExtended(**outcome["user"])
 
     async def detach_requested_feature_to_user(
         self, user_id: str, feature: str
-    ) -> bool:
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            item = await session.execute_read(UserDAO.get_user, user_id=user_id)
-            if item is None:
-                raise NotFound(f"User with user_id {user_id} was not found.")
-            feature = await self.feature_service.get_single_feature(name=feature)
-            await session.execute_write(
-                UserDAO.remove_feature, user_id=user_id, feature=feature.name
-            )
-            return True
+    ) -> SingleUserExtended:
+        outcome = await self.uow.write(
+            UserDAO.remove_feature, user_id=user_id, feature=feature
+        )
+        if outcome["user"] is None:
+            raise NotFound(f"User with user_id {user_id} was not found.")
+        if not outcome["feature"]:
+            raise NotFound(f"Feature {feature} not found")
+        await self.uow.commit()
+        with stage("model"):
+            return SingleUserExtended(**outcome["user"])
+
+    async def check_user_exists(self, user_id: str) -> None:
+        # Users known to the rating buffer are not read again
+        if self.rating_buffer is not None and user_id in self.rating_buffer.users:
+            return
+        if await self.uow.read(UserDAO.get_user, user_id=user_id) is None:
+            raise NotFound(f"User with user_id {user_id} was not found.")
+        if self.rating_buffer is not None:
+            self.rating_buffer.users.add(user_id)
 
     async def rate_place(self, user_id: str, place_id: str, rating: float) -> bool:
-        await self.get_user_by_id(user_id=user_id)
-        await self.place_service.get_place(placeId=place_id)
-        async with self.driver.session(database=settings.NEO4J_DATABASE) as session:
-            return await session.execute_write(
-                UserDAO.add_rating, user_id=user_id, rating=rating, place_id=place_id
+        if self.rating_buffer is not None:
+            await self.check_user_exists(user_id)
+            await self.place_service.check_place_exists(place_id)
+            await self.rating_buffer.put(
+                user_id=user_id, place_id=place_id, rating=rating
             )
+            return True
+
+        outcome = await self.uow.write(
+            UserDAO.add_rating, user_id=user_id, rating=rating, place_id=place_id
+        )
+        if not outcome["user"]:
+            raise NotFound(f"User with user_id {user_id} was not found.")
+        if not outcome["place"]:
+            raise NotFound(f"Place with id {place_id} was not found.")
+        await self.uow.commit()
+        return True
+
+    async def create_users(self, items: list[Any]) -> BulkResult:
+        users, rejected = validate_items(SingleUser, items)
+        ids = {index: user.userId for index, user in users}
+        valid = list()
+        for index, user in users:
+            try:
+                if user.born is not None:
+                    datetime.date.fromisoformat(user.born)
+                valid.append((index, user))
+            except ValueError:
+                rejected.append(
+                    BulkItemResult(
+                        index=index, status="invalid", detail="born: not a date"
+                    )
+                )
+        users, duplicates = first_occurrences(
+            valid, lambda user: user.userId, "duplicate"
+        )
+        results = await write_in_chunks(
+            self.uow,
+            UserDAO.add_many,
+            [
+                {
+                    "index": index,
+                    "userId": user.userId,
+                    "born": user.born,
+                    "gender": user.gender,
+                }
+                for index, user in users
+            ],
+        )
+        return bulk_result(len(items), ids, rejected + duplicates + results)
+
+    async def rate_places(self, items: list[Any]) -> BulkResult:
+        ratings, rejected = validate_items(SingleRating, items)
+        ids = {index: f"{rating.userId}/{rating.placeId}" for index, rating in ratings}
+        ratings, duplicates = first_occurrences(
+            ratings, lambda rating: (rating.userId, rating.placeId), "duplicate"
+        )
+        results = await write_in_chunks(
+            self.uow,
+            UserDAO.add_ratings,
+            [
+                {
+                    "index": index,
+                    "userId": rating.userId,
+                    "placeId": rating.placeId,
+                    "rating": rating.rating,
+                }
+                for index, rating in ratings
+            ],
+        )
+        return bulk_result(len(items), ids, rejected + duplicates + results)
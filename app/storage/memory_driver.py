@@ -0,0 +1,135 @@
+import inspect
+from typing import Any, AsyncIterator, Callable
+
+from app.storage.memory_graph import MemoryGraph
+from app.storage.memory_operations import OPERATIONS
+
+
+class MemoryTransaction(object):
+    """Explicit transaction of a unit of work. Operations change the graph as
+    they run and record the entries they replace in the transaction undo log,
+    replayed in reverse when the transaction is rolled back.
+
+    Transactions are not isolated from each other: where Neo4j would make a
+    second transaction writing the same node wait for the first one, rolling
+    back the first one here also restores the entries the second one changed.
+    """
+
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+        self.undo: list[tuple[dict, str, Any]] = list()
+        self._closed = False
+
+    async def commit(self) -> None:
+        self.undo = list()
+        self._closed = True
+
+    async def rollback(self) -> None:
+        self._closed = True
+        undo, self.undo = self.undo, list()
+        self.graph.rollback(undo)
+
+    async def close(self) -> None:
+        if not self._closed:
+            await self.rollback()
+
+    def closed(self) -> bool:
+        return self._closed
+
+
+class MemorySession(object):
+    def __init__(self, graph: MemoryGraph):
+        self.graph = graph
+
+    async def __aenter__(self) -> "MemorySession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+    def _execute(
+        self,
+        transaction_function: Callable,
+        *args: Any,
+        undo: list[tuple[dict, str, Any]] | None = None,
+        **kwargs: Any,
+    ):
+        operation = OPERATIONS.get(inspect.unwrap(transaction_function))
+        if operation is None:
+            raise NotImplementedError(
+                f"{transaction_function.__qualname__} has no in-memory implementation"
+            )
+        # Operations never await, so each one runs atomically in the event loop
+        # and only its own changes are recorded in the undo log
+        self.graph.undo = undo
+        try:
+            return operation(self.graph, *args, **kwargs)
+        finally:
+            self.graph.undo = None
+
+    async def execute_read(
+        self, transaction_function: Callable, *args: Any, **kwargs: Any
+    ) -> Any:
+        return self._execute(transaction_function, *args, **kwargs)
+
+    async def execute_write(
+        self, transaction_function: Callable, *args: Any, **kwargs: Any
+    ) -> Any:
+        # Managed transactions commit on success and roll back on failure
+        undo = list()
+        try:
+            return self._execute(transaction_function, *args, undo=undo, **kwargs)
+        except Exception:
+            self.graph.rollback(undo)
+            raise
+
+    async def execute_in(
+        self,
+        tx: "MemoryTransaction",
+        access_mode: str,
+        transaction_function: Callable,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        undo = tx.undo if access_mode == "write" else None
+        return self._execute(transaction_function, *args, undo=undo, **kwargs)
+
+    async def stream_in(
+        self,
+        tx: "MemoryTransaction",
+        access_mode: str,
+        transaction_function: Callable,
+        *args: Any,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        for record in self._execute(transaction_function, *args, **kwargs):
+            yield record
+
+    async def begin_transaction(self, **config: Any) -> "MemoryTransaction":
+        return MemoryTransaction(self.graph)
+
+    async def run(self, query: str, *args: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError("The in-memory backend does not run Cypher queries")
+
+    async def close(self) -> None:
+        return None
+
+
+class MemoryDriver(object):
+    """Stand-in for the Neo4j AsyncDriver keeping the graph in process memory.
+
+    Sessions dispatch every DAO transaction function to the operation registered
+    for it in ``memory_operations``, so services run unchanged on top of it.
+    """
+
+    def __init__(self, graph: MemoryGraph | None = None):
+        self.graph = graph if graph is not None else MemoryGraph()
+
+    def session(self, **config: Any) -> MemorySession:
+        return MemorySession(self.graph)
+
+    async def verify_connectivity(self) -> None:
+        return None
+
+    async def close(self) -> None:
+        return None
@@ -0,0 +1,243 @@
+import copy
+import math
+from collections import Counter
+from typing import Any, Iterator
+
+from neo4j.spatial import WGS84Point
+
+# Same sphere Neo4j uses for point.distance() on WGS-84 points
+EARTH_RADIUS_METERS = 6378140.0
+
+# ~1.1 km of latitude per cell
+GRID_CELL_DEGREES = 0.01
+
+
+def distance_meters(a: WGS84Point, b: WGS84Point) -> float:
+    lat1, lat2 = math.radians(a.y), math.radians(b.y)
+    d_lat = lat2 - lat1
+    d_lon = math.radians(b.x - a.x)
+    h = (
+        math.sin(d_lat / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin(d_lon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(h)))
+
+
+def bigrams(text: str) -> Counter:
+    pairs = Counter()
+    for word in text.upper().split():
+        for i in range(len(word) - 1):
+            pairs[word[i : i + 2]] = pairs[word[i : i + 2]] + 1
+    return pairs
+
+
+def sorensen_dice_similarity(text1: str, text2: str) -> float:
+    # Word bigram coefficient, as computed by apoc.text.sorensenDiceSimilarity
+    if text1.upper() == text2.upper():
+        return 1.0
+    pairs1, pairs2 = bigrams(text1), bigrams(text2)
+    total = sum(pairs1.values()) + sum(pairs2.values())
+    if total == 0:
+        return 0.0
+    return 2 * sum((pairs1 & pairs2).values()) / total
+
+
+class SpatialGrid(object):
+    """Fixed size latitude/longitude grid of place ids, used to resolve distance
+    predicates without scanning every place."""
+
+    def __init__(self, cell_degrees: float = GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells: dict[tuple[int, int], set[str]] = dict()
+        self.size = 0
+
+    def cell(self, point: WGS84Point) -> tuple[int, int]:
+        return (
+            math.floor(point.y / self.cell_degrees),
+            math.floor(point.x / self.cell_degrees),
+        )
+
+    def add(self, key: str, point: WGS84Point) -> None:
+        self.cells.setdefault(self.cell(point), set()).add(key)
+        self.size = self.size + 1
+
+    def remove(self, key: str, point: WGS84Point) -> None:
+        cell = self.cell(point)
+        keys = self.cells.get(cell)
+        if keys is not None and key in keys:
+            keys.discard(key)
+            self.size = self.size - 1
+            if len(keys) == 0:
+                del self.cells[cell]
+
+    def candidates(self, center: WGS84Point, radius_meters: float) -> Iterator[str]:
+        lat_delta = math.degrees(radius_meters / EARTH_RADIUS_METERS)
+        cos_lat = math.cos(math.radians(center.y))
+        lon_delta = lat_delta / cos_lat if cos_lat > 1e-6 else 360.0
+        south = math.floor((center.y - lat_delta) / self.cell_degrees)
+        north = math.floor((center.y + lat_delta) / self.cell_degrees)
+        west = math.floor((center.x - lon_delta) / self.cell_degrees)
+        east = math.floor((center.x + lon_delta) / self.cell_degrees)
+        wraps = center.x - lon_delta < -180 or center.x + lon_delta > 180
+
+        # Large radii cover more cells than there are occupied ones
+        if wraps or (north - south + 1) * (east - west + 1) > len(self.cells):
+            for (row, column), keys in self.cells.items():
+                if south <= row <= north and (wraps or west <= column <= east):
+                    yield from keys
+            return
+
+        for row in range(south, north + 1):
+            for column in range(west, east + 1):
+                yield from self.cells.get((row, column), ())
+
+
+MISSING = object()
+
+
+class MemoryGraph(object):
+    """Pure Python property graph with the node keys, unique constraints and
+    relationships of the Neo4j data model. Nodes are property dicts indexed by
+    their key, relationships are adjacency sets kept in both directions.
+
+    While ``undo`` is a list, every change appends the previous value of the
+    entry it replaces, so ``rollback`` can restore them in reverse order. The
+    yelpId and spatial indexes are rebuilt from the restored places.
+    """
+
+    def __init__(self):
+        self.places: dict[str, dict[str, Any]] = dict()
+        self.places_by_yelp_id: dict[str, str] = dict()
+        self.users: dict[str, dict[str, Any]] = dict()
+        self.categories: dict[str, dict[str, Any]] = dict()
+        self.features: dict[str, dict[str, Any]] = dict()
+
+        self.place_features: dict[str, set[str]] = dict()
+        self.feature_places: dict[str, set[str]] = dict()
+        self.place_categories: dict[str, set[str]] = dict()
+        self.category_places: dict[str, set[str]] = dict()
+        self.user_features: dict[str, set[str]] = dict()
+        self.feature_users: dict[str, set[str]] = dict()
+        self.ratings: dict[str, dict[str, float]] = dict()
+        self.place_raters: dict[str, set[str]] = dict()
+
+        self.grid = SpatialGrid()
+        self.undo: list[tuple[dict, str, Any]] | None = None
+
+    def remember(self, entries: dict[str, Any], key: str) -> None:
+        if self.undo is None:
+            return
+        value = entries.get(key, MISSING)
+        if value is not MISSING:
+            # Node properties and adjacency sets are flat, a shallow copy is enough
+            value = copy.copy(value)
+        self.undo.append((entries, key, value))
+
+    def rollback(self, undo: list[tuple[dict, str, Any]]) -> None:
+        for entries, key, value in reversed(undo):
+            if entries is self.places:
+                self.index_place(key, add=False)
+            if value is MISSING:
+                entries.pop(key, None)
+            else:
+                entries[key] = value
+            if entries is self.places:
+                self.index_place(key, add=True)
+
+    def index_place(self, placeId: str, add: bool) -> None:
+        place = self.places.get(placeId)
+        if place is None:
+            return
+        if place.get("coordinates") is not None:
+            if add:
+                self.grid.add(placeId, place["coordinates"])
+            else:
+                self.grid.remove(placeId, place["coordinates"])
+        yelpId = place.get("yelpId")
+        if yelpId is not None:
+            if add:
+                self.places_by_yelp_id[yelpId] = placeId
+            elif self.places_by_yelp_id.get(yelpId) == placeId:
+                del self.places_by_yelp_id[yelpId]
+
+    def link(
+        self,
+        forward: dict[str, set[str]],
+        backward: dict[str, set[str]],
+        a: str,
+        b: str,
+    ) -> None:
+        self.remember(forward, a)
+        self.remember(backward, b)
+        forward.setdefault(a, set()).add(b)
+        backward.setdefault(b, set()).add(a)
+
+    def unlink(
+        self,
+        forward: dict[str, set[str]],
+        backward: dict[str, set[str]],
+        a: str,
+        b: str,
+    ) -> bool:
+        if b not in forward.get(a, ()):
+            return False
+        self.remember(forward, a)
+        self.remember(backward, b)
+        forward[a].discard(b)
+        backward[b].discard(a)
+        return True
+
+    def rename(
+        self,
+        forward: dict[str, set[str]],
+        backward: dict[str, set[str]],
+        old: str,
+        new: str,
+    ) -> None:
+        # Re-keys a node on the backward side of a relationship
+        self.remember(backward, old)
+        self.remember(backward, new)
+        for key in backward.pop(old, set()):
+            self.remember(forward, key)
+            forward[key].discard(old)
+            forward[key].add(new)
+            backward.setdefault(new, set()).add(key)
+
+    def detach(
+        self, forward: dict[str, set[str]], backward: dict[str, set[str]], key: str
+    ) -> None:
+        self.remember(forward, key)
+        for other in forward.pop(key, set()):
+            self.remember(backward, other)
+            backward[other].discard(key)
+
+    def set_place_properties(self, placeId: str, data: dict[str, Any]) -> None:
+        self.remember(self.places, placeId)
+        self.index_place(placeId, add=False)
+        place = self.places[placeId]
+        for key, value in data.items():
+            # Setting a property to null removes it
+            if value is None:
+                place.pop(key, None)
+            else:
+                place[key] = value
+        self.index_place(placeId, add=True)
+
+    def remove_place(self, placeId: str) -> None:
+        self.remember(self.places, placeId)
+        self.index_place(placeId, add=False)
+        del self.places[placeId]
+        self.detach(self.place_features, self.feature_places, placeId)
+        self.detach(self.place_categories, self.category_places, placeId)
+        self.remember(self.place_raters, placeId)
+        for user_id in self.place_raters.pop(placeId, set()):
+            self.remember(self.ratings, user_id)
+            self.ratings[user_id].pop(placeId, None)
+
+    def places_near(
+        self, center: WGS84Point, max_distance_meters: float
+    ) -> Iterator[tuple[str, float]]:
+        for placeId in self.grid.candidates(center, max_distance_meters):
+            distance = distance_meters(self.places[placeId]["coordinates"], center)
+            if distance < max_distance_meters:
+                yield placeId, distance
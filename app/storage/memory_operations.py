@@ -0,0 +1,640 @@
+import heapq
+import inspect
+import uuid
+from typing import Any, Callable, Iterable
+
+from neo4j.exceptions import ConstraintError
+from neo4j.spatial import WGS84Point
+from neo4j.time import Date
+
+from app.config.neo4j import validate_order, validate_field
+from app.dao.category_dao import CategoryDAO
+from app.dao.feature_dao import FeatureDAO
+from app.dao.place_dao import PlaceDAO
+from app.dao.recommendation_dao import RecommendationDAO
+from app.dao.user_dao import UserDAO
+from app.dto.place import SinglePlace
+from app.dto.user import SingleUser
+from app.storage.memory_graph import MemoryGraph, sorensen_dice_similarity
+
+OPERATIONS: dict[Callable, Callable] = dict()
+
+
+def implements(*dao_functions: Callable) -> Callable:
+    """Registers the decorated function as the in-memory version of DAO
+    transaction functions. It receives the graph instead of the transaction and
+    the same arguments otherwise."""
+
+    def register(operation: Callable) -> Callable:
+        for dao_function in dao_functions:
+            OPERATIONS[inspect.unwrap(dao_function)] = operation
+        return operation
+
+    return register
+
+
+def page_nodes(
+    nodes: Iterable[dict[str, Any]],
+    sort: str,
+    order: str,
+    skip: int,
+    limit: int,
+    key: str,
+    after: tuple[Any, Any] | None = None,
+) -> list[dict[str, Any]]:
+    # Nulls sort last in ascending order and first in descending order, as in Cypher
+    def position(node: dict[str, Any]) -> tuple[bool, Any, Any]:
+        value = node.get(sort)
+        return value is None, value if value is not None else 0, node[key]
+
+    descending = order.upper() == "DESC"
+    if after is not None:
+        skip = 0
+        value = after[1] if sort == key else after[0]
+        last = (value is None, value if value is not None else 0, after[1])
+        nodes = [
+            node
+            for node in nodes
+            if (position(node) < last if descending else position(node) > last)
+        ]
+    select = heapq.nlargest if descending else heapq.nsmallest
+    return select(skip + limit, nodes, key=position)[skip:]
+
+
+def page(*args: Any, **kwargs: Any) -> list[dict[str, Any]]:
+    return [dict(node) for node in page_nodes(*args, **kwargs)]
+
+
+def copy(node: dict[str, Any] | None) -> dict[str, Any] | None:
+    return dict(node) if node is not None else None
+
+
+def project_place(node: dict[str, Any]) -> dict[str, Any]:
+    # Same record as place_projection
+    coordinates = node.get("coordinates")
+    confidence = node.get("confidence")
+    return {
+        "placeId": node["placeId"],
+        "name": node.get("name"),
+        "latitude": coordinates.y if coordinates else node.get("latitude"),
+        "longitude": coordinates.x if coordinates else node.get("longitude"),
+        "locality": node.get("locality"),
+        "country": node.get("country"),
+        "region": node.get("region"),
+        "postcode": node.get("postcode"),
+        "freeform": node.get("freeform"),
+        "confidence": float(confidence) if confidence is not None else None,
+        "yelpId": node.get("yelpId"),
+    }
+
+
+# Categories
+
+
+@implements(CategoryDAO.get_category)
+def get_category(graph: MemoryGraph, name: str):
+    return copy(graph.categories.get(name))
+
+
+@implements(CategoryDAO.get_names)
+def get_category_names(graph: MemoryGraph):
+    return list(graph.categories)
+
+
+@implements(CategoryDAO.add)
+def add_category(graph: MemoryGraph, name: str):
+    if name in graph.categories:
+        raise ConstraintError(f"Category with name {name} already exists")
+    graph.remember(graph.categories, name)
+    graph.categories[name] = {"name": name}
+    return copy(graph.categories[name])
+
+
+@implements(CategoryDAO.update)
+def update_category(graph: MemoryGraph, name: str, new_name: str):
+    if name not in graph.categories:
+        return None
+    if new_name != name and new_name in graph.categories:
+        raise ConstraintError(f"Category with name {new_name} already exists")
+
+    graph.remember(graph.categories, name)
+    graph.remember(graph.categories, new_name)
+    category = graph.categories.pop(name)
+    category["name"] = new_name
+    graph.categories[new_name] = category
+    graph.rename(graph.place_categories, graph.category_places, name, new_name)
+    return copy(category)
+
+
+@implements(CategoryDAO.remove)
+def remove_category(graph: MemoryGraph, name: str):
+    graph.remember(graph.categories, name)
+    if graph.categories.pop(name, None) is None:
+        return False
+    graph.detach(graph.category_places, graph.place_categories, name)
+    return True
+
+
+# Features
+
+
+@implements(FeatureDAO.get_feature)
+def get_feature(graph: MemoryGraph, name: str):
+    return copy(graph.features.get(name))
+
+
+@implements(FeatureDAO.get_names)
+def get_feature_names(graph: MemoryGraph):
+    return list(graph.features)
+
+
+@implements(FeatureDAO.add)
+def add_feature(graph: MemoryGraph, name: str):
+    if name in graph.features:
+        raise ConstraintError(f"Feature with name {name} already exists")
+    graph.remember(graph.features, name)
+    graph.features[name] = {"name": name}
+    return copy(graph.features[name])
+
+
+@implements(FeatureDAO.update)
+def update_feature(graph: MemoryGraph, name: str, new_name: str):
+    if name not in graph.features:
+        return None
+    if new_name != name and new_name in graph.features:
+        raise ConstraintError(f"Feature with name {new_name} already exists")
+
+    graph.remember(graph.features, name)
+    graph.remember(graph.features, new_name)
+    feature = graph.features.pop(name)
+    feature["name"] = new_name
+    graph.features[new_name] = feature
+    graph.rename(graph.place_features, graph.feature_places, name, new_name)
+    graph.rename(graph.user_features, graph.feature_users, name, new_name)
+    return copy(feature)
+
+
+@implements(FeatureDAO.remove)
+def remove_feature(graph: MemoryGraph, name: str):
+    graph.remember(graph.features, name)
+    if graph.features.pop(name, None) is None:
+        return False
+    graph.detach(graph.feature_places, graph.place_features, name)
+    graph.detach(graph.feature_users, graph.user_features, name)
+    return True
+
+
+# Places
+
+
+@implements(PlaceDAO.get_place)
+def get_place(graph: MemoryGraph, placeId: str):
+    return copy(graph.places.get(placeId))
+
+
+@implements(PlaceDAO.get_place_version)
+def get_place_version(graph: MemoryGraph, placeId: str):
+    if placeId not in graph.places:
+        return None
+    return {"version": graph.places[placeId].get("version")}
+
+
+@implements(PlaceDAO.get_place_by_yelp_id)
+def get_place_by_yelp_id(graph: MemoryGraph, yelpId: str):
+    placeId = graph.places_by_yelp_id.get(yelpId)
+    return copy(graph.places.get(placeId)) if placeId is not None else None
+
+
+@implements(PlaceDAO.get_place_by_name_and_position)
+def get_place_by_name_and_position(
+    graph: MemoryGraph,
+    name: str,
+    latitude: float,
+    longitude: float,
+    max_distance_meters: int,
+):
+    best = None
+    for placeId, distance in graph.places_near(
+        WGS84Point((longitude, latitude)), max_distance_meters
+    ):
+        candidate = graph.places[placeId]
+        if candidate.get("name") is None:
+            continue
+        score = sorensen_dice_similarity(candidate["name"], name)
+        if score > 0.5 and (best is None or (distance, -score) < best[:2]):
+            best = (distance, -score, candidate)
+
+    if best is None:
+        return None
+    distance, score, candidate = best
+    return {**candidate, "distance": distance, "score": -score}
+
+
+@implements(PlaceDAO.get_place_extended)
+def get_place_extended(graph: MemoryGraph, placeId: str):
+    place = graph.places.get(placeId)
+    if place is None:
+        return None
+    return {
+        **place,
+        "features": [
+            copy(graph.features[name])
+            for name in sorted(graph.place_features.get(placeId, ()))
+        ],
+        "categories": [
+            copy(graph.categories[name])
+            for name in sorted(graph.place_categories.get(placeId, ()))
+        ],
+    }
+
+
+@implements(PlaceDAO.get_places)
+def get_places(graph: MemoryGraph, *args: Any, **kwargs: Any):
+    return list(stream_places(graph, *args, **kwargs))
+
+
+@implements(PlaceDAO.stream_places)
+def stream_places(
+    graph: MemoryGraph, sort="placeId", order="DESC", skip=0, limit=25, after=None
+):
+    if not validate_order(order):
+        order = "DESC"
+    if not validate_field(SinglePlace, sort) or sort in ("latitude", "longitude"):
+        sort = "placeId"
+    nodes = page_nodes(
+        graph.places.values(), sort, order, skip, limit, "placeId", after
+    )
+    # Projected as they are read, so streams only hold the references of the page
+    for node in nodes:
+        yield project_place(node)
+
+
+@implements(PlaceDAO.export_places)
+def export_places(
+    graph: MemoryGraph, country: str | None = None, region: str | None = None
+):
+    # Snapshot of the references, places may be written while the export streams
+    for place in list(graph.places.values()):
+        if country and place.get("country") != country:
+            continue
+        if region and place.get("region") != region:
+            continue
+        yield dict(place)
+
+
+def check_place_constraints(
+    graph: MemoryGraph, placeId: str, data: dict[str, Any]
+) -> None:
+    yelpId = data.get("yelpId")
+    if yelpId is not None and graph.places_by_yelp_id.get(yelpId, placeId) != placeId:
+        raise ConstraintError(f"Place with yelpId {yelpId} already exists")
+    if data.get("placeId", placeId) != placeId and data["placeId"] in graph.places:
+        raise ConstraintError(f"Place with placeId {data['placeId']} already exists")
+
+
+@implements(PlaceDAO.export_catalog)
+def export_catalog(
+    graph: MemoryGraph,
+    columns: list[str],
+    country: str | None = None,
+    region: str | None = None,
+):
+    for place in export_places(graph, country=country, region=region):
+        placeId = place["placeId"]
+        ratings = [
+            graph.ratings[userId][placeId]
+            for userId in graph.place_raters.get(placeId, ())
+        ]
+        row = {
+            **project_place(place),
+            "categories": sorted(graph.place_categories.get(placeId, ())),
+            "features": sorted(graph.place_features.get(placeId, ())),
+            "ratingCount": len(ratings),
+            "avgRating": sum(ratings) / len(ratings) if ratings else None,
+        }
+        yield {column: row.get(column) for column in columns}
+
+
+@implements(PlaceDAO.add)
+def add_place(graph: MemoryGraph, placeId: str, data: dict[str, Any]):
+    if placeId in graph.places:
+        raise ConstraintError(f"Place with placeId {placeId} already exists")
+    check_place_constraints(graph, placeId, data)
+
+    graph.remember(graph.places, placeId)
+    graph.places[placeId] = {"placeId": placeId}
+    graph.set_place_properties(placeId, {**data, "version": str(uuid.uuid4())})
+    return copy(graph.places[placeId])
+
+
+@implements(PlaceDAO.add_many)
+def add_places(graph: MemoryGraph, rows: list[dict[str, Any]]):
+    results = list()
+    for row in rows:
+        yelpId = row["data"].get("yelpId")
+        if row["placeId"] in graph.places:
+            status = "exists"
+        elif yelpId is not None and yelpId in graph.places_by_yelp_id:
+            status = "conflict"
+        else:
+            add_place(graph, row["placeId"], row["data"])
+            status = "created"
+        results.append({"index": row["index"], "status": status})
+    return results
+
+
+@implements(PlaceDAO.modify)
+def modify_place(graph: MemoryGraph, placeId: str, data: dict[str, Any]):
+    if placeId not in graph.places:
+        return None
+    check_place_constraints(graph, placeId, data)
+
+    graph.set_place_properties(placeId, {**data, "version": str(uuid.uuid4())})
+    return copy(graph.places[placeId])
+
+
+@implements(PlaceDAO.remove)
+def remove_place(graph: MemoryGraph, placeId: str):
+    if placeId not in graph.places:
+        return False
+    graph.remove_place(placeId)
+    return True
+
+
+@implements(PlaceDAO.add_place_feature)
+def add_place_feature(graph: MemoryGraph, placeId: str, feature: str):
+    if placeId in graph.places and feature in graph.features:
+        graph.link(graph.place_features, graph.feature_places, placeId, feature)
+    return {
+        "feature": feature in graph.features,
+        "place": get_place_extended(graph, placeId),
+    }
+
+
+@implements(PlaceDAO.remove_place_feature)
+def remove_place_feature(graph: MemoryGraph, placeId: str, feature: str):
+    removed = graph.unlink(graph.place_features, graph.feature_places, placeId, feature)
+    return {
+        "feature": feature in graph.features,
+        "removed": removed,
+        "place": get_place_extended(graph, placeId),
+    }
+
+
+@implements(PlaceDAO.add_place_category)
+def add_place_category(graph: MemoryGraph, placeId: str, category: str):
+    if placeId in graph.places and category in graph.categories:
+        graph.link(graph.place_categories, graph.category_places, placeId, category)
+    return {
+        "category": category in graph.categories,
+        "place": get_place_extended(graph, placeId),
+    }
+
+
+@implements(PlaceDAO.remove_place_category)
+def remove_place_category(graph: MemoryGraph, placeId: str, category: str):
+    removed = graph.unlink(
+        graph.place_categories, graph.category_places, placeId, category
+    )
+    return {
+        "category": category in graph.categories,
+        "removed": removed,
+        "place": get_place_extended(graph, placeId),
+    }
+
+
+@implements(PlaceDAO.add_place_categories)
+def add_place_categories(graph: MemoryGraph, rows: list[dict[str, Any]]):
+    results = list()
+    for row in rows:
+        if row["placeId"] not in graph.places:
+            status = "place_not_found"
+        elif row["category"] not in graph.categories:
+            status = "category_not_found"
+        else:
+            graph.link(
+                graph.place_categories,
+                graph.category_places,
+                row["placeId"],
+                row["category"],
+            )
+            status = "attached"
+        results.append({"index": row["index"], "status": status})
+    return results
+
+
+# Recommendations
+
+
+@implements(RecommendationDAO.recommend_places_near_by_affinity)
+def recommend_places_near_by_affinity(
+    graph: MemoryGraph,
+    user_id: str,
+    base_category: str,
+    latitude: float,
+    longitude: float,
+    max_distance_meters: int,
+    skip: int,
+    limit: int,
+):
+    # Average rating given by the user to the places of every category
+    totals: dict[str, list[float]] = dict()
+    for placeId, rating in graph.ratings.get(user_id, {}).items():
+        for category in graph.place_categories.get(placeId, ()):
+            total = totals.setdefault(category, [0.0, 0])
+            total[0] = total[0] + rating
+            total[1] = total[1] + 1
+    weights = {category: total[0] / total[1] for category, total in totals.items()}
+    if len(weights) == 0:
+        return []
+
+    in_base_category = graph.category_places.get(base_category, set())
+    candidates = list()
+    for placeId, distance in graph.places_near(
+        WGS84Point((longitude, latitude)), max_distance_meters
+    ):
+        if placeId not in in_base_category:
+            continue
+        matches = sorted(
+            category
+            for category in graph.place_categories[placeId]
+            if category in weights
+        )
+        if len(matches) == 0:
+            continue
+        score = sum(weights[category] for category in matches) - distance / 200
+        candidates.append((score, placeId, distance, matches))
+
+    return [
+        {
+            **project_place(graph.places[placeId]),
+            "matches": [
+                {"name": category, "avgRating": weights[category]}
+                for category in matches
+            ],
+            "distance": distance,
+            "score": score,
+        }
+        for score, placeId, distance, matches in heapq.nlargest(
+            skip + limit, candidates, key=lambda candidate: candidate[0]
+        )[skip:]
+    ]
+
+
+@implements(PlaceDAO.recommend_places_near_by_affinity)
+def recommend_places_near_by_affinity_without_score(graph: MemoryGraph, **kwargs):
+    items = recommend_places_near_by_affinity(graph, **kwargs)
+    for item in items:
+        del item["score"]
+    return items
+
+
+# Users
+
+
+@implements(UserDAO.get_user)
+def get_user(graph: MemoryGraph, user_id: str):
+    return copy(graph.users.get(user_id))
+
+
+@implements(UserDAO.get_user_extended)
+def get_user_extended(graph: MemoryGraph, user_id: str):
+    user = graph.users.get(user_id)
+    if user is None:
+        return None
+    return {
+        **user,
+        "features": [
+            copy(graph.features[name])
+            for name in sorted(graph.user_features.get(user_id, ()))
+        ],
+    }
+
+
+@implements(UserDAO.get_users)
+def get_users(graph: MemoryGraph, *args: Any, **kwargs: Any):
+    return list(stream_users(graph, *args, **kwargs))
+
+
+@implements(UserDAO.stream_users)
+def stream_users(
+    graph: MemoryGraph, sort="userId", order="DESC", skip=0, limit=25, after=None
+):
+    if not validate_order(order):
+        order = "DESC"
+    if not validate_field(SingleUser, sort):
+        sort = "userId"
+    if after is not None and sort == "born" and after[0] is not None:
+        after = (Date.from_iso_format(after[0]), after[1])
+    nodes = page_nodes(graph.users.values(), sort, order, skip, limit, "userId", after)
+    for node in nodes:
+        yield dict(node)
+
+
+def user_properties(born: str | None, gender: str | None) -> dict[str, Any]:
+    properties = dict()
+    if born is not None:
+        properties["born"] = Date.from_iso_format(born)
+    if gender is not None:
+        properties["gender"] = gender
+    return properties
+
+
+@implements(UserDAO.add)
+def add_user(graph: MemoryGraph, user_id: str, born: str, gender: str | None):
+    if user_id in graph.users:
+        raise ConstraintError(f"User with userId {user_id} already exists")
+    graph.remember(graph.users, user_id)
+    graph.users[user_id] = {"userId": user_id, **user_properties(born, gender)}
+    return copy(graph.users[user_id])
+
+
+@implements(UserDAO.add_many)
+def add_users(graph: MemoryGraph, rows: list[dict[str, Any]]):
+    results = list()
+    for row in rows:
+        if row["userId"] in graph.users:
+            status = "exists"
+        else:
+            add_user(graph, row["userId"], row["born"], row["gender"])
+            status = "created"
+        results.append({"index": row["index"], "status": status})
+    return results
+
+
+@implements(UserDAO.modify)
+def modify_user(graph: MemoryGraph, user_id: str, born: str, gender: str | None):
+    user = graph.users.get(user_id)
+    if user is None:
+        return None
+    graph.remember(graph.users, user_id)
+    user.pop("born", None)
+    user.pop("gender", None)
+    user.update(user_properties(born, gender))
+    return copy(user)
+
+
+@implements(UserDAO.remove)
+def remove_user(graph: MemoryGraph, user_id: str):
+    graph.remember(graph.users, user_id)
+    if graph.users.pop(user_id, None) is None:
+        return False
+    graph.detach(graph.user_features, graph.feature_users, user_id)
+    graph.remember(graph.ratings, user_id)
+    for placeId in graph.ratings.pop(user_id, {}):
+        graph.remember(graph.place_raters, placeId)
+        graph.place_raters[placeId].discard(user_id)
+    return True
+
+
+@implements(UserDAO.add_feature)
+def add_user_feature(graph: MemoryGraph, user_id: str, feature: str):
+    if user_id in graph.users and feature in graph.features:
+        graph.link(graph.user_features, graph.feature_users, user_id, feature)
+    return {
+        "feature": feature in graph.features,
+        "user": get_user_extended(graph, user_id),
+    }
+
+
+@implements(UserDAO.remove_feature)
+def remove_user_feature(graph: MemoryGraph, user_id: str, feature: str):
+    removed = graph.unlink(graph.user_features, graph.feature_users, user_id, feature)
+    return {
+        "feature": feature in graph.features,
+        "removed": removed,
+        "user": get_user_extended(graph, user_id),
+    }
+
+
+@implements(UserDAO.find_rating)
+def find_rating(graph: MemoryGraph, user_id: str, place_id: str):
+    if place_id in graph.ratings.get(user_id, {}):
+        return True
+    return None
+
+
+@implements(UserDAO.add_rating)
+def add_rating(graph: MemoryGraph, user_id: str, place_id: str, rating: float):
+    outcome = {"user": user_id in graph.users, "place": place_id in graph.places}
+    if all(outcome.values()):
+        graph.remember(graph.ratings, user_id)
+        graph.remember(graph.place_raters, place_id)
+        graph.ratings.setdefault(user_id, dict())[place_id] = rating
+        graph.place_raters.setdefault(place_id, set()).add(user_id)
+    return outcome
+
+
+@implements(UserDAO.add_ratings)
+def add_ratings(graph: MemoryGraph, rows: list[dict[str, Any]]):
+    results = list()
+    for row in rows:
+        outcome = add_rating(graph, row["userId"], row["placeId"], row["rating"])
+        if not outcome["user"]:
+            status = "user_not_found"
+        elif not outcome["place"]:
+            status = "place_not_found"
+        else:
+            status = "rated"
+        results.append({"index": row["index"], "status": status})
+    return results
@@ -15,7 +15,8 @@ async def clean_db():
     driver: AsyncDriver = await setup_db()
     try:
         async with driver.session(database=settings.NEO4J_DATABASE) as session:
-            await session.run("MATCH (n) DETACH DELETE n")
+            # Applied migrations are kept, so the schema is not created again
+            await session.run("MATCH (n) WHERE NOT n:SchemaMigration DETACH DELETE n")
     finally:
         await driver.close()
 
@@ -55,6 +56,9 @@ def client():
 
 def pytest_sessionstart(session: Session) -> None:
     logging.getLogger("uvicorn").info("TEST ENVIRONMENT IS SETTING UP...")
+    if settings.STORAGE_BACKEND == "memory":
+        # Every app startup creates a new empty in-memory graph
+        return
     try:
         check_if_test_datbase()
     except Exception as e:
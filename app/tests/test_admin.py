@@ -0,0 +1,45 @@
+from app.config.settings import settings
+from app.config.slow_queries import SlowQueryStore, redact
+
+
+def test_list_slow_queries_newest_first(client, tmp_path, monkeypatch):
+    store = SlowQueryStore(str(tmp_path / "slow_queries.jsonl"), 10**6, backups=1)
+    monkeypatch.setattr(client.app.state, "slow_query_store", store)
+    for i in range(3):
+        store.write(
+            {
+                "function": f"PlaceDAO.query_{i}",
+                "serverMs": 1000 + i,
+                "parameters": redact({"placeId": "abc", "limit": 10}),
+            }
+        )
+    store.close()
+
+    response = client.get("/admin/slow-queries?limit=2")
+    assert response.status_code == 200
+    entries = response.json()
+    assert [entry["function"] for entry in entries] == [
+        "PlaceDAO.query_2",
+        "PlaceDAO.query_1",
+    ]
+    assert entries[0]["parameters"] == {"placeId": "<str:3>", "limit": 10}
+
+
+def test_latest_entries_are_read_across_rotated_files(tmp_path):
+    store = SlowQueryStore(str(tmp_path / "slow_queries.jsonl"), 200, backups=3)
+    for i in range(20):
+        store.write({"function": f"PlaceDAO.query_{i}", "query": "MATCH (p) " * 5})
+    store.close()
+    assert (tmp_path / "slow_queries.jsonl.1").exists()
+
+    entries = store.read(limit=4)
+    assert [entry["function"] for entry in entries] == [
+        f"PlaceDAO.query_{i}" for i in range(19, 15, -1)
+    ]
+
+
+def test_slow_queries_require_api_key(client):
+    response = client.get(
+        "/admin/slow-queries", headers={settings.SERVICE_AK_HEADER: ""}
+    )
+    assert response.status_code == 401
@@ -0,0 +1,64 @@
+import argparse
+import csv
+import json
+
+from neo4j_setup.bulk.files import HEADERS, BulkFiles, place_row
+from neo4j_setup.bulk.generator import generate
+from neo4j_setup.bulk.validation import validate
+from neo4j_setup.cli import build_parser
+
+
+def test_repeated_reviews_keep_the_last_rating(tmp_path):
+    reviews = [
+        {"business_id": "b1", "user_id": "u1", "stars": 2},
+        {"business_id": "b2", "user_id": "u1", "stars": 5},
+        {"business_id": "b1", "user_id": "u1", "stars": 4},
+        {"business_id": "unknown", "user_id": "u1", "stars": 1},
+    ]
+    (tmp_path / "reviews.json").write_text(
+        "".join(json.dumps(review) + "\n" for review in reviews)
+    )
+    (tmp_path / "map.csv").write_text("yelpId,placeId\nb1,p1\nb2,p2\n")
+    args = build_parser().parse_args(
+        [
+            "bulk",
+            str(tmp_path / "out"),
+            "--yelp-reviews",
+            str(tmp_path / "reviews.json"),
+            "--yelp-place-map",
+            str(tmp_path / "map.csv"),
+        ]
+    )
+
+    counts = generate(args)
+
+    assert counts["rated"] == 2
+    with open(tmp_path / "out" / "rated.csv", newline="", encoding="utf-8") as f:
+        assert sorted(csv.reader(f)) == [
+            ["yelp-u1", "p1", "4.0", "RATED"],
+            ["yelp-u1", "p2", "5.0", "RATED"],
+        ]
+
+
+def test_validation_rejects_places_without_version(tmp_path):
+    place = {
+        "placeId": "p1",
+        "name": "Casa Pepe",
+        "locality": "Valencia",
+        "country": "ES",
+        "region": "VC",
+        "postcode": "46002",
+        "freeform": "Carrer de la Pau 1",
+        "confidence": 0.9,
+        "latitude": 39.4699,
+        "longitude": -0.3763,
+        "contentHash": "hash",
+    }
+    files = BulkFiles(str(tmp_path))
+    files.write("places", place_row(place))
+    unversioned = place_row({**place, "placeId": "p2"})
+    unversioned[HEADERS["places"].index("version")] = ""
+    files.write("places", unversioned)
+    files.close()
+
+    assert not validate(argparse.Namespace(output=str(tmp_path)))
@@ -54,3 +54,40 @@ def test_cannot_delete_non_existing_category(client):
 
     response = client.delete("/categories/" + category["name"])
     assert response.status_code == 404
+
+
+def test_cannot_add_existing_category(client):
+    category = get_category_faker()
+    response = client.post("/categories", json={"name": category.name})
+    assert response.status_code == 200
+
+    response = client.post("/categories", json={"name": category.name})
+    assert response.status_code == 409
+
+
+def test_cannot_rename_category_to_existing_name(client):
+    first = get_category_faker()
+    second = get_category_faker()
+    for category in [first, second]:
+        response = client.post("/categories", json={"name": category.name})
+        assert response.status_code == 200
+
+    response = client.put("/categories/" + first.name, json={"name": second.name})
+    assert response.status_code == 409
+
+
+def test_category_list_answers_not_modified_until_a_category_changes(client):
+    response = client.get("/categories")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get("/categories", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    category = get_category_faker()
+    response = client.post("/categories", json={"name": category.name})
+    assert response.status_code == 200
+
+    response = client.get("/categories", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
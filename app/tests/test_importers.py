@@ -0,0 +1,97 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+
+from app.config.settings import settings
+from app.tests.fakers import get_place_faker, get_user_faker
+from neo4j_setup.cli import build_parser
+
+pytestmark = pytest.mark.skipif(
+    settings.STORAGE_BACKEND == "memory",
+    reason="Importers write Cypher to a Neo4j database",
+)
+
+
+def get_overture_feature(placeId: str, name: str, country: str) -> dict:
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [-0.3763, 39.4699]},
+        "properties": {
+            "id": placeId,
+            "names": {"primary": name},
+            "addresses": [
+                {
+                    "freeform": "Carrer de la Pau 1",
+                    "locality": "Valencia",
+                    "country": country,
+                    "postcode": "46002",
+                    "region": "VC",
+                }
+            ],
+            "confidence": 0.9,
+            "categories": {"primary": "restaurant", "alternate": None},
+        },
+    }
+
+
+def import_overture(tmp_path, features: list[dict], *flags: str) -> None:
+    path = tmp_path / "places.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    args = build_parser().parse_args(
+        ["import", "overturemaps", str(path), "--skip-schema", *flags]
+    )
+    asyncio.run(args.handler(args))
+
+
+def test_imported_changes_give_the_place_a_new_etag(client, tmp_path):
+    placeId = str(uuid.uuid4())
+    country = uuid.uuid4().hex[:8].upper()
+    import_overture(tmp_path, [get_overture_feature(placeId, "Casa Pepe", country)])
+
+    response = client.get("/places/" + placeId)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    import_overture(
+        tmp_path, [get_overture_feature(placeId, "Casa Juan", country)], "--delta"
+    )
+
+    response = client.get("/places/" + placeId, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Casa Juan"
+    assert response.headers["etag"] != etag
+
+
+def test_delete_missing_keeps_places_not_imported(client, tmp_path):
+    country = uuid.uuid4().hex[:8].upper()
+    kept, removed = str(uuid.uuid4()), str(uuid.uuid4())
+    import_overture(
+        tmp_path,
+        [
+            get_overture_feature(kept, "Casa Pepe", country),
+            get_overture_feature(removed, "Casa Juan", country),
+        ],
+    )
+    created = get_place_faker().model_dump()
+    created["country"] = country
+    assert client.post("/places", json=created).status_code == 201
+    user = get_user_faker()
+    response = client.post(
+        "/users", json={"userId": user.userId, "gender": user.gender, "born": user.born}
+    )
+    assert response.status_code == 201
+    response = client.post(f"/users/{user.userId}/rates/{created['placeId']}/with/4.5")
+    assert response.status_code in (201, 202)
+
+    import_overture(
+        tmp_path,
+        [get_overture_feature(kept, "Casa Pepe", country)],
+        "--delta",
+        "--delete-missing",
+    )
+
+    assert client.get("/places/" + kept).status_code == 200
+    assert client.get("/places/" + removed).status_code == 404
+    assert client.get("/places/" + created["placeId"]).status_code == 200
@@ -0,0 +1,163 @@
+import asyncio
+
+import pytest
+from neo4j.exceptions import ConstraintError
+from neo4j.spatial import WGS84Point
+
+from app.config.unit_of_work import UnitOfWork
+from app.dao.category_dao import CategoryDAO
+from app.dao.place_dao import PlaceDAO
+from app.storage import memory_operations as memory
+from app.storage.memory_driver import MemoryDriver
+from app.storage.memory_graph import MemoryGraph, distance_meters
+
+
+def get_graph() -> MemoryGraph:
+    graph = MemoryGraph()
+    for name in ["restaurant", "bar", "museum"]:
+        memory.add_category(graph, name)
+    places = [
+        ("near-restaurant", "Casa Pepe", 39.4700, -0.3770, ["restaurant", "bar"]),
+        ("far-restaurant", "Casa Lola", 39.5000, -0.3770, ["restaurant"]),
+        ("near-museum", "Museo Central", 39.4705, -0.3765, ["museum"]),
+        ("rated-bar", "Bar Sol", 40.4168, -3.7038, ["bar"]),
+        ("rated-restaurant", "Mesón Real", 40.4170, -3.7040, ["restaurant"]),
+    ]
+    for placeId, name, latitude, longitude, categories in places:
+        memory.add_place(
+            graph,
+            placeId,
+            {"name": name, "coordinates": WGS84Point((longitude, latitude))},
+        )
+        for category in categories:
+            memory.add_place_category(graph, placeId, category)
+
+    memory.add_user(graph, "user", "1990-01-01", "f")
+    memory.add_rating(graph, "user", "rated-bar", 5.0)
+    memory.add_rating(graph, "user", "rated-restaurant", 3.0)
+    return graph
+
+
+def test_distance_is_measured_on_neo4j_sphere():
+    # One degree of latitude on a 6378140 m radius sphere
+    a = WGS84Point((-0.3763, 39.0))
+    b = WGS84Point((-0.3763, 40.0))
+    assert round(distance_meters(a, b), 1) == 111319.5
+
+
+def test_recommendation_scores_by_category_affinity_and_distance():
+    graph = get_graph()
+    items = memory.recommend_places_near_by_affinity(
+        graph,
+        user_id="user",
+        base_category="restaurant",
+        latitude=39.4700,
+        longitude=-0.3770,
+        max_distance_meters=5000,
+        skip=0,
+        limit=10,
+    )
+
+    assert [item["placeId"] for item in items] == ["near-restaurant", "far-restaurant"]
+    assert items[0]["matches"] == [
+        {"name": "bar", "avgRating": 5.0},
+        {"name": "restaurant", "avgRating": 3.0},
+    ]
+    assert items[0]["score"] == 8.0
+    assert items[1]["score"] == 3.0 - items[1]["distance"] / 200
+
+
+def test_recommendation_respects_max_distance():
+    graph = get_graph()
+    items = memory.recommend_places_near_by_affinity(
+        graph,
+        user_id="user",
+        base_category="restaurant",
+        latitude=39.4700,
+        longitude=-0.3770,
+        max_distance_meters=1000,
+        skip=0,
+        limit=10,
+    )
+    assert [item["placeId"] for item in items] == ["near-restaurant"]
+
+
+def test_find_place_by_name_and_position():
+    graph = get_graph()
+    item = memory.get_place_by_name_and_position(
+        graph,
+        name="casa pepe",
+        latitude=39.4701,
+        longitude=-0.3771,
+        max_distance_meters=200,
+    )
+    assert item["placeId"] == "near-restaurant"
+    assert item["score"] == 1.0
+
+    item = memory.get_place_by_name_and_position(
+        graph,
+        name="Casa Pepe",
+        latitude=39.5,
+        longitude=-0.3771,
+        max_distance_meters=200,
+    )
+    assert item is None
+
+
+def test_renamed_and_removed_nodes_keep_relationships_consistent():
+    graph = get_graph()
+    memory.update_category(graph, "restaurant", "food")
+    place = memory.get_place_extended(graph, "far-restaurant")
+    assert place["categories"] == [{"name": "food"}]
+
+    memory.remove_place(graph, "rated-bar")
+    assert memory.find_rating(graph, "user", "rated-bar") is None
+    assert graph.grid.size == 4
+
+
+def test_unit_of_work_failing_halfway_leaves_the_graph_unchanged():
+    driver = MemoryDriver(get_graph())
+
+    async def request():
+        async with UnitOfWork(driver) as uow:
+            await uow.write(CategoryDAO.add, name="cafe")
+            await uow.write(CategoryDAO.remove, name="bar")
+            await uow.write(CategoryDAO.add, name="museum")
+
+    with pytest.raises(ConstraintError):
+        asyncio.run(request())
+    assert "cafe" not in driver.graph.categories
+    assert "bar" in driver.graph.categories
+    assert "rated-bar" in driver.graph.category_places["bar"]
+
+
+def test_uncommitted_writes_are_rolled_back_and_committed_ones_kept():
+    driver = MemoryDriver(get_graph())
+
+    async def request():
+        async with UnitOfWork(driver) as uow:
+            await uow.write(CategoryDAO.add, name="cafe")
+            await uow.commit()
+            await uow.write(CategoryDAO.add, name="pub")
+
+    asyncio.run(request())
+    assert "cafe" in driver.graph.categories
+    assert "pub" not in driver.graph.categories
+
+
+def test_rolled_back_place_removal_restores_its_links_and_location():
+    driver = MemoryDriver(get_graph())
+
+    async def request():
+        async with UnitOfWork(driver) as uow:
+            await uow.write(PlaceDAO.remove, placeId="near-museum")
+            await uow.write(PlaceDAO.remove, placeId="rated-bar")
+
+    asyncio.run(request())
+    graph = driver.graph
+    assert {"near-museum", "rated-bar"} <= graph.places.keys()
+    assert graph.ratings["user"]["rated-bar"] == 5.0
+    assert "user" in graph.place_raters["rated-bar"]
+    assert "rated-bar" in graph.category_places["bar"]
+    center = WGS84Point((-0.3765, 39.4705))
+    assert "near-museum" in dict(graph.places_near(center, 100))
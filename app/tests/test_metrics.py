@@ -0,0 +1,11 @@
+from app.config.settings import settings
+
+
+def test_metrics_are_exposed_without_api_key(client):
+    client.get("/places?limit=1")
+    response = client.get("/metrics", headers={settings.SERVICE_AK_HEADER: ""})
+    assert response.status_code == 200
+    assert (
+        'dao_query_duration_seconds_count{access_mode="read",function="PlaceDAO.get_places"}'
+        in response.text
+    )
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+
+from app.config.migrations import find_migrations, migrate
+
+
+class FakeResult(object):
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for row in self.rows:
+            yield row
+
+    async def consume(self):
+        return
+
+
+class FakeTransaction(object):
+    def __init__(self, log):
+        self.log = log
+        self.committed = False
+        self.closed = False
+
+    async def run(self, query, **parameters):
+        self.log.append(" ".join(query.split()))
+        return FakeResult([])
+
+    async def commit(self):
+        self.committed = True
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeSession(object):
+    def __init__(self, recorded, log):
+        self.recorded = recorded
+        self.log = log
+        self.statements = list()
+        self.transactions = list()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return
+
+    async def run(self, query, **parameters):
+        query = " ".join(query.split())
+        self.statements.append((query, parameters))
+        self.log.append(query)
+        if query.startswith("MATCH (m:SchemaMigration)"):
+            return FakeResult(self.recorded)
+        return FakeResult([])
+
+    async def begin_transaction(self):
+        self.transactions.append(FakeTransaction(self.log))
+        return self.transactions[-1]
+
+
+class FakeDriver(object):
+    def __init__(self, recorded):
+        self.sessions = list()
+        self.recorded = recorded
+        self.log = list()
+
+    def session(self, **config):
+        self.sessions.append(FakeSession(self.recorded, self.log))
+        return self.sessions[-1]
+
+
+def write_migrations(directory):
+    (directory / "0001_initial.cypher").write_text(
+        "CREATE INDEX A IF NOT EXISTS FOR (p:Place) ON (p.a);\n\n"
+        "CREATE INDEX B IF NOT EXISTS FOR (p:Place) ON (p.b);"
+    )
+    (directory / "0002_names.cypher").write_text(
+        "CREATE INDEX C IF NOT EXISTS FOR (p:Place) ON (p.name)"
+    )
+    (directory / "README.md").write_text("Not a migration")
+
+
+def test_migrations_are_found_in_version_order(tmp_path):
+    write_migrations(tmp_path)
+
+    migrations = find_migrations(str(tmp_path))
+
+    assert [(m.version, m.name) for m in migrations] == [(1, "initial"), (2, "names")]
+    assert migrations[0].statements == [
+        "CREATE INDEX A IF NOT EXISTS FOR (p:Place) ON (p.a)",
+        "CREATE INDEX B IF NOT EXISTS FOR (p:Place) ON (p.b)",
+    ]
+
+    (tmp_path / "0002_other.cypher").write_text("CREATE INDEX D FOR (p:Place) ON (p.d)")
+    with pytest.raises(ValueError):
+        find_migrations(str(tmp_path))
+
+
+def test_only_new_migrations_are_applied(tmp_path):
+    write_migrations(tmp_path)
+    first = find_migrations(str(tmp_path))[0]
+    driver = FakeDriver([{"version": 1, "checksum": first.checksum}])
+
+    applied = asyncio.run(migrate(driver, str(tmp_path)))
+
+    assert applied == [2]
+    statements = [query for query, _ in driver.sessions[0].statements]
+    assert "CREATE INDEX A IF NOT EXISTS FOR (p:Place) ON (p.a)" not in statements
+    assert "CREATE INDEX C IF NOT EXISTS FOR (p:Place) ON (p.name)" in statements
+    (record, parameters), (wait, _) = driver.sessions[0].statements[-2:]
+    assert record.startswith("CREATE (m:SchemaMigration") and parameters["version"] == 2
+    assert wait.startswith("CALL db.awaitIndexes")
+
+
+def test_migrations_are_read_and_applied_holding_the_lock(tmp_path):
+    write_migrations(tmp_path)
+    driver = FakeDriver([])
+
+    assert asyncio.run(migrate(driver, str(tmp_path))) == [1, 2]
+
+    log = driver.log
+    locked = next(i for i, q in enumerate(log) if "SchemaMigrationLock {" in q)
+    read = next(
+        i for i, q in enumerate(log) if q.startswith("MATCH (m:SchemaMigration)")
+    )
+    assert all("CONSTRAINT" in query for query in log[:locked])
+    assert "REQUIRE m.version IS UNIQUE" in log[0]
+    assert locked < read
+    (lock,) = driver.sessions[1].transactions
+    assert lock.committed and lock.closed
+
+
+def test_repository_migrations_start_with_the_initial_schema():
+    migrations = find_migrations()
+
+    assert migrations[0].version == 1
+    assert all(query.startswith("CREATE") for query in migrations[0].statements)
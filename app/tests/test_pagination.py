@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app.config.exceptions import InvalidValue
+from app.config.pagination import decode_cursor, encode_cursor, keyset_nodes
+from app.dto.place import SinglePlace
+
+
+class FakeResult(object):
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for row in self.rows:
+            yield row
+
+
+class FakeRow(object):
+    def __init__(self, node):
+        self.node = node
+
+    def value(self, key):
+        return self.node
+
+
+class FakeTransaction(object):
+    def __init__(self, rows_per_statement):
+        self.rows_per_statement = rows_per_statement
+        self.statements = list()
+
+    async def run(self, query, **parameters):
+        self.statements.append((" ".join(query.split()), parameters))
+        rows = self.rows_per_statement[len(self.statements) - 1]
+        return FakeResult([FakeRow(row) for row in rows][: parameters["limit"]])
+
+
+async def collect(nodes):
+    return [node async for node in nodes]
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("country", "ES", "place-1")
+
+    assert decode_cursor(cursor, SinglePlace, "country", "placeId") == (
+        "ES",
+        "place-1",
+    )
+    assert decode_cursor(None, SinglePlace, "country", "placeId") is None
+    with pytest.raises(InvalidValue):
+        decode_cursor(cursor, SinglePlace, "region", "placeId")
+    with pytest.raises(InvalidValue):
+        decode_cursor("garbage", SinglePlace, "country", "placeId")
+
+
+def test_ascending_page_continues_with_the_nodes_without_sort_value():
+    tx = FakeTransaction([["a", "b"], ["c", "d"]])
+
+    nodes = asyncio.run(
+        collect(
+            keyset_nodes(tx, "p:Place", "placeId", "country", "ASC", ("ES", "p1"), 3)
+        )
+    )
+
+    assert nodes == ["a", "b", "c"]
+    (valued, first), (nulls, second) = tx.statements
+    assert (
+        "p.country >= $value AND NOT (p.country = $value AND p.placeId <= $key)"
+        in valued
+    )
+    assert "ORDER BY p.country ASC, p.placeId ASC" in valued
+    assert "p.country IS NULL" in nulls and "ORDER BY p.placeId ASC" in nulls
+    assert (first["limit"], second["limit"]) == (3, 1)
+
+
+def test_descending_page_starts_with_the_nodes_without_sort_value():
+    tx = FakeTransaction([["a"], ["b", "c"]])
+
+    nodes = asyncio.run(
+        collect(
+            keyset_nodes(tx, "p:Place", "placeId", "country", "DESC", (None, "p1"), 3)
+        )
+    )
+
+    assert nodes == ["a", "b", "c"]
+    (nulls, _), (valued, _) = tx.statements
+    assert "p.placeId < $key AND p.country IS NULL" in nulls
+    assert "p.country IS NOT NULL" in valued
+    assert "ORDER BY p.country DESC, p.placeId DESC" in valued
@@ -1,6 +1,17 @@
+import io
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
 from app.dto.place import SinglePlaceExtended
 from app.tests import faker
-from app.tests.fakers import get_place_faker, get_feature_faker, get_category_faker
+from app.tests.fakers import (
+    get_category_faker,
+    get_feature_faker,
+    get_place_faker,
+    get_user_faker,
+)
 
 
 def test_create_place(client):
@@ -126,6 +137,23 @@ def test_can_detach_a_feature_to_an_existing_place(client):
     assert True
 
 
+def test_cannot_attach_a_missing_feature_or_place(client):
+    response = client.get("/places?limit=1")
+    assert response.status_code == 200
+    place = response.json()[0]
+
+    feature = get_feature_faker()
+    response = client.post("/places/" + place["placeId"] + "/has/" + feature.name)
+    assert response.status_code == 404
+
+    response = client.post("/features", json={"name": feature.name})
+    assert response.status_code == 200
+    response = client.post(
+        "/places/" + get_place_faker().placeId + "/has/" + feature.name
+    )
+    assert response.status_code == 404
+
+
 def test_can_attach_a_category_to_an_existing_place(client):
     response = client.get("/places?limit=1")
     assert response.status_code == 200
@@ -179,3 +207,202 @@ def test_can_detach_a_category_to_an_existing_place(client):
         if category["name"] == f["name"]:
             assert False
     assert True
+
+
+def test_bulk_create_places_reports_every_item(client):
+    existing = get_place_faker().model_dump()
+    response = client.post("/places", json=existing)
+    assert response.status_code == 201
+    first = get_place_faker().model_dump()
+    second = get_place_faker().model_dump()
+
+    response = client.post(
+        "/places/bulk",
+        json=[first, dict(existing), first, {"name": "No id"}, second],
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["total"] == 5
+    assert [item["status"] for item in result["items"]] == [
+        "created",
+        "exists",
+        "duplicate",
+        "invalid",
+        "created",
+    ]
+    assert result["items"][0]["id"] == first["placeId"]
+
+    response = client.get("/places/" + second["placeId"])
+    assert response.status_code == 200
+
+
+def test_bulk_attach_categories_to_places(client):
+    place = get_place_faker().model_dump()
+    response = client.post("/places", json=place)
+    assert response.status_code == 201
+    category = get_category_faker()
+    response = client.post("/categories", json={"name": category.name})
+    assert response.status_code == 200
+
+    response = client.post(
+        "/places/bulk/categories",
+        json=[
+            {"placeId": place["placeId"], "category": category.name},
+            {"placeId": place["placeId"], "category": faker.uuid4()},
+            {"placeId": place["placeId"], "category": category.name},
+        ],
+    )
+    assert response.status_code == 200
+    assert response.json()["statuses"] == {
+        "attached": 1,
+        "category_not_found": 1,
+        "duplicate": 1,
+    }
+
+
+def test_cursor_pages_cover_every_place_once(client):
+    for i in range(7):
+        place = get_place_faker().model_dump()
+        if i % 2:
+            place["yelpId"] = None
+        response = client.post("/places", json=place)
+        assert response.status_code == 201
+
+    for sort in ("placeId", "yelpId", "latitude"):
+        response = client.get(f"/places?limit=1000&sort={sort}")
+        expected = [p["placeId"] for p in response.json()]
+        seen = []
+        response = client.get(f"/places?limit=3&sort={sort}")
+        while True:
+            assert response.status_code == 200
+            seen.extend(p["placeId"] for p in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            response = client.get(f"/places?limit=3&sort={sort}&after={cursor}")
+        assert seen == expected
+
+
+def test_cannot_page_with_an_invalid_cursor(client):
+    response = client.get("/places?limit=1")
+    cursor = response.headers["X-Next-Cursor"]
+
+    assert client.get("/places?after=not-a-cursor").status_code == 400
+    assert client.get("/places?sort=country&after=" + cursor).status_code == 400
+
+
+def test_list_places_as_ndjson(client):
+    for i in range(3):
+        response = client.post("/places", json=get_place_faker().model_dump())
+        assert response.status_code == 201
+
+    expected = client.get("/places?limit=1000").json()
+    response = client.get(
+        "/places?limit=1000", headers={"Accept": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == expected
+
+    response = client.get(
+        "/places?after=garbage", headers={"Accept": "application/x-ndjson"}
+    )
+    assert response.status_code == 400
+
+
+def test_export_places_of_a_country(client):
+    place = get_place_faker().model_dump()
+    place["country"] = "XX"
+    response = client.post("/places", json=place)
+    assert response.status_code == 201
+
+    response = client.get("/places/export?country=XX")
+    assert response.status_code == 200
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [p["placeId"] for p in exported] == [place["placeId"]]
+
+
+def test_export_catalog_as_arrow(client):
+    place = get_place_faker().model_dump()
+    place["country"] = "XY"
+    assert client.post("/places", json=place).status_code == 201
+    category = client.post("/categories", json={"name": get_category_faker().name})
+    response = client.post(
+        "/places/" + place["placeId"] + "/is-in/" + category.json()["name"]
+    )
+    assert response.status_code == 201
+    user = get_user_faker()
+    client.post(
+        "/users", json={"userId": user.userId, "gender": user.gender, "born": user.born}
+    )
+    response = client.post(f"/users/{user.userId}/rates/{place['placeId']}/with/4")
+    assert response.status_code == 201
+
+    response = client.get(
+        "/places/export/arrow?country=XY&columns=placeId,categories,ratingCount,avgRating"
+    )
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column_names == ["placeId", "categories", "ratingCount", "avgRating"]
+    assert table.to_pylist() == [
+        {
+            "placeId": place["placeId"],
+            "categories": [category.json()["name"]],
+            "ratingCount": 1,
+            "avgRating": 4.0,
+        }
+    ]
+
+
+def test_export_catalog_as_parquet(client):
+    place = get_place_faker().model_dump()
+    place["country"] = "XZ"
+    assert client.post("/places", json=place).status_code == 201
+
+    response = client.get("/places/export/parquet?country=XZ")
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column("placeId").to_pylist() == [place["placeId"]]
+    assert table.column("ratingCount").to_pylist() == [0]
+
+    response = client.get("/places/export/arrow?columns=placeId,unknown")
+    assert response.status_code == 400
+
+
+def test_get_place_answers_not_modified_until_it_changes(client):
+    place = get_place_faker().model_dump()
+    assert client.post("/places", json=place).status_code == 201
+
+    response = client.get("/places/" + place["placeId"])
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get(
+        "/places/" + place["placeId"], headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    place["name"] = "Casa Pepe"
+    response = client.put("/places/" + place["placeId"], json=place)
+    assert response.status_code == 200
+
+    response = client.get(
+        "/places/" + place["placeId"], headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["name"] == "Casa Pepe"
+    assert response.headers["etag"] != etag
+
+
+def test_large_lists_are_compressed(client):
+    for i in range(10):
+        client.post("/places", json=get_place_faker().model_dump())
+
+    response = client.get("/places?limit=10", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 10
+
+    response = client.get("/places?limit=10", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
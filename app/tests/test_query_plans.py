@@ -0,0 +1,342 @@
+import asyncio
+import difflib
+import inspect
+import os
+import re
+from typing import Any, Callable
+
+import pytest
+
+from app.config.neo4j import create_driver
+from app.config.settings import settings
+from app.config.slow_queries import plan_steps
+from app.dao.category_dao import CategoryDAO
+from app.dao.feature_dao import FeatureDAO
+from app.dao.place_dao import EXPORT_COLUMNS, PlaceDAO
+from app.dao.recommendation_dao import RecommendationDAO
+from app.dao.user_dao import UserDAO
+
+pytestmark = pytest.mark.skipif(
+    settings.STORAGE_BACKEND == "memory",
+    reason="Query plans need a Neo4j database",
+)
+
+SNAPSHOTS_DIR = os.path.join(os.path.dirname(__file__), "query_plans")
+UPDATE_SNAPSHOTS = os.getenv("UPDATE_PLAN_SNAPSHOTS", "") not in ("", "0")
+
+POSITION = {"latitude": 39.4699, "longitude": -0.3763}
+RECOMMENDATION = {
+    "user_id": "user",
+    "base_category": "restaurant",
+    "max_distance_meters": 2000,
+    "skip": 0,
+    "limit": 10,
+    **POSITION,
+}
+
+# Patterns are matched against "Operator details" lines of the plan
+PLACE_KEY = r"NodeUniqueIndexSeek.*:Place\(placeId\)"
+USER_KEY = r"NodeUniqueIndexSeek.*:User\(userId\)"
+CATEGORY_KEY = r"NodeUniqueIndexSeek.*:Category\(name\)"
+FEATURE_KEY = r"NodeUniqueIndexSeek.*:Feature\(name\)"
+PLACE_COORDINATES = r"Index\w*.*:Place\(coordinates\)"
+
+FORBIDDEN = [r"^AllNodesScan", r"^NodeByLabelScan.*:Place\b"]
+
+STATEMENTS: list[tuple[Callable, dict[str, Any], list[str]]] = [
+    (CategoryDAO.get_category, {"name": "restaurant"}, [CATEGORY_KEY]),
+    (CategoryDAO.get_names, {}, []),
+    (CategoryDAO.add, {"name": "restaurant"}, [CATEGORY_KEY]),
+    (CategoryDAO.update, {"name": "restaurant", "new_name": "bar"}, [CATEGORY_KEY]),
+    (CategoryDAO.remove, {"name": "restaurant"}, [CATEGORY_KEY]),
+    (FeatureDAO.get_feature, {"name": "wifi"}, [FEATURE_KEY]),
+    (FeatureDAO.get_names, {}, []),
+    (FeatureDAO.add, {"name": "wifi"}, [FEATURE_KEY]),
+    (FeatureDAO.update, {"name": "wifi", "new_name": "parking"}, [FEATURE_KEY]),
+    (FeatureDAO.remove, {"name": "wifi"}, [FEATURE_KEY]),
+    (PlaceDAO.get_place, {"placeId": "place"}, [PLACE_KEY]),
+    (
+        PlaceDAO.get_place_by_yelp_id,
+        {"yelpId": "yelp"},
+        [r"NodeUniqueIndexSeek.*:Place\(yelpId\)"],
+    ),
+    (
+        PlaceDAO.get_place_by_name_and_position,
+        {"name": "Casa Pepe", "max_distance_meters": 200, **POSITION},
+        [PLACE_COORDINATES],
+    ),
+    (PlaceDAO.get_place_extended, {"placeId": "place"}, [PLACE_KEY]),
+    (PlaceDAO.get_places, {}, [r"NodeIndexScan.*:Place\(placeId\)"]),
+    (
+        PlaceDAO.export_places,
+        {"region": "Valencia"},
+        [r"NodeIndexSeek.*:Place\(region\)"],
+    ),
+    (
+        PlaceDAO.export_catalog,
+        {"columns": list(EXPORT_COLUMNS), "region": "Valencia"},
+        [r"NodeIndexSeek.*:Place\(region\)"],
+    ),
+    (PlaceDAO.get_place_version, {"placeId": "place"}, [PLACE_KEY]),
+    (PlaceDAO.add, {"placeId": "place", "data": {"name": "Casa Pepe"}}, []),
+    (PlaceDAO.modify, {"placeId": "place", "data": {"name": "Casa"}}, [PLACE_KEY]),
+    (PlaceDAO.remove, {"placeId": "place"}, [PLACE_KEY]),
+    (
+        PlaceDAO.add_place_feature,
+        {"placeId": "place", "feature": "wifi"},
+        [PLACE_KEY, FEATURE_KEY],
+    ),
+    (
+        PlaceDAO.remove_place_feature,
+        {"placeId": "place", "feature": "wifi"},
+        [PLACE_KEY, FEATURE_KEY],
+    ),
+    (
+        PlaceDAO.add_place_category,
+        {"placeId": "place", "category": "restaurant"},
+        [PLACE_KEY, CATEGORY_KEY],
+    ),
+    (
+        PlaceDAO.remove_place_category,
+        {"placeId": "place", "category": "restaurant"},
+        [PLACE_KEY, CATEGORY_KEY],
+    ),
+    (
+        PlaceDAO.recommend_places_near_by_affinity,
+        RECOMMENDATION,
+        [USER_KEY, PLACE_COORDINATES],
+    ),
+    (
+        RecommendationDAO.recommend_places_near_by_affinity,
+        RECOMMENDATION,
+        [USER_KEY, PLACE_COORDINATES],
+    ),
+    (UserDAO.get_user, {"user_id": "user"}, [USER_KEY]),
+    (UserDAO.get_user_extended, {"user_id": "user"}, [USER_KEY]),
+    (UserDAO.get_users, {}, []),
+    (UserDAO.add, {"user_id": "user", "born": "1990-01-01", "gender": "f"}, []),
+    (
+        UserDAO.modify,
+        {"user_id": "user", "born": "1990-01-01", "gender": "f"},
+        [USER_KEY],
+    ),
+    (UserDAO.remove, {"user_id": "user"}, [USER_KEY]),
+    (
+        UserDAO.add_feature,
+        {"user_id": "user", "feature": "wifi"},
+        [USER_KEY, FEATURE_KEY],
+    ),
+    (
+        UserDAO.remove_feature,
+        {"user_id": "user", "feature": "wifi"},
+        [USER_KEY, FEATURE_KEY],
+    ),
+    (UserDAO.find_rating, {"user_id": "user", "place_id": "place"}, [USER_KEY]),
+    (
+        UserDAO.add_rating,
+        {"user_id": "user", "place_id": "place", "rating": 4.0},
+        [USER_KEY, PLACE_KEY],
+    ),
+    (
+        PlaceDAO.add_many,
+        {"rows": [{"index": 0, "placeId": "place", "data": {"yelpId": "yelp"}}]},
+        [PLACE_KEY, r"NodeUniqueIndexSeek.*:Place\(yelpId\)"],
+    ),
+    (
+        PlaceDAO.add_place_categories,
+        {"rows": [{"index": 0, "placeId": "place", "category": "restaurant"}]},
+        [PLACE_KEY, CATEGORY_KEY],
+    ),
+    (
+        UserDAO.add_many,
+        {"rows": [{"index": 0, "userId": "user", "born": None, "gender": None}]},
+        [USER_KEY],
+    ),
+    (
+        UserDAO.add_ratings,
+        {"rows": [{"index": 0, "userId": "user", "placeId": "place", "rating": 4.0}]},
+        [USER_KEY, PLACE_KEY],
+    ),
+]
+
+
+# Every sort accepted by a list endpoint, with a cursor value of its type
+KEYSET_SORTS: list[tuple[Callable, str, str, Any]] = [
+    *[
+        (PlaceDAO.get_places, "Place", sort, "value")
+        for sort in [
+            "placeId",
+            "name",
+            "locality",
+            "country",
+            "region",
+            "postcode",
+            "freeform",
+            "yelpId",
+        ]
+    ],
+    (PlaceDAO.get_places, "Place", "confidence", 0.5),
+    (UserDAO.get_users, "User", "userId", "user"),
+    (UserDAO.get_users, "User", "born", "1990-01-01"),
+    (UserDAO.get_users, "User", "gender", "f"),
+]
+
+
+class ExplainTransaction(object):
+    """Transaction proxy running every statement with EXPLAIN, so DAO functions
+    are planned with their real parameters but never executed."""
+
+    def __init__(self, tx: Any):
+        self.tx = tx
+        self.results = list()
+
+    async def run(self, query: Any, parameters: Any = None, **kwargs: Any) -> Any:
+        result = await self.tx.run("EXPLAIN " + query, parameters, **kwargs)
+        self.results.append(result)
+        return result
+
+
+def plan_lines(plan: dict[str, Any]) -> list[str]:
+    lines = list()
+    for step in plan_steps(plan):
+        operator = step["operator"].split("@")[0]
+        details = f" {step['details']}" if step["details"] else ""
+        lines.append("  " * step["depth"] + operator + details)
+    return lines
+
+
+async def explain_calls(
+    calls: list[tuple[str, Callable, dict[str, Any]]],
+) -> dict[str, list[str]]:
+    driver = await create_driver()
+    plans = dict()
+    try:
+        async with driver.session(database=settings.NEO4J_DATABASE) as session:
+            for name, dao_function, parameters in calls:
+
+                async def explain(tx):
+                    explained = ExplainTransaction(tx)
+                    call = dao_function(explained, **parameters)
+                    if inspect.isasyncgen(call):
+                        # Streaming DAO functions run their statements as they are read
+                        async for _ in call:
+                            pass
+                    else:
+                        await call
+                    lines = list()
+                    for result in explained.results:
+                        summary = await result.consume()
+                        lines.extend(plan_lines(summary.plan))
+                    return lines
+
+                plans[name] = await session.execute_write(explain)
+    finally:
+        await driver.close()
+    return plans
+
+
+@pytest.fixture(scope="module")
+def plans() -> dict[str, list[str]]:
+    return asyncio.run(
+        explain_calls(
+            [
+                (dao_function.__qualname__, dao_function, parameters)
+                for dao_function, parameters, _ in STATEMENTS
+            ]
+        )
+    )
+
+
+@pytest.fixture(scope="module")
+def keyset_plans() -> dict[str, list[str]]:
+    return asyncio.run(
+        explain_calls(
+            [
+                (
+                    f"{dao_function.__qualname__}[{sort} {order}]",
+                    dao_function,
+                    {"sort": sort, "order": order, "after": (value, "key")},
+                )
+                for dao_function, _, sort, value in KEYSET_SORTS
+                for order in ("ASC", "DESC")
+            ]
+        )
+    )
+
+
+@pytest.mark.parametrize(
+    "dao_function, required",
+    [(dao_function, required) for dao_function, _, required in STATEMENTS],
+    ids=[dao_function.__qualname__ for dao_function, _, _ in STATEMENTS],
+)
+def test_statement_uses_indexes(plans, dao_function, required):
+    lines = plans[dao_function.__qualname__]
+    plan = "\n".join(lines)
+
+    for pattern in required:
+        assert any(
+            re.search(pattern, line.strip()) for line in lines
+        ), f"{dao_function.__qualname__} does not match {pattern}:\n{plan}"
+    for pattern in FORBIDDEN:
+        assert not any(
+            re.search(pattern, line.strip()) for line in lines
+        ), f"{dao_function.__qualname__} plans a forbidden {pattern}:\n{plan}"
+
+
+@pytest.mark.parametrize(
+    "dao_function",
+    [dao_function for dao_function, _, _ in STATEMENTS],
+    ids=[dao_function.__qualname__ for dao_function, _, _ in STATEMENTS],
+)
+def test_plan_matches_snapshot(plans, dao_function):
+    name = dao_function.__qualname__
+    current = "\n".join(plans[name]) + "\n"
+    path = os.path.join(SNAPSHOTS_DIR, f"{name}.txt")
+
+    # New statements record their first plan; changed plans need UPDATE_PLAN_SNAPSHOTS=1
+    if UPDATE_SNAPSHOTS or not os.path.exists(path):
+        os.makedirs(SNAPSHOTS_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(current)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        expected = f.read()
+    diff = "".join(
+        difflib.unified_diff(
+            expected.splitlines(keepends=True),
+            current.splitlines(keepends=True),
+            fromfile=f"{name} (snapshot)",
+            tofile=f"{name} (current)",
+        )
+    )
+    assert not diff, (
+        f"Plan of {name} changed, run with UPDATE_PLAN_SNAPSHOTS=1 if intended:\n"
+        + diff
+    )
+
+
+@pytest.mark.parametrize(
+    "dao_function, label, sort",
+    [(dao_function, label, sort) for dao_function, label, sort, _ in KEYSET_SORTS],
+    ids=[
+        f"{dao_function.__qualname__}[{sort}]"
+        for dao_function, _, sort, _ in KEYSET_SORTS
+    ],
+)
+def test_keyset_page_seeks_the_sort_index_in_order(
+    keyset_plans, dao_function, label, sort
+):
+    seek = rf"Node\w*IndexSeekByRange.*:{label}\({sort}\)"
+    for order in ("ASC", "DESC"):
+        lines = keyset_plans[f"{dao_function.__qualname__}[{sort} {order}]"]
+        plan = "\n".join(lines)
+
+        # Besides the seek after the cursor, nodes without the sort are paged by key
+        assert any(
+            re.search(seek, line.strip()) for line in lines
+        ), f"Keyset page by {sort} {order} does not seek a range index:\n{plan}"
+        for pattern in FORBIDDEN + [r"^Sort\b"]:
+            assert not any(
+                re.search(pattern, line.strip()) for line in lines
+            ), f"Keyset page by {sort} {order} plans a forbidden {pattern}:\n{plan}"
@@ -0,0 +1,80 @@
+import asyncio
+
+from app.config.reference_data import ReferenceData, ReferenceSet
+from app.dao.category_dao import CategoryDAO
+from app.storage import memory_operations as memory
+from app.storage.memory_driver import MemoryDriver
+
+
+class FakeTransaction(object):
+    async def close(self):
+        return
+
+
+class FakeSession(object):
+    async def begin_transaction(self):
+        return FakeTransaction()
+
+    async def close(self):
+        return
+
+
+class FakeDriver(object):
+    def session(self, **config):
+        return FakeSession()
+
+
+def get_driver() -> MemoryDriver:
+    driver = MemoryDriver()
+    for name in ["restaurant", "bar", "museum"]:
+        memory.add_category(driver.graph, name)
+    memory.add_feature(driver.graph, "wifi")
+    return driver
+
+
+def test_reference_data_is_loaded_sorted():
+    driver = get_driver()
+    reference = ReferenceData()
+    asyncio.run(reference.load(driver))
+
+    assert reference.categories.names == ["bar", "museum", "restaurant"]
+    assert "wifi" in reference.features and "bar" not in reference.features
+
+
+def test_pages_follow_the_order_and_the_cursor():
+    categories = ReferenceSet(CategoryDAO.get_names)
+    for name in ["restaurant", "bar", "museum", "cafe"]:
+        categories.add(name)
+
+    assert categories.page(order="ASC", limit=2) == ["bar", "cafe"]
+    assert categories.page(order="ASC", after=("cafe", "cafe")) == [
+        "museum",
+        "restaurant",
+    ]
+    assert categories.page(order="DESC", skip=1, limit=2) == ["museum", "cafe"]
+    assert categories.page(order="DESC", after=("cafe", "cafe")) == ["bar"]
+
+
+def test_refresh_picks_up_changes_made_outside_the_api():
+    driver = get_driver()
+    categories = ReferenceSet(CategoryDAO.get_names)
+    asyncio.run(categories.refresh(driver))
+
+    memory.add_category(driver.graph, "cafe")
+    memory.remove_category(driver.graph, "bar")
+
+    assert asyncio.run(categories.refresh(driver))
+    assert categories.names == ["cafe", "museum", "restaurant"]
+
+
+def test_refresh_does_not_undo_changes_made_while_reading():
+    categories = ReferenceSet(CategoryDAO.get_names)
+    categories.add("bar")
+
+    async def names_read_during_a_delete(tx):
+        categories.remove("bar")
+        return ["bar", "museum"]
+
+    categories.load_names = names_read_during_a_delete
+    assert not asyncio.run(categories.refresh(FakeDriver()))
+    assert "bar" not in categories
@@ -0,0 +1,116 @@
+import pytest
+from neo4j.spatial import WGS84Point
+from pydantic import TypeAdapter
+
+from app.config.serialization import encode_json
+from app.config.settings import settings
+from app.config.timing import TimedJSONResponse
+from app.dto.place import SinglePlace, SinglePlaceRecommended
+from app.storage import memory_operations as memory
+from app.storage.memory_graph import MemoryGraph
+
+
+def get_graph() -> MemoryGraph:
+    graph = MemoryGraph()
+    memory.add_category(graph, "restaurant")
+    memory.add_place(
+        graph,
+        "imported",
+        {
+            "name": "Casa Pepe",
+            "coordinates": WGS84Point((-0.3770, 39.4700)),
+            "locality": "València",
+            "confidence": 1,
+        },
+    )
+    memory.add_place(
+        graph,
+        "created",
+        {"name": "Casa Lola", "latitude": 39.4701, "longitude": -0.3771},
+    )
+    memory.add_place(
+        graph,
+        "nearby",
+        {"name": "Bar Sol", "coordinates": WGS84Point((-0.3765, 39.4705))},
+    )
+    for placeId in ["imported", "created", "nearby"]:
+        memory.add_place_category(graph, placeId, "restaurant")
+    memory.add_user(graph, "user", "1990-01-01", "f")
+    memory.add_rating(graph, "user", "imported", 4.5)
+    return graph
+
+
+def validated_body(model: type, items: list) -> bytes:
+    # What FastAPI sent before: validated models, re-validated against the
+    # response model and rendered by the standard library encoder
+    adapter = TypeAdapter(list[model])
+    content = adapter.validate_python([model(**item) for item in items])
+    return TimedJSONResponse(adapter.dump_python(content, mode="json")).body
+
+
+def test_projected_places_encode_as_validated_nodes():
+    graph = get_graph()
+    nodes = sorted(graph.places.values(), key=lambda node: node["placeId"])
+
+    records = memory.get_places(graph, order="ASC")
+    places = [SinglePlace.from_record(record) for record in records]
+
+    assert encode_json(list[SinglePlace], places) == validated_body(SinglePlace, nodes)
+
+
+def test_projected_recommendations_encode_as_validated_nodes():
+    graph = get_graph()
+    parameters = {
+        "user_id": "user",
+        "base_category": "restaurant",
+        "latitude": 39.4700,
+        "longitude": -0.3770,
+        "max_distance_meters": 1000,
+        "skip": 0,
+        "limit": 10,
+    }
+
+    records = memory.recommend_places_near_by_affinity(graph, **parameters)
+    places = [SinglePlaceRecommended.from_record(record) for record in records]
+    nodes = [
+        {
+            **graph.places[record["placeId"]],
+            "matches": record["matches"],
+            "distance": record["distance"],
+            "score": record["score"],
+        }
+        for record in records
+    ]
+
+    assert len(places) == 2
+    assert encode_json(list[SinglePlaceRecommended], places) == validated_body(
+        SinglePlaceRecommended, nodes
+    )
+
+
+@pytest.mark.skipif(
+    settings.STORAGE_BACKEND != "memory", reason="Seeds the in-memory graph"
+)
+def test_recommendation_responses_include_the_score(client):
+    graph = client.app.state.driver.graph
+    seeded = get_graph()
+    for name in seeded.categories:
+        if name not in graph.categories:
+            memory.add_category(graph, name)
+    for placeId, node in seeded.places.items():
+        memory.add_place(graph, placeId, dict(node))
+        memory.add_place_category(graph, placeId, "restaurant")
+    memory.add_user(graph, "user", "1990-01-01", "f")
+    memory.add_rating(graph, "user", "imported", 4.5)
+
+    response = client.get(
+        "/places/recommend/restaurant/for/user/near/39.4700/-0.3770"
+        "/with-max-distance/1000"
+    )
+    assert response.status_code == 200
+    places = response.json()
+    assert len(places) == 2
+    for place in places:
+        assert isinstance(place["score"], float)
+        assert place["matches"] == [{"name": "restaurant", "avgRating": 4.5}]
+    assert places[0]["score"] >= places[1]["score"]
@@ -0,0 +1,16 @@
+from app.config.settings import settings
+
+
+def test_server_timing_header_on_sampled_requests(client, monkeypatch):
+    monkeypatch.setattr(settings, "SERVER_TIMING_SAMPLE_RATE", 1.0)
+    response = client.get("/places?limit=1")
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert "db.PlaceDAO.get_places;dur=" in timing
+    assert "model;dur=" in timing
+    assert "render;dur=" in timing
+    assert "total;dur=" in timing
+
+    monkeypatch.setattr(settings, "SERVER_TIMING_SAMPLE_RATE", 0.0)
+    response = client.get("/places?limit=1")
+    assert "server-timing" not in response.headers
@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+from neo4j import READ_ACCESS
+from neo4j.exceptions import TransientError
+
+from app.config.unit_of_work import UnitOfWork
+
+
+class FakeTransaction(object):
+    def __init__(self, failures=None):
+        self.failures = failures if failures is not None else list()
+        self.committed = False
+        self.closed = False
+        self.statements = list()
+
+    async def run(self, query, parameters=None, **kwargs):
+        if query in self.failures:
+            self.failures.remove(query)
+            raise TransientError("leader switched")
+        self.statements.append(query)
+
+    async def commit(self):
+        self.committed = True
+        self.closed = True
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeSession(object):
+    def __init__(self, failures=None):
+        self.failures = failures
+        self.transactions = list()
+        self.closed = False
+
+    async def begin_transaction(self):
+        self.transactions.append(FakeTransaction(self.failures))
+        return self.transactions[-1]
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeDriver(object):
+    def __init__(self, failures=None):
+        self.failures = failures
+        self.sessions = list()
+
+    def session(self, **config):
+        self.sessions.append(FakeSession(self.failures))
+        return self.sessions[-1]
+
+
+async def read_something(tx, name):
+    await tx.run(f"MATCH {name}")
+    return name
+
+
+async def fail(tx):
+    raise ValueError("statement failed")
+
+
+def test_reads_and_writes_share_one_session_and_transaction():
+    driver = FakeDriver()
+
+    async def request():
+        async with UnitOfWork(driver) as uow:
+            assert await uow.read(read_something, "a") == "a"
+            assert await uow.read(read_something, "b") == "b"
+            await uow.write(read_something, "c")
+            await uow.commit()
+
+    asyncio.run(request())
+
+    assert len(driver.sessions) == 1
+    session = driver.sessions[0]
+    assert session.closed
+    assert len(session.transactions) == 1
+    assert session.transactions[0].committed
+    assert session.transactions[0].statements == ["MATCH a", "MATCH b", "MATCH c"]
+
+
+def test_uncommitted_or_failed_transactions_are_rolled_back():
+    driver = FakeDriver()
+
+    async def request():
+        async with UnitOfWork(driver) as uow:
+            with pytest.raises(ValueError):
+                await uow.read(fail)
+            await uow.write(read_something, "a")
+
+    asyncio.run(request())
+
+    failed, uncommitted = driver.sessions[0].transactions
+    assert failed.closed and not failed.committed
+    assert uncommitted.closed and not uncommitted.committed
+
+
+def test_first_statement_of_a_transaction_is_retried_on_transient_errors():
+    driver = FakeDriver(failures=["MATCH a", "MATCH a"])
+
+    async def request():
+        async with UnitOfWork(driver) as uow:
+            assert await uow.read(read_something, "a") == "a"
+            await uow.write(read_something, "b")
+            await uow.commit()
+
+    asyncio.run(request())
+
+    first, second, retried = driver.sessions[0].transactions
+    assert first.closed and second.closed and not second.committed
+    assert retried.statements == ["MATCH a", "MATCH b"] and retried.committed
+
+
+def test_later_statements_are_not_retried():
+    driver = FakeDriver(failures=["MATCH b"])
+
+    async def request():
+        async with UnitOfWork(driver) as uow:
+            await uow.read(read_something, "a")
+            await uow.read(read_something, "b")
+
+    with pytest.raises(TransientError):
+        asyncio.run(request())
+    (transaction,) = driver.sessions[0].transactions
+    assert transaction.statements == ["MATCH a"] and transaction.closed
+
+
+def test_read_only_unit_of_work_rejects_writes():
+    async def request():
+        async with UnitOfWork(FakeDriver(), access_mode=READ_ACCESS) as uow:
+            await uow.write(read_something, "a")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(request())
+
+
+async def stream_something(tx, names):
+    for name in names:
+        await tx.run(f"MATCH {name}")
+        yield name
+
+
+def test_streams_run_in_the_shared_transaction():
+    driver = FakeDriver()
+
+    async def request():
+        async with UnitOfWork(driver, access_mode=READ_ACCESS) as uow:
+            assert await uow.read(read_something, "a") == "a"
+            return [name async for name in uow.stream(stream_something, ["b", "c"])]
+
+    assert asyncio.run(request()) == ["b", "c"]
+    (transaction,) = driver.sessions[0].transactions
+    assert transaction.statements == ["MATCH a", "MATCH b", "MATCH c"]
+    assert transaction.closed and not transaction.committed
@@ -1,8 +1,9 @@
 import pytz
 
+from app.config.settings import settings
 from app.dto.user import SingleUserExtended
 from app.tests import faker
-from app.tests.fakers import get_user_faker, get_feature_faker
+from app.tests.fakers import get_user_faker, get_feature_faker, get_place_faker
 
 
 def test_create_user(client):
@@ -144,3 +145,65 @@ def test_can_detach_a_feature_to_an_existing_user(client):
         if feature["name"] == f["name"]:
             assert False
     assert True
+
+
+def test_cannot_attach_a_missing_feature_to_a_user(client):
+    response = client.get("/users?limit=1")
+    assert response.status_code == 200
+    user = response.json()[0]
+
+    response = client.post(
+        "/users/" + user["userId"] + "/needs/" + get_feature_faker().name
+    )
+    assert response.status_code == 404
+
+
+def test_bulk_create_users_and_rate_places(client):
+    user = get_user_faker()
+    place = get_place_faker().model_dump()
+    response = client.post("/places", json=place)
+    assert response.status_code == 201
+
+    response = client.post(
+        "/users/bulk",
+        json=[
+            {"userId": user.userId, "gender": user.gender, "born": user.born},
+            {"userId": user.userId},
+            {"userId": faker.uuid4(), "born": "yesterday"},
+        ],
+    )
+    assert response.status_code == 200
+    assert [item["status"] for item in response.json()["items"]] == [
+        "created",
+        "duplicate",
+        "invalid",
+    ]
+
+    response = client.post(
+        "/ratings/bulk",
+        json=[
+            {"userId": user.userId, "placeId": place["placeId"], "rating": 4},
+            {"userId": user.userId, "placeId": faker.uuid4(), "rating": 3},
+            {"userId": user.userId, "placeId": place["placeId"], "rating": "high"},
+            {"userId": user.userId, "placeId": place["placeId"], "rating": 2},
+            "not a rating",
+        ],
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["statuses"] == {
+        "rated": 1,
+        "place_not_found": 1,
+        "invalid": 2,
+        "duplicate": 1,
+    }
+    assert (
+        result["items"][3]["detail"]
+        == f"{user.userId}/{place['placeId']} appears earlier"
+    )
+    assert not result["items"][4]["detail"].startswith(":")
+
+
+def test_bulk_requests_are_capped(client):
+    response = client.post("/users/bulk", json=[{}] * (settings.BULK_MAX_ITEMS + 1))
+    assert response.status_code == 400
@@ -0,0 +1,180 @@
+import asyncio
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from neo4j.exceptions import ServiceUnavailable
+
+from app.config.exceptions import Unavailable
+from app.config.settings import settings
+from app.config.write_behind import KnownKeys, RatingBuffer
+from app.main import app
+from app.storage import memory_operations as memory
+from app.storage.memory_driver import MemoryDriver
+from app.tests.fakers import get_place_faker, get_user_faker
+
+
+def get_driver() -> MemoryDriver:
+    driver = MemoryDriver()
+    memory.add_user(driver.graph, "user", "1990-01-01", "f")
+    for placeId in ["bar", "museum"]:
+        memory.add_place(driver.graph, placeId, {"name": placeId})
+    return driver
+
+
+def test_known_keys_forget_the_least_recently_used():
+    keys = KnownKeys(2)
+    keys.add("a")
+    keys.add("b")
+    assert "a" in keys
+    keys.add("c")
+
+    assert "a" in keys and "c" in keys and "b" not in keys
+
+
+def test_ratings_are_written_in_batches_and_rejected_when_full(monkeypatch):
+    monkeypatch.setattr(settings, "RATING_BUFFER_SIZE", 2)
+    monkeypatch.setattr(settings, "RATING_FLUSH_SIZE", 1)
+    driver = get_driver()
+
+    async def rate():
+        buffer = RatingBuffer(driver)
+        await buffer.put("user", "bar", 4.0)
+        await buffer.put("user", "museum", 2.0)
+        with pytest.raises(Unavailable):
+            await buffer.put("user", "bar", 5.0)
+        assert driver.graph.ratings.get("user", {}) == {}
+        assert await buffer.flush()
+
+    asyncio.run(rate())
+    assert driver.graph.ratings["user"] == {"bar": 4.0, "museum": 2.0}
+
+
+def test_journaled_ratings_are_replayed_on_start(monkeypatch, tmp_path):
+    path = tmp_path / "ratings.jsonl"
+    monkeypatch.setattr(settings, "RATING_JOURNAL_PATH", str(path))
+    driver = get_driver()
+
+    async def crash_before_flushing():
+        buffer = RatingBuffer(driver)
+        await buffer.start()
+        await buffer.put("user", "bar", 3.0)
+        buffer.task.cancel()
+        buffer.journal.close()
+        return buffer.journal_path
+
+    journal = asyncio.run(crash_before_flushing())
+    assert journal == f"{path}.{os.getpid()}"
+    with open(journal, encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [
+            {"userId": "user", "placeId": "bar", "rating": 3.0}
+        ]
+
+    async def restart():
+        buffer = RatingBuffer(driver)
+        await buffer.start()
+        await buffer.close()
+
+    asyncio.run(restart())
+    assert driver.graph.ratings["user"] == {"bar": 3.0}
+    assert os.listdir(tmp_path) == []
+
+
+def test_journals_of_running_processes_are_left_alone(monkeypatch, tmp_path):
+    path = tmp_path / "ratings.jsonl"
+    monkeypatch.setattr(settings, "RATING_JOURNAL_PATH", str(path))
+    driver = get_driver()
+
+    async def start_two_workers():
+        first, second = RatingBuffer(driver), RatingBuffer(driver)
+        await first.start()
+        await first.put("user", "bar", 3.0)
+        # Another worker of the same host, sharing the journal path
+        first.journal_path = str(tmp_path / "ratings.jsonl.1")
+        os.rename(f"{path}.{os.getpid()}", first.journal_path)
+        await second.start()
+        assert driver.graph.ratings.get("user", {}) == {}
+        with open(first.journal_path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 1
+        await second.close()
+        await first.close()
+
+    asyncio.run(start_two_workers())
+    assert driver.graph.ratings["user"] == {"bar": 3.0}
+
+
+def test_flush_writes_the_ratings_queued_before_it_and_drops_them_from_the_journal(
+    monkeypatch, tmp_path
+):
+    monkeypatch.setattr(settings, "RATING_JOURNAL_PATH", str(tmp_path / "ratings"))
+    driver = get_driver()
+
+    async def rate_while_flushing():
+        buffer = RatingBuffer(driver)
+        await buffer.start()
+        await buffer.put("user", "bar", 3.0)
+        write = buffer.write
+
+        async def write_and_rate(rows):
+            await write(rows)
+            await buffer.put("user", "museum", 2.0)
+
+        buffer.write = write_and_rate
+        assert await buffer.flush()
+        assert buffer.queue.qsize() == 1
+        with open(buffer.journal_path, encoding="utf-8") as f:
+            assert [json.loads(line) for line in f] == [
+                {"userId": "user", "placeId": "museum", "rating": 2.0}
+            ]
+        buffer.write = write
+        await buffer.close()
+
+    asyncio.run(rate_while_flushing())
+    assert driver.graph.ratings["user"] == {"bar": 3.0, "museum": 2.0}
+    assert os.listdir(tmp_path) == []
+
+
+def test_journal_failing_to_replay_is_kept_for_the_next_start(monkeypatch, tmp_path):
+    path = tmp_path / "ratings.jsonl"
+    monkeypatch.setattr(settings, "RATING_JOURNAL_PATH", str(path))
+    journal = tmp_path / "ratings.jsonl.1"
+    journal.write_text(json.dumps({"userId": "user", "placeId": "bar", "rating": 3.0}))
+
+    async def start_before_the_database():
+        buffer = RatingBuffer(get_driver())
+
+        async def unavailable(rows):
+            raise ServiceUnavailable("Database is starting")
+
+        buffer.write = unavailable
+        await buffer.start()
+        await buffer.close()
+
+    asyncio.run(start_before_the_database())
+    assert journal.exists()
+
+
+def test_rating_is_accepted_and_flushed_on_shutdown(monkeypatch):
+    monkeypatch.setattr(settings, "RATING_WRITE_BEHIND", True)
+    monkeypatch.setattr(settings, "RATING_FLUSH_INTERVAL_SECONDS", 60)
+    user = get_user_faker()
+    place = get_place_faker()
+
+    with TestClient(app) as client:
+        client.headers.update({settings.SERVICE_AK_HEADER: settings.SERVICE_API_KEY})
+        client.post(
+            "/users",
+            json={"userId": user.userId, "gender": user.gender, "born": user.born},
+        )
+        client.post("/places", json=place.model_dump())
+
+        response = client.post(f"/users/{user.userId}/rates/{place.placeId}/with/4")
+        assert response.status_code == 202
+        response = client.post(f"/users/{user.userId}/rates/unknown/with/4")
+        assert response.status_code == 404
+
+        graph = app.state.driver.graph
+        assert graph.ratings.get(user.userId, {}) == {}
+
+    assert graph.ratings[user.userId] == {place.placeId: 4.0}
@@ -0,0 +1,3 @@
+from neo4j_setup.cli import main
+
+main()
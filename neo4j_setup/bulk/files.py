@@ -0,0 +1,122 @@
+import csv
+import os
+import uuid
+from typing import Any
+
+# neo4j-admin database import headers, one entry per generated file. Relationship
+# files reference their nodes through the ID spaces declared in the node files.
+HEADERS: dict[str, list[str]] = {
+    "places": [
+        "placeId:ID(Place)",
+        "name",
+        "locality",
+        "country",
+        "region",
+        "postcode",
+        "freeform",
+        "confidence:float",
+        "yelpId",
+        "latitude:float",
+        "longitude:float",
+        "coordinates:point{crs:WGS-84}",
+        "contentHash",
+        "version",
+        ":LABEL",
+    ],
+    "categories": ["name:ID(Category)", ":LABEL"],
+    "features": ["name:ID(Feature)", ":LABEL"],
+    "users": ["userId:ID(User)", "born:date", "gender", ":LABEL"],
+    "in_category": [":START_ID(Place)", ":END_ID(Category)", ":TYPE"],
+    "has_feature": [":START_ID(Place)", ":END_ID(Feature)", ":TYPE"],
+    "needs_feature": [":START_ID(User)", ":END_ID(Feature)", ":TYPE"],
+    "rated": [":START_ID(User)", ":END_ID(Place)", "rating:float", ":TYPE"],
+}
+
+NODE_FILES = {
+    "places": "Place",
+    "categories": "Category",
+    "features": "Feature",
+    "users": "User",
+}
+RELATIONSHIP_FILES = {
+    "in_category": "IN_CATEGORY",
+    "has_feature": "HAS_FEATURE",
+    "needs_feature": "NEEDS_FEATURE",
+    "rated": "RATED",
+}
+
+
+def format_point(latitude: float, longitude: float) -> str:
+    return f"{{latitude:{latitude}, longitude:{longitude}}}"
+
+
+def place_row(place: dict[str, Any], yelp_id: str | None = None) -> list[Any]:
+    return [
+        place["placeId"],
+        place["name"],
+        place["locality"],
+        place["country"],
+        place["region"],
+        place["postcode"],
+        place["freeform"],
+        place["confidence"],
+        yelp_id,
+        place["latitude"],
+        place["longitude"],
+        format_point(place["latitude"], place["longitude"]),
+        place["contentHash"],
+        # Entity tag of the place, changed by every later write
+        str(uuid.uuid4()),
+        "Place",
+    ]
+
+
+class BulkFiles(object):
+    """Header plus data CSV files in neo4j-admin import format, written as rows
+    arrive so memory does not grow with the dataset."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.handles: dict[str, Any] = dict()
+        self.writers: dict[str, Any] = dict()
+        self.counts: dict[str, int] = dict()
+        os.makedirs(directory, exist_ok=True)
+
+    def header_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}_header.csv")
+
+    def data_path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.csv")
+
+    def write(self, name: str, row: list[Any]) -> None:
+        if name not in self.writers:
+            with open(self.header_path(name), "w", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerow(HEADERS[name])
+            self.handles[name] = open(
+                self.data_path(name), "w", newline="", encoding="utf-8"
+            )
+            self.writers[name] = csv.writer(self.handles[name])
+            self.counts[name] = 0
+
+        self.writers[name].writerow(row)
+        self.counts[name] = self.counts[name] + 1
+
+    def close(self) -> None:
+        for handle in self.handles.values():
+            handle.close()
+
+    def admin_import_command(self, database: str = "neo4j") -> str:
+        arguments = ["neo4j-admin database import full"]
+        # Labels and types are part of every row (:LABEL and :TYPE columns)
+        for name in NODE_FILES:
+            if name in self.counts:
+                arguments.append(
+                    f"--nodes={self.header_path(name)},{self.data_path(name)}"
+                )
+        for name in RELATIONSHIP_FILES:
+            if name in self.counts:
+                arguments.append(
+                    f"--relationships={self.header_path(name)},{self.data_path(name)}"
+                )
+        arguments.append(database)
+        return " \\\n    ".join(arguments)
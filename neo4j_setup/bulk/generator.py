@@ -0,0 +1,100 @@
+import argparse
+import csv
+import json
+import logging
+
+from neo4j_setup.bulk.files import BulkFiles, place_row
+from neo4j_setup.bulk.id_store import IdStore
+from neo4j_setup.importers.checkpoint import Checkpoint
+from neo4j_setup.importers.overturemaps_importer import OvertureMapsImporter
+from neo4j_setup.importers.yelp_reviews_importer import YelpReviewsImporter
+from neo4j_setup.importers.yelp_users_importer import YelpUsersImporter
+
+logger = logging.getLogger("neo4j_setup.bulk")
+
+
+def read_source(importer, file_path: str):
+    # Reuses the importers readers and transform stages, always from the beginning
+    checkpoint = Checkpoint(file_path)
+    for item, position in importer.reader(file_path).read(checkpoint):
+        row = importer.transform(item)
+        if row is not None:
+            yield row
+
+
+def load_place_map(file_path: str, by_yelp_id: IdStore, by_place_id: IdStore) -> None:
+    with open(file_path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            by_yelp_id.add(row["yelpId"], row["placeId"])
+            by_place_id.add(row["placeId"], row["yelpId"])
+
+
+def generate(args: argparse.Namespace) -> dict[str, int]:
+    files = BulkFiles(args.output)
+    places = IdStore(args.output, "places")
+    users = IdStore(args.output, "users")
+    yelp_to_place = IdStore(args.output, "yelp_to_place")
+    place_to_yelp = IdStore(args.output, "place_to_yelp")
+    ratings = IdStore(args.output, "ratings")
+    categories: set[str] = set()
+    stats = {
+        "duplicatePlaces": 0,
+        "duplicateUsers": 0,
+        "duplicateRatings": 0,
+        "unmappedReviews": 0,
+    }
+
+    try:
+        if args.yelp_place_map:
+            load_place_map(args.yelp_place_map, yelp_to_place, place_to_yelp)
+
+        if args.overture:
+            for place, place_categories in read_source(
+                OvertureMapsImporter(), args.overture
+            ):
+                if not places.add(place["placeId"]):
+                    stats["duplicatePlaces"] = stats["duplicatePlaces"] + 1
+                    continue
+
+                files.write(
+                    "places", place_row(place, place_to_yelp.get(place["placeId"]))
+                )
+
+                for name in dict.fromkeys(c["name"] for c in place_categories):
+                    if name not in categories:
+                        categories.add(name)
+                        files.write("categories", [name, "Category"])
+                    files.write("in_category", [place["placeId"], name, "IN_CATEGORY"])
+
+        if args.yelp_users:
+            for user in read_source(YelpUsersImporter(), args.yelp_users):
+                if not users.add(user["userId"]):
+                    stats["duplicateUsers"] = stats["duplicateUsers"] + 1
+                    continue
+                files.write("users", [user["userId"], None, None, "User"])
+
+        if args.yelp_reviews:
+            mapped = 0
+            for review in read_source(YelpReviewsImporter(), args.yelp_reviews):
+                placeId = yelp_to_place.get(review["yelpId"])
+                if placeId is None:
+                    stats["unmappedReviews"] = stats["unmappedReviews"] + 1
+                    continue
+                # One RATED relationship per user and place, as MERGE keeps
+                # online: a later review replaces the rating of an earlier one
+                ratings.set(
+                    json.dumps([review["userId"], placeId]), str(review["rating"])
+                )
+                mapped = mapped + 1
+            stats["duplicateRatings"] = mapped - len(ratings)
+            for key, rating in ratings.items():
+                userId, placeId = json.loads(key)
+                files.write("rated", [userId, placeId, float(rating), "RATED"])
+    finally:
+        files.close()
+        for store in [places, users, yelp_to_place, place_to_yelp, ratings]:
+            store.destroy()
+
+    logger.info(json.dumps({"event": "bulk", **files.counts, **stats}))
+    logger.info(files.admin_import_command())
+    return files.counts
@@ -0,0 +1,76 @@
+import os
+import sqlite3
+from typing import Iterator
+
+
+class IdStore(object):
+    """Disk backed set of identifiers, optionally mapped to a value, so that
+    deduplication and reference checks over millions of ids use bounded memory."""
+
+    def __init__(self, directory: str, name: str, durable: bool = False):
+        # One database per store: a single sqlite file would be locked by the
+        # pending inserts of whichever store wrote last
+        self.path = os.path.join(directory, f".{name}.ids.sqlite")
+        self.name = name
+        self.connection = sqlite3.connect(self.path)
+        if not durable:
+            self.connection.execute("PRAGMA journal_mode=OFF")
+            self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS ids (id TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.pending = 0
+
+    def add(self, id: str, value: str | None = None) -> bool:
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO ids (id, value) VALUES (?, ?)", (id, value)
+        )
+        self._maybe_commit()
+        return cursor.rowcount == 1
+
+    def set(self, id: str, value: str) -> None:
+        # Replaces the value of an id added before
+        self.connection.execute(
+            "INSERT OR REPLACE INTO ids (id, value) VALUES (?, ?)", (id, value)
+        )
+        self._maybe_commit()
+
+    def __contains__(self, id: str) -> bool:
+        cursor = self.connection.execute("SELECT 1 FROM ids WHERE id = ?", (id,))
+        return cursor.fetchone() is not None
+
+    def get(self, id: str) -> str | None:
+        cursor = self.connection.execute("SELECT value FROM ids WHERE id = ?", (id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT count(*) FROM ids").fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        self.commit()
+        for row in self.connection.execute("SELECT id FROM ids ORDER BY id"):
+            yield row[0]
+
+    def items(self) -> Iterator[tuple[str, str | None]]:
+        self.commit()
+        for row in self.connection.execute("SELECT id, value FROM ids ORDER BY id"):
+            yield row[0], row[1]
+
+    def _maybe_commit(self) -> None:
+        self.pending = self.pending + 1
+        if self.pending >= 50000:
+            self.commit()
+
+    def commit(self) -> None:
+        self.connection.commit()
+        self.pending = 0
+
+    def close(self) -> None:
+        self.commit()
+        self.connection.close()
+
+    def destroy(self) -> None:
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
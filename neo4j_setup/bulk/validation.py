@@ -0,0 +1,69 @@
+import argparse
+import csv
+import json
+import logging
+import os
+
+from neo4j_setup.bulk.files import BulkFiles, HEADERS, NODE_FILES, RELATIONSHIP_FILES
+from neo4j_setup.bulk.id_store import IdStore
+
+logger = logging.getLogger("neo4j_setup.bulk")
+
+
+def id_space(column: str) -> str:
+    # "placeId:ID(Place)" and ":START_ID(Place)" both belong to the Place space
+    return column[column.index("(") + 1 : column.index(")")]
+
+
+def validate(args: argparse.Namespace) -> bool:
+    files = BulkFiles(args.output)
+    stores: dict[str, IdStore] = dict()
+    report: dict[str, int] = dict()
+    errors = 0
+
+    try:
+        for name in NODE_FILES:
+            if not os.path.exists(files.data_path(name)):
+                continue
+            column = HEADERS[name][0]
+            space = id_space(column)
+            stores[space] = IdStore(args.output, "validation_" + space)
+            # Places without a version would be served without an ETag
+            version = HEADERS[name].index("version") if name == "places" else None
+            duplicates = 0
+            unversioned = 0
+            with open(files.data_path(name), newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    if not stores[space].add(row[0]):
+                        duplicates = duplicates + 1
+                    if version is not None and not row[version]:
+                        unversioned = unversioned + 1
+            report[f"{name}.duplicateIds"] = duplicates
+            errors = errors + duplicates
+            if version is not None:
+                report[f"{name}.missingVersions"] = unversioned
+                errors = errors + unversioned
+
+        for name in RELATIONSHIP_FILES:
+            if not os.path.exists(files.data_path(name)):
+                continue
+            header = HEADERS[name]
+            start = header.index(next(c for c in header if ":START_ID" in c))
+            end = header.index(next(c for c in header if ":END_ID" in c))
+            start_store = stores.get(id_space(header[start]))
+            end_store = stores.get(id_space(header[end]))
+            dangling = 0
+            with open(files.data_path(name), newline="", encoding="utf-8") as f:
+                for row in csv.reader(f):
+                    if start_store is None or row[start] not in start_store:
+                        dangling = dangling + 1
+                    elif end_store is None or row[end] not in end_store:
+                        dangling = dangling + 1
+            report[f"{name}.danglingReferences"] = dangling
+            errors = errors + dangling
+    finally:
+        for store in stores.values():
+            store.destroy()
+
+    logger.info(json.dumps({"event": "validation", "valid": errors == 0, **report}))
+    return errors == 0
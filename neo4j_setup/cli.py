@@ -0,0 +1,239 @@
+import argparse
+import asyncio
+import logging
+import sys
+
+from app.config.migrations import migrate
+from app.config.neo4j import create_driver
+from neo4j_setup.bulk.generator import generate
+from neo4j_setup.bulk.validation import validate
+from neo4j_setup.importers.gmaps_reviews_importer import GmapsReviewsImporter
+from neo4j_setup.importers.overturemaps_importer import OvertureMapsImporter
+from neo4j_setup.importers.pipeline import Importer, run_import
+from neo4j_setup.importers.yelp_places_importer import YelpPlacesImporter
+from neo4j_setup.importers.yelp_reviews_importer import YelpReviewsImporter
+from neo4j_setup.importers.yelp_users_importer import YelpUsersImporter
+from neo4j_setup.synthetic.generator import DEFAULT_BBOX, SCALES, SyntheticGraph
+from neo4j_setup.synthetic.sinks import write_csv, write_neo4j
+
+IMPORTERS: dict[str, type[Importer]] = {
+    importer.kind: importer
+    for importer in [
+        OvertureMapsImporter,
+        GmapsReviewsImporter,
+        YelpPlacesImporter,
+        YelpUsersImporter,
+        YelpReviewsImporter,
+    ]
+}
+
+
+async def import_command(args: argparse.Namespace) -> None:
+    importer = IMPORTERS[args.kind](args)
+    driver = None
+    if not args.dry_run:
+        driver = await create_driver()
+    try:
+        if driver is not None and not args.skip_schema:
+            await migrate(driver)
+        await run_import(importer, args, driver)
+    finally:
+        if driver is not None:
+            await driver.close()
+
+
+async def migrate_command(args: argparse.Namespace) -> None:
+    driver = await create_driver()
+    try:
+        applied = await migrate(driver)
+        print(f"Applied migrations: {applied}" if applied else "Schema up to date")
+    finally:
+        await driver.close()
+
+
+async def bulk_command(args: argparse.Namespace) -> None:
+    generate(args)
+    if not args.skip_validation and not validate(args):
+        sys.exit(1)
+
+
+async def bulk_validate_command(args: argparse.Namespace) -> None:
+    if not validate(args):
+        sys.exit(1)
+
+
+def build_synthetic_graph(args: argparse.Namespace) -> SyntheticGraph:
+    scale = SCALES[args.scale]
+    return SyntheticGraph(
+        places=args.places or scale["places"],
+        users=args.users or scale["users"],
+        categories=args.categories or scale["categories"],
+        cities=args.cities or scale["cities"],
+        features=args.features,
+        seed=args.seed,
+        category_skew=args.category_skew,
+        city_skew=args.city_skew,
+        city_spread_km=args.city_spread_km,
+        rating_alpha=args.rating_alpha,
+        mean_ratings=args.mean_ratings,
+        bbox=tuple(args.bbox),
+    )
+
+
+async def synthesize_command(args: argparse.Namespace) -> None:
+    graph = build_synthetic_graph(args)
+    if args.target == "csv":
+        write_csv(graph, args.output)
+        if not validate(args):
+            sys.exit(1)
+        return
+
+    driver = await create_driver()
+    try:
+        if not args.skip_schema:
+            await migrate(driver)
+        await write_neo4j(graph, driver, args.batch_size, args.max_retries)
+    finally:
+        await driver.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m neo4j_setup", description="Place recommendation data tools"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="Import a source file into Neo4j")
+    importer.add_argument("kind", choices=sorted(IMPORTERS.keys()))
+    importer.add_argument("file", help="Input file to import")
+    importer.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the last committed batch recorded in the checkpoint file",
+    )
+    importer.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Parse and transform the input without writing to the database",
+    )
+    importer.add_argument(
+        "--checkpoint",
+        default=None,
+        help="Checkpoint file path (defaults to <file>.checkpoint.json)",
+    )
+    importer.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Rows per write transaction (defaults to the importer batch size)",
+    )
+    importer.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Retries of a failed batch on retryable errors",
+    )
+    importer.add_argument(
+        "--skip-schema",
+        action="store_true",
+        help="Do not apply pending schema migrations before importing",
+    )
+    importer.add_argument(
+        "--delta",
+        action="store_true",
+        help="Only write places whose content hash changed (overturemaps)",
+    )
+    importer.add_argument(
+        "--delete-missing",
+        action="store_true",
+        help="With --delta, remove places of the imported countries that are "
+        "missing from the file (overturemaps)",
+    )
+    importer.set_defaults(handler=import_command)
+
+    migrate_parser = commands.add_parser(
+        "migrate",
+        help="Apply pending schema migrations and wait for the indexes to be online",
+    )
+    migrate_parser.set_defaults(handler=migrate_command)
+
+    bulk = commands.add_parser(
+        "bulk", help="Generate neo4j-admin database import CSV files"
+    )
+    bulk.add_argument("output", help="Directory for the header and data files")
+    bulk.add_argument("--overture", help="Overture Maps places GeoJSON file")
+    bulk.add_argument("--yelp-users", help="Yelp users JSON lines file")
+    bulk.add_argument("--yelp-reviews", help="Yelp reviews JSON lines file")
+    bulk.add_argument(
+        "--yelp-place-map",
+        help="CSV file with yelpId,placeId columns linking Yelp businesses to places; "
+        "reviews of unmapped businesses are skipped",
+    )
+    bulk.add_argument(
+        "--skip-validation",
+        action="store_true",
+        help="Do not check ID references of the generated files",
+    )
+    bulk.set_defaults(handler=bulk_command)
+
+    bulk_validate = commands.add_parser(
+        "bulk-validate", help="Check ID references of generated bulk import files"
+    )
+    bulk_validate.add_argument("output", help="Directory of the generated files")
+    bulk_validate.set_defaults(handler=bulk_validate_command)
+
+    synthesize = commands.add_parser(
+        "synthesize", help="Generate a deterministic synthetic graph for benchmarks"
+    )
+    synthesize.add_argument("--target", choices=["neo4j", "csv"], default="neo4j")
+    synthesize.add_argument(
+        "--output", default="./synthetic", help="Directory of the CSV target"
+    )
+    synthesize.add_argument("--scale", choices=sorted(SCALES.keys()), default="10k")
+    synthesize.add_argument("--seed", type=int, default=42)
+    synthesize.add_argument("--places", type=int, help="Overrides the scale preset")
+    synthesize.add_argument("--users", type=int, help="Overrides the scale preset")
+    synthesize.add_argument("--categories", type=int, help="Overrides the scale preset")
+    synthesize.add_argument("--cities", type=int, help="Overrides the scale preset")
+    synthesize.add_argument("--features", type=int, default=30)
+    synthesize.add_argument(
+        "--category-skew",
+        type=float,
+        default=1.1,
+        help="Zipf exponent of the category popularity",
+    )
+    synthesize.add_argument(
+        "--city-skew", type=float, default=1.0, help="Zipf exponent of the city sizes"
+    )
+    synthesize.add_argument(
+        "--city-spread-km",
+        type=float,
+        default=3.0,
+        help="Standard deviation of the places around their city center",
+    )
+    synthesize.add_argument(
+        "--rating-alpha",
+        type=float,
+        default=1.5,
+        help="Pareto shape of the number of ratings per user (must be > 1)",
+    )
+    synthesize.add_argument("--mean-ratings", type=float, default=20.0)
+    synthesize.add_argument(
+        "--bbox",
+        type=float,
+        nargs=4,
+        default=list(DEFAULT_BBOX),
+        metavar=("SOUTH", "WEST", "NORTH", "EAST"),
+    )
+    synthesize.add_argument("--batch-size", type=int, default=5000)
+    synthesize.add_argument("--max-retries", type=int, default=5)
+    synthesize.add_argument("--skip-schema", action="store_true")
+    synthesize.set_defaults(handler=synthesize_command)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+    args = build_parser().parse_args(argv)
+    asyncio.run(args.handler(args))
@@ -0,0 +1,70 @@
+import datetime
+import json
+import os
+from typing import Any
+
+
+class Checkpoint(object):
+    """Committed position of an importer inside its input file.
+
+    Line based inputs (Yelp JSON lines) are resumed by byte offset, GeoJSON
+    inputs parsed with ijson are resumed by item index.
+    """
+
+    def __init__(self, file_path: str, checkpoint_path: str | None = None):
+        self.file_path = os.path.abspath(file_path)
+        self.path = checkpoint_path or self.file_path + ".checkpoint.json"
+        self.offset = 0
+        self.line = 0
+        self.item = 0
+
+    def _fingerprint(self) -> dict[str, Any]:
+        stat = os.stat(self.file_path)
+        return {"size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("file") != self.file_path:
+            raise ValueError(
+                f"Checkpoint {self.path} belongs to {data.get('file')}, not to {self.file_path}"
+            )
+        if data.get("fingerprint") != self._fingerprint():
+            raise ValueError(
+                f"Input file {self.file_path} has changed since checkpoint {self.path} was written"
+            )
+
+        self.offset = data.get("offset", 0)
+        self.line = data.get("line", 0)
+        self.item = data.get("item", 0)
+        return True
+
+    def save(self, offset: int = 0, line: int = 0, item: int = 0) -> None:
+        self.offset = offset
+        self.line = line
+        self.item = item
+
+        data = {
+            "file": self.file_path,
+            "fingerprint": self._fingerprint(),
+            "offset": offset,
+            "line": line,
+            "item": item,
+            "savedAt": datetime.datetime.now().isoformat(),
+        }
+
+        # Write to a temporary file first so a crash never leaves a truncated checkpoint
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,33 +1,32 @@
-import datetime
-from typing import cast, LiteralString
-import ijson
-import os
-import sys
-import asyncio
-
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
-
-from app.config.settings import settings
-from app.config.neo4j import setup_db
-
-BULK_IMPORT_QUERY = """
-UNWIND $batch AS row
-CALL (row) {
+import argparse
+import time
+from typing import Any, LiteralString, cast
+
+from neo4j import AsyncDriver, AsyncManagedTransaction
+
+from neo4j_setup.importers.metrics import ImportMetrics
+from neo4j_setup.importers.pipeline import Importer
+from neo4j_setup.importers.sources import GeoJsonFeatureReader
+from neo4j_setup.importers.venue_clustering import VenueClusters
+
+# Matches every distinct venue of the batch with its most similar place nearby.
+# Venues without candidates are not returned.
+VENUE_MATCH_QUERY = """
+UNWIND $venues AS venue
+CALL (venue) {
     WITH 
-    row, 
-    point({latitude: row.latitude, longitude: row.longitude}) AS refPoint, 
+    venue, 
+    point({latitude: venue.latitude, longitude: venue.longitude}) AS refPoint, 
     400 AS radio
     
     MATCH (p:Place) 
     WHERE point.distance(refPoint, p.coordinates) < radio 
-    AND apoc.text.sorensenDiceSimilarity(p.name, row.name) >= 0.5
+    AND apoc.text.sorensenDiceSimilarity(p.name, venue.name) >= 0.5
     
     WITH
     p, 
     radio,
-    apoc.text.sorensenDiceSimilarity(p.name, row.name) AS score, 
+    apoc.text.sorensenDiceSimilarity(p.name, venue.name) AS score, 
     point.distance(refPoint, p.coordinates) AS distance
     
     WITH p, score, (1 - (distance/radio)) AS finalDistance
@@ -37,11 +36,17 @@ CALL (row) {
     RETURN p
     LIMIT 1
 }
+RETURN venue.key AS key, p.placeId AS placeId
+"""
+
+BULK_IMPORT_QUERY = """
+UNWIND $batch AS row
+MATCH (p:Place {placeId: row.placeId})
 MATCH (u:User {userId: row.userId})
 MERGE (u)-[r:RATED]->(p)
 SET r.rating = row.rating
 SET r.ratedAt = datetime(row.ratedAt)
-RETURN p AS place
+RETURN count(r) AS written
 """
 
 USER_ID = "0"
@@ -63,19 +68,19 @@ def get_country(location):
             return ""
 
 
-async def import_data(file_path: str) -> None:
-    driver = await setup_db()
+class GmapsReviewsImporter(Importer):
+    kind = "gmaps-reviews"
+    description = "Import Google Maps reviews"
+    reader = GeoJsonFeatureReader
+    query = BULK_IMPORT_QUERY
 
-    i = 0
-    created = 0
-    limit = 10000
-    buffer = list()
+    def __init__(self, args: argparse.Namespace | None = None):
+        super().__init__(args)
+        self.clusters = VenueClusters()
 
-    for item in ijson.items(open(file_path, "r", encoding="utf-8"), "features.item"):
+    def transform(self, item: dict[str, Any]) -> dict[str, Any] | None:
         if not "properties" in item or not "location" in item["properties"]:
-            # print('INVALID ITEM')
-            # print(item)
-            continue
+            return None
 
         review = {
             "userId": USER_ID,
@@ -86,38 +91,26 @@ async def import_data(file_path: str) -> None:
             "latitude": float(item["geometry"]["coordinates"][1]),
             "longitude": float(item["geometry"]["coordinates"][0]),
         }
-
-        buffer.append(review)
-
-        i = i + 1
-        if i >= limit:
-            async with driver.session(database=settings.NEO4J_DATABASE) as session:
-                now = datetime.datetime.now()
-                print(f"Executing import query at {i} review...")
-
-                result = await session.run(
-                    cast(LiteralString, BULK_IMPORT_QUERY), batch=buffer
-                )
-
-                items = [item.get("place") async for item in result]
-                created = created + len(items)
-
-                buffer = list()
-                diff = datetime.datetime.now() - now
-                print(f"Last batch has taken {diff.total_seconds()} seconds")
-
-    if len(buffer) > 0:
-        async with driver.session(database=settings.NEO4J_DATABASE) as session:
-            print(f"Executing import query at {i} review...")
-            result = await session.run(
-                cast(LiteralString, BULK_IMPORT_QUERY), batch=buffer
-            )
-
-            items = [item.get("place") async for item in result]
-            created = created + len(items)
-
-    print(f"Reviews seen: {i}. {created} reviews created")
-
-
-if __name__ == "__main__":
-    loop = asyncio.run(import_data(sys.argv[1]))
+        review["venue"] = self.clusters.add(review)
+        return review
+
+    async def write(self, tx: AsyncManagedTransaction, batch: list[Any]) -> int:
+        venues = self.clusters.unresolved([review["venue"] for review in batch])
+        if len(venues) > 0:
+            now = time.perf_counter()
+            result = await tx.run(cast(LiteralString, VENUE_MATCH_QUERY), venues=venues)
+            matches = {record["key"]: record["placeId"] async for record in result}
+            self.clusters.resolve(venues, matches, time.perf_counter() - now)
+
+        rows = list()
+        for review in batch:
+            placeId = self.clusters.resolved.get(review["venue"])
+            if placeId is not None:
+                rows.append({**review, "placeId": placeId})
+
+        result = await tx.run(cast(LiteralString, BULK_IMPORT_QUERY), batch=rows)
+        record = await result.single()
+        return record.get("written") if record else 0
+
+    async def finish(self, metrics: ImportMetrics, driver: AsyncDriver | None) -> None:
+        metrics.emit("venues", **self.clusters.summary())
@@ -0,0 +1,72 @@
+import json
+import logging
+import time
+from typing import Any
+
+logger = logging.getLogger("neo4j_setup.import")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class ImportMetrics(object):
+    """Throughput and latency counters of a single import run, logged as one
+    JSON object per line so they can be parsed by log collectors."""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.read = 0
+        self.skipped = 0
+        self.written = 0
+        self.batches = 0
+        self.retries = 0
+        self.failures = 0
+        self.batch_latencies: list[float] = list()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def throughput(self) -> float:
+        elapsed = self.elapsed
+        return self.read / elapsed if elapsed > 0 else 0.0
+
+    def emit(self, event: str, **fields: Any) -> None:
+        logger.info(json.dumps({"event": event, "kind": self.kind, **fields}))
+
+    def record_batch(self, rows: int, written: int, latency: float) -> None:
+        self.batches = self.batches + 1
+        self.written = self.written + written
+        self.batch_latencies.append(latency)
+        self.emit(
+            "batch",
+            batch=self.batches,
+            rows=rows,
+            written=written,
+            latencyMs=round(latency * 1000, 2),
+            read=self.read,
+            itemsPerSecond=round(self.throughput(), 2),
+        )
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "read": self.read,
+            "skipped": self.skipped,
+            "written": self.written,
+            "batches": self.batches,
+            "retries": self.retries,
+            "failures": self.failures,
+            "elapsedSeconds": round(self.elapsed, 3),
+            "itemsPerSecond": round(self.throughput(), 2),
+            "batchLatencyMs": {
+                "p50": round(percentile(self.batch_latencies, 50) * 1000, 2),
+                "p95": round(percentile(self.batch_latencies, 95) * 1000, 2),
+                "max": round(max(self.batch_latencies, default=0) * 1000, 2),
+            },
+        }
@@ -1,37 +1,124 @@
-import datetime
-from typing import cast, LiteralString
-import ijson
+import argparse
+import hashlib
+import json
 import os
-import sys
+from typing import Any, LiteralString, cast
 
-project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
+from neo4j import AsyncDriver, AsyncManagedTransaction
 
 from app.config.settings import settings
-from app.config.neo4j import setup_db
 from app.dto.category import SingleCategory
 from app.dto.place import SinglePlace
+from neo4j_setup.bulk.id_store import IdStore
+from neo4j_setup.importers.metrics import ImportMetrics
+from neo4j_setup.importers.pipeline import Importer
+from neo4j_setup.importers.sources import GeoJsonFeatureReader
 
 BULK_IMPORT_QUERY = """
 UNWIND $batch AS row
 MERGE (p:Place {placeId: row[0].placeId})
 SET p += row[0]
 SET p.coordinates = point({latitude: row[0].latitude, longitude: row[0].longitude})
+SET p.version = randomUUID()
 FOREACH (cat IN row[1] |
     MERGE (c:Category {name: cat.name})
     MERGE (p)-[:IN_CATEGORY]->(c)
 )
+RETURN count(p) AS written
 """
 
+HASH_LOOKUP_QUERY = """
+UNWIND $ids AS id
+MATCH (p:Place {placeId: id})
+RETURN p.placeId AS placeId, p.contentHash AS contentHash
+"""
+
+# Changed places may also have lost categories since the previous release
+DELTA_IMPORT_QUERY = """
+UNWIND $batch AS row
+MERGE (p:Place {placeId: row[0].placeId})
+SET p += row[0]
+SET p.coordinates = point({latitude: row[0].latitude, longitude: row[0].longitude})
+SET p.version = randomUUID()
+WITH p, row
+CALL (p, row) {
+    MATCH (p)-[old:IN_CATEGORY]->(c:Category)
+    WHERE NOT c.name IN [cat IN row[1] | cat.name]
+    DELETE old
+}
+FOREACH (cat IN row[1] |
+    MERGE (c:Category {name: cat.name})
+    MERGE (p)-[:IN_CATEGORY]->(c)
+)
+RETURN count(p) AS written
+"""
+
+# Only places imported from Overture Maps have a content hash: places created
+# through the API or by other sources are never candidates for removal
+EXISTING_IDS_QUERY = """
+MATCH (p:Place)
+WHERE p.placeId > $after AND p.country IN $countries AND p.contentHash IS NOT NULL
+RETURN p.placeId AS placeId
+ORDER BY p.placeId
+LIMIT $limit
+"""
+
+DELETE_QUERY = """
+UNWIND $ids AS id
+MATCH (p:Place {placeId: id})
+DETACH DELETE p
+RETURN count(*) AS removed
+"""
+
+HASHED_FIELDS = [
+    "name",
+    "freeform",
+    "locality",
+    "country",
+    "postcode",
+    "region",
+    "latitude",
+    "longitude",
+    "confidence",
+]
+
 
-async def import_data(file_path: str) -> None:
-    driver = await setup_db()
-    i = 0
-    limit = 10000
-    buffer = list()
+def content_hash(place: dict[str, Any], categories: list[dict[str, Any]]) -> str:
+    content = [place.get(field) for field in HASHED_FIELDS]
+    content.append(sorted({cat["name"] for cat in categories}))
+    return hashlib.sha1(
+        json.dumps(content, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
 
-    for item in ijson.items(open(file_path, "r"), "features.item"):
+
+class OvertureMapsImporter(Importer):
+    kind = "overturemaps"
+    description = "Import Overture Maps places and categories"
+    reader = GeoJsonFeatureReader
+    query = BULK_IMPORT_QUERY
+    delete_batch_size = 1000
+
+    def __init__(self, args: argparse.Namespace | None = None):
+        super().__init__(args)
+        self.delta = bool(args and args.delta and not args.dry_run)
+        self.delete_missing = bool(self.delta and args.delete_missing)
+        self.counts = {"created": 0, "changed": 0, "unchanged": 0, "removed": 0}
+        self.batch_counts: dict[str, int] = dict()
+        self.batch_places: list[dict[str, Any]] = list()
+
+        if self.delete_missing:
+            # Ids and countries of the release seen so far, kept next to the input
+            # file so that a resumed import still knows every place it has seen
+            directory = os.path.dirname(os.path.abspath(args.file))
+            name = os.path.basename(args.file)
+            self.seen = IdStore(directory, name + ".delta_seen", durable=True)
+            self.countries = IdStore(directory, name + ".delta_countries", durable=True)
+            if not args.resume:
+                for store in [self.seen, self.countries]:
+                    store.connection.execute("DELETE FROM ids")
+                    store.commit()
+
+    def transform(self, item: dict[str, Any]) -> list[Any]:
         place = SinglePlace(
             placeId=item["properties"]["id"],
             name=(
@@ -83,27 +170,111 @@ async def import_data(file_path: str) -> None:
                     ).model_dump()
                 )
 
-        buffer.append([place, categories])
+        place["contentHash"] = content_hash(place, categories)
+        return [place, categories]
+
+    async def write(self, tx: AsyncManagedTransaction, batch: list[Any]) -> int:
+        self.batch_places = [row[0] for row in batch]
+        if not self.delta:
+            return await super().write(tx, batch)
+
+        result = await tx.run(
+            cast(LiteralString, HASH_LOOKUP_QUERY),
+            ids=[row[0]["placeId"] for row in batch],
+        )
+        hashes = {record["placeId"]: record["contentHash"] async for record in result}
+
+        # Counters of the current attempt only: they are added to the totals once
+        # the transaction is committed
+        self.batch_counts = {"created": 0, "changed": 0, "unchanged": 0}
+        changed = list()
+        for row in batch:
+            placeId = row[0]["placeId"]
+            if placeId not in hashes:
+                self.batch_counts["created"] = self.batch_counts["created"] + 1
+            elif hashes[placeId] != row[0]["contentHash"]:
+                self.batch_counts["changed"] = self.batch_counts["changed"] + 1
+            else:
+                self.batch_counts["unchanged"] = self.batch_counts["unchanged"] + 1
+                continue
+            changed.append(row)
+
+        if len(changed) == 0:
+            return 0
 
-        i = i + 1
-        if len(buffer) == limit:
+        result = await tx.run(cast(LiteralString, DELTA_IMPORT_QUERY), batch=changed)
+        record = await result.single()
+        return record.get("written") if record else 0
+
+    def committed(self) -> None:
+        for key, value in self.batch_counts.items():
+            self.counts[key] = self.counts[key] + value
+        self.batch_counts = dict()
+
+        if self.delete_missing:
+            for place in self.batch_places:
+                self.seen.add(place["placeId"])
+                if place["country"]:
+                    self.countries.add(place["country"])
+            self.seen.commit()
+            self.countries.commit()
+
+    async def remove_missing(self, driver: AsyncDriver) -> None:
+        # Only places of the countries present in the release are candidates, so a
+        # regional extract does not remove the rest of the catalog
+        countries = list(self.countries)
+        missing = list()
+        after = ""
+
+        async def remove() -> None:
             async with driver.session(database=settings.NEO4J_DATABASE) as session:
-                now = datetime.datetime.now()
-                print(f"Executing import query at {i} place...")
-                await session.run(cast(LiteralString, BULK_IMPORT_QUERY), batch=buffer)
-                buffer = list()
-                diff = datetime.datetime.now() - now
-                print(f"Last batch has taken {diff.total_seconds()} seconds")
+                result = await session.execute_write(
+                    lambda tx: self._remove(tx, missing)
+                )
+            self.counts["removed"] = self.counts["removed"] + result
+            missing.clear()
 
-    if len(buffer) > 0:
-        async with driver.session(database=settings.NEO4J_DATABASE) as session:
-            print(f"Executing import query at {i} place...")
-            await session.run(cast(LiteralString, BULK_IMPORT_QUERY), batch=buffer)
+        while True:
+            async with driver.session(database=settings.NEO4J_DATABASE) as session:
+                page = await session.execute_read(
+                    self._existing_ids, after, countries, 10000
+                )
+            if len(page) == 0:
+                break
+            after = page[-1]
+            for placeId in page:
+                if placeId not in self.seen:
+                    missing.append(placeId)
+            # Deleting while paging is safe: pages are keyed by placeId, not offset
+            if len(missing) >= self.delete_batch_size:
+                await remove()
 
-    print(f"Places seen: {i}")
+        if len(missing) > 0:
+            await remove()
 
+    @staticmethod
+    async def _existing_ids(
+        tx: AsyncManagedTransaction, after: str, countries: list[str], limit: int
+    ) -> list[str]:
+        result = await tx.run(
+            cast(LiteralString, EXISTING_IDS_QUERY),
+            after=after,
+            countries=countries,
+            limit=limit,
+        )
+        return [record["placeId"] async for record in result]
 
-if __name__ == "__main__":
-    import asyncio
+    @staticmethod
+    async def _remove(tx: AsyncManagedTransaction, ids: list[str]) -> int:
+        result = await tx.run(cast(LiteralString, DELETE_QUERY), ids=ids)
+        record = await result.single()
+        return record.get("removed") if record else 0
 
-    asyncio.run(import_data(sys.argv[1]))
+    async def finish(self, metrics: ImportMetrics, driver: AsyncDriver | None) -> None:
+        if not self.delta:
+            return
+        if self.delete_missing and driver is not None:
+            await self.remove_missing(driver)
+            self.seen.destroy()
+            self.countries.destroy()
+        metrics.emit("delta", **self.counts)
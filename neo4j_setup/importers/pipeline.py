@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, LiteralString, cast
+
+from neo4j import AsyncDriver, AsyncManagedTransaction
+from neo4j.exceptions import DriverError, Neo4jError
+
+from app.config.settings import settings
+from neo4j_setup.importers.checkpoint import Checkpoint
+from neo4j_setup.importers.metrics import ImportMetrics
+from neo4j_setup.importers.sources import SourceReader, JsonLinesReader
+
+
+class Importer(object):
+    """Base class of every importer: a source reader, a transform stage that maps
+    each raw item to a batch row (or None to skip it) and a batch write query
+    returning the number of written rows as ``written``."""
+
+    kind: str = ""
+    description: str = ""
+    reader: type[SourceReader] = JsonLinesReader
+    query: str = ""
+    batch_size: int = 10000
+
+    def __init__(self, args: argparse.Namespace | None = None):
+        self.args = args
+
+    def parameters(self) -> dict[str, Any]:
+        return {}
+
+    def transform(self, item: Any) -> Any | None:
+        return item
+
+    def committed(self) -> None:
+        # Called once the last written batch is committed, before checkpointing it
+        return
+
+    async def finish(self, metrics: ImportMetrics, driver: AsyncDriver | None) -> None:
+        return
+
+    async def write(self, tx: AsyncManagedTransaction, batch: list[Any]) -> int:
+        result = await tx.run(
+            cast(LiteralString, self.query), batch=batch, **self.parameters()
+        )
+        record = await result.single()
+        return record.get("written") if record else 0
+
+
+class BatchWriter(object):
+    """Writes batches inside managed write transactions, retrying retryable
+    errors with exponential backoff and jitter."""
+
+    def __init__(
+        self,
+        driver: AsyncDriver,
+        importer: Importer,
+        metrics: ImportMetrics,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+    ):
+        self.driver = driver
+        self.importer = importer
+        self.metrics = metrics
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+
+    async def write(self, batch: list[Any]) -> int:
+        attempt = 0
+        while True:
+            try:
+                async with self.driver.session(
+                    database=settings.NEO4J_DATABASE
+                ) as session:
+                    return await session.execute_write(self.importer.write, batch)
+            except (Neo4jError, DriverError) as e:
+                if not e.is_retryable() or attempt >= self.max_retries:
+                    self.metrics.failures = self.metrics.failures + 1
+                    raise
+                attempt = attempt + 1
+                self.metrics.retries = self.metrics.retries + 1
+                delay = (
+                    self.base_delay * (2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+                )
+                self.metrics.emit(
+                    "retry", attempt=attempt, delaySeconds=round(delay, 3), error=str(e)
+                )
+                await asyncio.sleep(delay)
+
+
+async def run_import(
+    importer: Importer, args: argparse.Namespace, driver: AsyncDriver | None
+) -> ImportMetrics:
+    metrics = ImportMetrics(importer.kind)
+    checkpoint = Checkpoint(args.file, args.checkpoint)
+    if args.resume and checkpoint.load():
+        metrics.emit(
+            "resume",
+            file=args.file,
+            line=checkpoint.line,
+            offset=checkpoint.offset,
+            item=checkpoint.item,
+        )
+    elif not args.dry_run:
+        checkpoint.clear()
+
+    writer = (
+        BatchWriter(driver, importer, metrics, max_retries=args.max_retries)
+        if not args.dry_run
+        else None
+    )
+    batch_size = args.batch_size or importer.batch_size
+    buffer = list()
+    position = None
+
+    async def flush() -> None:
+        if writer is not None:
+            now = time.perf_counter()
+            written = await writer.write(buffer)
+            metrics.record_batch(len(buffer), written, time.perf_counter() - now)
+            importer.committed()
+            checkpoint.save(**position)
+        else:
+            metrics.batches = metrics.batches + 1
+        buffer.clear()
+
+    for item, position in importer.reader(args.file).read(checkpoint):
+        metrics.read = metrics.read + 1
+        row = importer.transform(item)
+        if row is None:
+            metrics.skipped = metrics.skipped + 1
+            continue
+
+        buffer.append(row)
+        if len(buffer) >= batch_size:
+            await flush()
+
+    if len(buffer) > 0:
+        await flush()
+    elif position is not None and writer is not None:
+        # Skipped trailing items are committed as well
+        checkpoint.save(**position)
+
+    await importer.finish(metrics, driver if not args.dry_run else None)
+    metrics.emit("summary", dryRun=args.dry_run, **metrics.summary())
+    return metrics
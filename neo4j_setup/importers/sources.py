@@ -0,0 +1,49 @@
+import abc
+import json
+from typing import Any, Iterator
+
+import ijson
+
+from neo4j_setup.importers.checkpoint import Checkpoint
+
+
+class SourceReader(abc.ABC):
+    """Streams the raw items of an input file together with the checkpoint
+    position reached right after each of them."""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    @abc.abstractmethod
+    def read(self, checkpoint: Checkpoint) -> Iterator[tuple[Any, dict[str, int]]]:
+        pass
+
+
+class JsonLinesReader(SourceReader):
+    def read(
+        self, checkpoint: Checkpoint
+    ) -> Iterator[tuple[dict[str, Any], dict[str, int]]]:
+        with open(self.file_path, "rb") as f:
+            f.seek(checkpoint.offset)
+            line = checkpoint.line
+            while True:
+                raw = f.readline()
+                if not raw:
+                    break
+                line = line + 1
+                if not raw.strip():
+                    continue
+                yield json.loads(raw), {"offset": f.tell(), "line": line}
+
+
+class GeoJsonFeatureReader(SourceReader):
+    def read(
+        self, checkpoint: Checkpoint
+    ) -> Iterator[tuple[dict[str, Any], dict[str, int]]]:
+        # ijson reads ahead, so there is no reliable byte offset per item: resuming
+        # parses the skipped items again but does not transform nor write them
+        with open(self.file_path, "rb") as f:
+            for index, item in enumerate(ijson.items(f, "features.item")):
+                if index < checkpoint.item:
+                    continue
+                yield item, {"item": index + 1}
@@ -0,0 +1,71 @@
+import re
+import unicodedata
+from typing import Any
+
+# ~55 meters of latitude: reviews of the same venue share its coordinates, so a
+# small grid is enough to group them while keeping neighbouring venues apart
+DEFAULT_CELL_DEGREES = 0.0005
+
+
+def normalize_name(name: str) -> str:
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = re.sub(r"[^\w\s]", " ", name.lower())
+    return " ".join(name.split())
+
+
+class VenueClusters(object):
+    """Groups reviews by snapped coordinates and normalized name so every distinct
+    venue is matched against the Place graph only once per run."""
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.reviews = 0
+        self.venues: dict[str, dict[str, Any]] = dict()
+        self.resolved: dict[str, str | None] = dict()
+        self.resolution_seconds = 0.0
+
+    def key(self, name: str, latitude: float, longitude: float) -> str:
+        cell_lat = round(latitude / self.cell_degrees)
+        cell_lon = round(longitude / self.cell_degrees)
+        return f"{cell_lat}:{cell_lon}:{normalize_name(name)}"
+
+    def add(self, review: dict[str, Any]) -> str:
+        key = self.key(review["name"], review["latitude"], review["longitude"])
+        self.reviews = self.reviews + 1
+        if key not in self.venues:
+            self.venues[key] = {
+                "key": key,
+                "name": review["name"],
+                "latitude": review["latitude"],
+                "longitude": review["longitude"],
+            }
+        return key
+
+    def unresolved(self, keys: list[str]) -> list[dict[str, Any]]:
+        pending = dict.fromkeys(key for key in keys if key not in self.resolved)
+        return [self.venues[key] for key in pending]
+
+    def resolve(
+        self, venues: list[dict[str, Any]], matches: dict[str, str], seconds: float
+    ) -> None:
+        for venue in venues:
+            self.resolved[venue["key"]] = matches.get(venue["key"])
+        self.resolution_seconds = self.resolution_seconds + seconds
+
+    def summary(self) -> dict[str, Any]:
+        venues = len(self.venues)
+        resolved = len(self.resolved)
+        matched = len([p for p in self.resolved.values() if p is not None])
+        per_venue = self.resolution_seconds / resolved if resolved > 0 else 0.0
+        return {
+            "reviews": self.reviews,
+            "venues": venues,
+            "dedupRatio": round(1 - venues / self.reviews, 4) if self.reviews else 0.0,
+            "matchedVenues": matched,
+            "unmatchedVenues": resolved - matched,
+            "avgVenueMatchMs": round(per_venue * 1000, 2),
+            "estimatedMatchingSecondsSaved": round(
+                per_venue * (self.reviews - venues), 3
+            ),
+        }
@@ -28,6 +28,21 @@ FOR (p:Place) ON (p.region);
 CREATE INDEX Place_confidence IF NOT EXISTS
 FOR (p:Place) ON (p.confidence);
 
+CREATE INDEX Place_postcode IF NOT EXISTS
+FOR (p:Place) ON (p.postcode);
+
+CREATE INDEX Place_freeform IF NOT EXISTS
+FOR (p:Place) ON (p.freeform);
+
+CREATE INDEX Place_name_range IF NOT EXISTS
+FOR (p:Place) ON (p.name);
+
+CREATE INDEX User_born IF NOT EXISTS
+FOR (u:User) ON (u.born);
+
+CREATE INDEX User_gender IF NOT EXISTS
+FOR (u:User) ON (u.gender);
+
 CREATE TEXT INDEX Place_name IF NOT EXISTS
 FOR (p:Place) ON p.name;
 
@@ -0,0 +1,223 @@
+import bisect
+import datetime
+import itertools
+import math
+import random
+from array import array
+from typing import Any, Iterator
+
+# Default bounding box (south, west, north, east): mainland Spain
+DEFAULT_BBOX = (36.0, -9.3, 43.8, 3.3)
+
+SCALES: dict[str, dict[str, int]] = {
+    "10k": {"places": 10_000, "users": 1_000, "categories": 200, "cities": 20},
+    "1m": {"places": 1_000_000, "users": 100_000, "categories": 1_000, "cities": 200},
+    "10m": {
+        "places": 10_000_000,
+        "users": 1_000_000,
+        "categories": 2_000,
+        "cities": 1_000,
+    },
+}
+
+NAME_PREFIXES = ["Casa", "Bar", "Café", "Hotel", "Museo", "Parque", "Taberna", "Mesón"]
+NAME_SUFFIXES = ["del Sol", "Central", "La Plaza", "El Puerto", "Real", "Nuevo", "Mar"]
+
+MAX_RATINGS_PER_USER = 1000
+
+
+def zipf_cumulative_weights(size: int, exponent: float) -> list[float]:
+    return list(
+        itertools.accumulate(
+            1 / math.pow(rank, exponent) for rank in range(1, size + 1)
+        )
+    )
+
+
+def zipf_choice(rng: random.Random, cumulative: list[float]) -> int:
+    return bisect.bisect_left(cumulative, rng.random() * cumulative[-1])
+
+
+class SyntheticGraph(object):
+    """Deterministic synthetic catalog: Zipf distributed categories and city sizes,
+    places clustered around city centers and power-law rating counts per user.
+
+    Every stream draws from its own generator seeded from ``seed``, so the same
+    parameters always produce the same graph whatever the consumption order.
+    """
+
+    def __init__(
+        self,
+        places: int,
+        users: int,
+        categories: int,
+        cities: int,
+        features: int = 30,
+        seed: int = 42,
+        category_skew: float = 1.1,
+        city_skew: float = 1.0,
+        city_spread_km: float = 3.0,
+        rating_alpha: float = 1.5,
+        mean_ratings: float = 20.0,
+        local_ratings: float = 0.8,
+        bbox: tuple[float, float, float, float] = DEFAULT_BBOX,
+    ):
+        self.places_count = places
+        self.users_count = users
+        self.categories_count = categories
+        self.cities_count = cities
+        self.features_count = features
+        self.seed = seed
+        self.city_spread_km = city_spread_km
+        self.rating_alpha = rating_alpha
+        self.mean_ratings = mean_ratings
+        self.local_ratings = local_ratings
+        self.bbox = bbox
+
+        self.category_weights = zipf_cumulative_weights(categories, category_skew)
+        self.city_weights = zipf_cumulative_weights(cities, city_skew)
+        self._city_centers: list[tuple[float, float]] | None = None
+        self._city_of_place: array | None = None
+        self._places_by_city: list[array] | None = None
+
+    def rng(self, stream: str) -> random.Random:
+        return random.Random(f"{self.seed}:{stream}")
+
+    @staticmethod
+    def place_id(index: int) -> str:
+        return f"synthetic-place-{index:09d}"
+
+    @staticmethod
+    def user_id(index: int) -> str:
+        return f"synthetic-user-{index:08d}"
+
+    @staticmethod
+    def category_name(index: int) -> str:
+        return f"synthetic_category_{index:05d}"
+
+    @staticmethod
+    def feature_name(index: int) -> str:
+        return f"synthetic_feature_{index:03d}"
+
+    def quality(self, place_index: int) -> float:
+        # Stable per place, so ratings of the same place agree between users
+        return ((place_index * 2654435761) % 1000) / 1000
+
+    def city_centers(self) -> list[tuple[float, float]]:
+        if self._city_centers is None:
+            rng = self.rng("cities")
+            south, west, north, east = self.bbox
+            self._city_centers = [
+                (rng.uniform(south, north), rng.uniform(west, east))
+                for _ in range(self.cities_count)
+            ]
+        return self._city_centers
+
+    def city_of_place(self) -> array:
+        if self._city_of_place is None:
+            rng = self.rng("place-cities")
+            self._city_of_place = array(
+                "I",
+                (zipf_choice(rng, self.city_weights) for _ in range(self.places_count)),
+            )
+        return self._city_of_place
+
+    def places_by_city(self) -> list[array]:
+        if self._places_by_city is None:
+            self._places_by_city = [array("I") for _ in range(self.cities_count)]
+            for index, city in enumerate(self.city_of_place()):
+                self._places_by_city[city].append(index)
+        return self._places_by_city
+
+    def categories(self) -> Iterator[str]:
+        for index in range(self.categories_count):
+            yield self.category_name(index)
+
+    def features(self) -> Iterator[str]:
+        for index in range(self.features_count):
+            yield self.feature_name(index)
+
+    def places(self) -> Iterator[tuple[dict[str, Any], list[str], list[str]]]:
+        rng = self.rng("places")
+        centers = self.city_centers()
+        cities = self.city_of_place()
+        spread = self.city_spread_km / 111.0
+
+        for index in range(self.places_count):
+            city = cities[index]
+            center_lat, center_lon = centers[city]
+            latitude = center_lat + rng.gauss(0, spread)
+            longitude = center_lon + rng.gauss(0, spread) / max(
+                0.1, math.cos(math.radians(center_lat))
+            )
+
+            categories = [zipf_choice(rng, self.category_weights)]
+            for _ in range(rng.choice([0, 0, 1, 2])):
+                categories.append(zipf_choice(rng, self.category_weights))
+            features = rng.sample(
+                range(self.features_count), rng.randint(0, min(3, self.features_count))
+            )
+
+            place = {
+                "placeId": self.place_id(index),
+                "name": f"{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_SUFFIXES)} {index}",
+                "latitude": round(latitude, 7),
+                "longitude": round(longitude, 7),
+                "locality": f"CITY {city:04d}",
+                "country": "ES",
+                "region": f"REGION {city % 17:02d}",
+                "postcode": f"{(city * 37) % 52 + 1:02d}{index % 1000:03d}",
+                "freeform": f"Calle {rng.randint(1, 500)}, {index % 200}",
+                "confidence": round(rng.uniform(0.3, 1.0), 4),
+            }
+            yield (
+                place,
+                [self.category_name(c) for c in dict.fromkeys(categories)],
+                [self.feature_name(f) for f in features],
+            )
+
+    def users(self) -> Iterator[tuple[dict[str, Any], list[str]]]:
+        rng = self.rng("users")
+        first_day = datetime.date(1950, 1, 1).toordinal()
+        last_day = datetime.date(2008, 12, 31).toordinal()
+
+        for index in range(self.users_count):
+            user = {
+                "userId": self.user_id(index),
+                "born": datetime.date.fromordinal(
+                    rng.randint(first_day, last_day)
+                ).isoformat(),
+                "gender": rng.choice(["m", "f"]),
+            }
+            needs = rng.sample(range(self.features_count), rng.choice([0, 0, 0, 1, 2]))
+            yield user, [self.feature_name(f) for f in needs]
+
+    def ratings(self) -> Iterator[dict[str, Any]]:
+        rng = self.rng("ratings")
+        by_city = self.places_by_city()
+        scale = self.mean_ratings * (self.rating_alpha - 1) / self.rating_alpha
+
+        for index in range(self.users_count):
+            count = min(
+                MAX_RATINGS_PER_USER,
+                self.places_count,
+                max(1, int(scale * rng.paretovariate(self.rating_alpha))),
+            )
+            home = by_city[zipf_choice(rng, self.city_weights)]
+
+            rated: set[int] = set()
+            for _ in range(count):
+                if len(home) > 0 and rng.random() < self.local_ratings:
+                    place = home[rng.randrange(len(home))]
+                else:
+                    place = rng.randrange(self.places_count)
+                if place in rated:
+                    continue
+                rated.add(place)
+
+                rating = 1 + 4 * self.quality(place) + rng.gauss(0, 0.8)
+                yield {
+                    "userId": self.user_id(index),
+                    "placeId": self.place_id(place),
+                    "rating": float(min(5, max(1, round(rating)))),
+                }
@@ -0,0 +1,171 @@
+import json
+import logging
+import time
+from typing import Any, Iterator
+
+from neo4j import AsyncDriver
+
+from neo4j_setup.bulk.files import BulkFiles, place_row
+from neo4j_setup.importers.metrics import ImportMetrics
+from neo4j_setup.importers.overturemaps_importer import content_hash
+from neo4j_setup.importers.pipeline import BatchWriter, Importer
+from neo4j_setup.synthetic.generator import SyntheticGraph
+
+logger = logging.getLogger("neo4j_setup.synthetic")
+
+CATEGORIES_QUERY = """
+UNWIND $batch AS name
+MERGE (c:Category {name: name})
+RETURN count(c) AS written
+"""
+
+FEATURES_QUERY = """
+UNWIND $batch AS name
+MERGE (f:Feature {name: name})
+RETURN count(f) AS written
+"""
+
+PLACES_QUERY = """
+UNWIND $batch AS row
+MERGE (p:Place {placeId: row.place.placeId})
+SET p += row.place
+SET p.coordinates = point({latitude: row.place.latitude, longitude: row.place.longitude})
+SET p.version = randomUUID()
+WITH p, row
+CALL (p, row) {
+    UNWIND row.categories AS name
+    MATCH (c:Category {name: name})
+    MERGE (p)-[:IN_CATEGORY]->(c)
+}
+CALL (p, row) {
+    UNWIND row.features AS name
+    MATCH (f:Feature {name: name})
+    MERGE (p)-[:HAS_FEATURE]->(f)
+}
+RETURN count(p) AS written
+"""
+
+USERS_QUERY = """
+UNWIND $batch AS row
+MERGE (u:User {userId: row.user.userId})
+SET u.born = date(row.user.born)
+SET u.gender = row.user.gender
+WITH u, row
+CALL (u, row) {
+    UNWIND row.needs AS name
+    MATCH (f:Feature {name: name})
+    MERGE (u)-[:NEEDS_FEATURE]->(f)
+}
+RETURN count(u) AS written
+"""
+
+RATINGS_QUERY = """
+UNWIND $batch AS row
+MATCH (u:User {userId: row.userId})
+MATCH (p:Place {placeId: row.placeId})
+MERGE (u)-[r:RATED]->(p)
+SET r.rating = row.rating
+RETURN count(r) AS written
+"""
+
+
+class SyntheticWriter(Importer):
+    def __init__(self, kind: str, query: str):
+        super().__init__()
+        self.kind = kind
+        self.query = query
+
+
+def hashed_place(place: dict[str, Any], categories: list[str]) -> dict[str, Any]:
+    place["contentHash"] = content_hash(place, [{"name": c} for c in categories])
+    return place
+
+
+def write_csv(graph: SyntheticGraph, output: str) -> dict[str, int]:
+    files = BulkFiles(output)
+    try:
+        for name in graph.categories():
+            files.write("categories", [name, "Category"])
+        for name in graph.features():
+            files.write("features", [name, "Feature"])
+
+        for place, categories, features in graph.places():
+            files.write("places", place_row(hashed_place(place, categories)))
+            for name in categories:
+                files.write("in_category", [place["placeId"], name, "IN_CATEGORY"])
+            for name in features:
+                files.write("has_feature", [place["placeId"], name, "HAS_FEATURE"])
+
+        for user, needs in graph.users():
+            files.write("users", [user["userId"], user["born"], user["gender"], "User"])
+            for name in needs:
+                files.write("needs_feature", [user["userId"], name, "NEEDS_FEATURE"])
+
+        for rating in graph.ratings():
+            files.write(
+                "rated",
+                [rating["userId"], rating["placeId"], rating["rating"], "RATED"],
+            )
+    finally:
+        files.close()
+
+    logger.info(json.dumps({"event": "synthetic", "target": "csv", **files.counts}))
+    logger.info(files.admin_import_command())
+    return files.counts
+
+
+async def write_stream(
+    driver: AsyncDriver,
+    writer: SyntheticWriter,
+    rows: Iterator[Any],
+    batch_size: int,
+    max_retries: int,
+) -> ImportMetrics:
+    metrics = ImportMetrics(writer.kind)
+    batch_writer = BatchWriter(driver, writer, metrics, max_retries=max_retries)
+    buffer = list()
+
+    async def flush() -> None:
+        now = time.perf_counter()
+        written = await batch_writer.write(buffer)
+        metrics.record_batch(len(buffer), written, time.perf_counter() - now)
+        buffer.clear()
+
+    for row in rows:
+        metrics.read = metrics.read + 1
+        buffer.append(row)
+        if len(buffer) >= batch_size:
+            await flush()
+    if len(buffer) > 0:
+        await flush()
+
+    metrics.emit("summary", **metrics.summary())
+    return metrics
+
+
+async def write_neo4j(
+    graph: SyntheticGraph, driver: AsyncDriver, batch_size: int, max_retries: int
+) -> None:
+    streams = [
+        (SyntheticWriter("synthetic-categories", CATEGORIES_QUERY), graph.categories()),
+        (SyntheticWriter("synthetic-features", FEATURES_QUERY), graph.features()),
+        (
+            SyntheticWriter("synthetic-places", PLACES_QUERY),
+            (
+                {
+                    "place": hashed_place(place, categories),
+                    "categories": categories,
+                    "features": features,
+                }
+                for place, categories, features in graph.places()
+            ),
+        ),
+        (
+            SyntheticWriter("synthetic-users", USERS_QUERY),
+            ({"user": user, "needs": needs} for user, needs in graph.users()),
+        ),
+        (SyntheticWriter("synthetic-ratings", RATINGS_QUERY), graph.ratings()),
+    ]
+
+    for writer, rows in streams:
+        await write_stream(driver, writer, rows, batch_size, max_retries)